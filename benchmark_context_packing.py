@@ -0,0 +1,101 @@
+"""
+Benchmark context packing
+Compares the previous character-budgeted context builder (4000 chars,
+first-100-chars dedupe, mid-chunk truncation) with the token-budgeted
+knapsack packer on the labeled retrieval queries. Candidates come from the
+BM25 index so no embedding calls are needed.
+
+Reports prompt-context tokens per request (mean / p95 / max / spread),
+near-duplicate chunks dropped and packing time.
+
+Usage:
+    python benchmark_context_packing.py [token_budget]
+"""
+
+import sys
+import json
+import time
+import statistics
+from pathlib import Path
+from src.bm25_index import BM25Index
+from src.context_packer import ContextPacker
+from src.token_counter import count_tokens
+from config import settings
+
+LABELS_FILE = Path("data/eval/retrieval_queries.json")
+CHUNKS_FILE = Path("data/processed/final_chunks.json")
+
+
+def char_budget_context(results, max_length=4000):
+    """The previous build_context_optimized"""
+    context_parts, seen_content, total_length = [], set(), 0
+    for i, result in enumerate(results, 1):
+        content = result['content']
+        if content[:100] in seen_content:
+            continue
+        seen_content.add(content[:100])
+        part = f"[Source {i} - {result['metadata'].get('category', 'General')} | Relevance: {result['combined_score']:.2f}]\n{content}\n\n"
+        if total_length + len(part) > max_length:
+            if i > 3:
+                break
+            available = max_length - total_length - 100
+            if available > 200:
+                part = f"[Source {i} - {result['metadata'].get('category', 'General')}]\n{content[:available]}...\n\n"
+            else:
+                break
+        context_parts.append(part)
+        total_length += len(part)
+    return "".join(context_parts)
+
+
+def format_part(number, result, content):
+    return f"[Source {number} - {result['metadata'].get('category', 'General')} | Relevance: {result['combined_score']:.2f}]\n{content}\n\n"
+
+
+def summarize(values):
+    ordered = sorted(values)
+    return (statistics.mean(ordered), ordered[int(len(ordered) * 0.95) - 1], ordered[-1],
+            statistics.pstdev(ordered))
+
+
+if __name__ == "__main__":
+    budget = int(sys.argv[1]) if len(sys.argv) > 1 else settings.context_token_budget
+
+    with open(CHUNKS_FILE, 'r', encoding='utf-8') as f:
+        chunks = json.load(f)
+    if isinstance(chunks, dict):
+        chunks = chunks.get('chunks', [])
+    by_id = {c["id"]: c for c in chunks}
+    index = BM25Index.build([c["id"] for c in chunks], [c["content"] for c in chunks],
+                            [c.get("metadata", {}) for c in chunks])
+    with open(LABELS_FILE, 'r', encoding='utf-8') as f:
+        queries = [item["query"] for item in json.load(f)]
+
+    packer = ContextPacker(token_budget=budget, duplicate_threshold=settings.context_duplicate_threshold,
+                           model=settings.openai_model)
+
+    old_tokens, new_tokens, duplicates, pack_ms = [], [], 0, []
+    for query in queries:
+        hits = index.search(query, top_k=settings.top_k_results * 2)
+        top = hits[0][1] if hits else 1.0
+        results = [{**by_id[chunk_id], "combined_score": score / top} for chunk_id, score in hits]
+
+        old_tokens.append(count_tokens(char_budget_context(results), settings.openai_model))
+        start = time.perf_counter()
+        packed = packer.pack(results, format_part)
+        pack_ms.append((time.perf_counter() - start) * 1000)
+        new_tokens.append(packed["tokens"])
+        duplicates += len(packed["duplicates"])
+
+    print("="*70)
+    print("CONTEXT PACKING BENCHMARK")
+    print("="*70)
+    print(f"Queries: {len(queries)}  candidates/query: {settings.top_k_results * 2}  token budget: {budget}\n")
+    print(f"{'Builder':<28} {'mean':>7} {'p95':>7} {'max':>7} {'stdev':>7}")
+    print("-"*60)
+    for name, values in [("4000-char budget (old)", old_tokens), (f"{budget}-token knapsack", new_tokens)]:
+        mean, p95, peak, spread = summarize(values)
+        print(f"{name:<28} {mean:>7.0f} {p95:>7.0f} {peak:>7.0f} {spread:>7.1f}")
+    print(f"\nNear-duplicate chunks dropped: {duplicates}")
+    print(f"Packing time: {statistics.mean(pack_ms):.2f} ms mean")
+    print("="*70)
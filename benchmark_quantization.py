@@ -0,0 +1,94 @@
+"""
+Benchmark quantized vector storage against the full-precision index
+Reports resident memory, recall@10 and query latency for none / float16 / int8.
+
+Uses the prebuilt index bundle (data/index_bundle) when present, otherwise a
+synthetic clustered corpus with the same shape as text-embedding-3-small.
+
+Usage:
+    python benchmark_quantization.py
+"""
+
+import time
+import tempfile
+import numpy as np
+from src.index_bundle import IndexBundle, write_bundle
+from src.vector_backends import NumpyCollection
+from config import settings
+
+TOP_K = 10
+N_QUERIES = 200
+
+
+def synthetic_corpus(n_chunks: int = 3000, dim: int = 1536, n_topics: int = 40, seed: int = 42):
+    """Clustered random vectors - roughly how KB chunk embeddings are distributed"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_topics, dim))
+    labels = rng.integers(0, n_topics, n_chunks)
+    vectors = centers[labels] + 0.6 * rng.standard_normal((n_chunks, dim))
+    ids = [f"chunk_{i}" for i in range(n_chunks)]
+    documents = [f"Synthetic chunk {i}" for i in range(n_chunks)]
+    metadatas = [{"category": f"topic_{label}"} for label in labels]
+    return ids, vectors.astype(np.float32), documents, metadatas
+
+
+def make_queries(matrix: np.ndarray, n_queries: int, seed: int = 0) -> np.ndarray:
+    """Perturbed copies of random chunks stand in for user questions"""
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, matrix.shape[0], n_queries)
+    base = np.asarray(matrix[picks], dtype=np.float32)
+    return base + 0.5 * np.abs(base).mean() * rng.standard_normal(base.shape).astype(np.float32)
+
+
+def run_benchmark():
+    print("="*70)
+    print("QUANTIZED EMBEDDING STORAGE BENCHMARK")
+    print("="*70)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bundle_dir = IndexBundle.resolve(settings.index_bundle_directory)
+        if bundle_dir is not None:
+            print(f"Using index bundle: {bundle_dir}")
+        else:
+            print("No index bundle found - using synthetic corpus")
+            ids, vectors, documents, metadatas = synthetic_corpus()
+            bundle_dir = write_bundle(tmp, ids, vectors, documents, metadatas,
+                                      embedding_model="synthetic", collection_name="benchmark")
+
+        bundle = IndexBundle(bundle_dir)
+        n_chunks, dim = bundle.embeddings.shape
+        print(f"Chunks: {n_chunks}  Dimensions: {dim}  Queries: {N_QUERIES}  k: {TOP_K}")
+
+        queries = make_queries(bundle.embeddings, N_QUERIES)
+        exact = NumpyCollection.from_bundle(bundle)
+        baseline = exact.query(queries, n_results=TOP_K)["ids"]
+        full_bytes = n_chunks * dim * 4
+
+        print(f"\n{'Mode':<10} {'Resident MB':>12} {'Reduction':>10} {'Recall@10':>10} {'ms/query':>10}")
+        print("-"*56)
+
+        for mode in ("none", "float16", "int8"):
+            collection = NumpyCollection.from_bundle(bundle, quantization=mode,
+                                                     rerank_factor=settings.quantization_rerank_factor)
+            collection.query(queries[:1], n_results=TOP_K)  # build quantized matrix
+
+            start = time.perf_counter()
+            results = collection.query(queries, n_results=TOP_K)["ids"]
+            elapsed_ms = (time.perf_counter() - start) * 1000 / N_QUERIES
+
+            recall = np.mean([
+                len(set(got) & set(expected)) / len(expected)
+                for got, expected in zip(results, baseline)
+            ])
+            # Full precision counts as resident for "none" (it is scanned on every query)
+            resident = full_bytes if mode == "none" else collection.memory_usage()["quantized_bytes"]
+
+            print(f"{mode:<10} {resident / 1e6:>12.2f} {full_bytes / resident:>9.1f}x "
+                  f"{recall:>10.3f} {elapsed_ms:>10.3f}")
+
+    print("\nRecall is measured against exact float32 search; re-rank factor "
+          f"{settings.quantization_rerank_factor} (QUANTIZATION_RERANK_FACTOR)")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -5,16 +5,27 @@ Build Expert-Level Knowledge Base from ALL Data Sources
 - Chat transcripts
 - Ticket data
 - Zobot extracted data
+
+Usage:
+    python build_expert_kb.py          # add the chunks to the collection
+    python build_expert_kb.py --sync   # only embed new/changed chunks; deletes
+                                       # every other id in the shared collection
 """
 
+import sys
 import json
 from pathlib import Path
 from typing import List, Dict, Any
 from src.data_processor import DataProcessor
 from src.chunker import SemanticChunker
 from src.vector_store import VectorStore
+from src.minhash_lsh import MinHashLSH
+from config import settings
 import re
 
+# Which copy of a near-duplicate cluster survives
+PRIORITY_RANK = {"high": 2, "medium": 1, "low": 0}
+
 class ExpertKBBuilder:
     """Build comprehensive knowledge base from all available sources"""
     
@@ -253,26 +264,59 @@ class ExpertKBBuilder:
         return all_chunks
     
     def deduplicate_chunks(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Remove duplicate chunks based on content similarity"""
+        """Remove near-duplicate chunks (MinHash + LSH over word shingles)"""
         print("\n" + "="*70)
         print("DEDUPLICATING CHUNKS")
         print("="*70)
         
-        unique_chunks = []
-        seen_content = set()
-        
-        for chunk in chunks:
-            # Use first 100 chars as fingerprint
-            content = chunk.get('content', '')
-            fingerprint = content[:100].lower().strip()
-            
-            if fingerprint and fingerprint not in seen_content:
-                seen_content.add(fingerprint)
-                unique_chunks.append(chunk)
+        chunks = [c for c in chunks if c.get('content', '').strip()]
+        lsh = MinHashLSH(threshold=settings.dedup_jaccard_threshold, num_perm=settings.minhash_permutations)
+        # Keep the most authoritative copy of each cluster, then the longest
+        groups = lsh.duplicates([c['content'] for c in chunks], preference=lambda i: (
+            PRIORITY_RANK.get(chunks[i].get('metadata', {}).get('priority', 'medium'), 0),
+            len(chunks[i]['content']),
+            -i
+        ))
+        removed_indices = set()
+        report_clusters = []
+        for group in groups:
+            keep, removed = group['kept'], group['removed']
+            removed_indices.update(removed)
+            report_clusters.append({
+                "kept": chunks[keep].get('id'),
+                "kept_source_type": chunks[keep].get('metadata', {}).get('source_type'),
+                "removed": [
+                    {
+                        "id": chunks[i].get('id'),
+                        "source_type": chunks[i].get('metadata', {}).get('source_type'),
+                        "similarity": round(similarity, 3),
+                        "preview": chunks[i]['content'][:100]
+                    }
+                    for i, similarity in removed.items()
+                ],
+                "min_similarity": round(min(removed.values()), 3)
+            })
+        
+        unique_chunks = [c for i, c in enumerate(chunks) if i not in removed_indices]
+        
+        report = {
+            "threshold": lsh.threshold,
+            "num_perm": lsh.num_perm,
+            "bands": lsh.bands,
+            "rows": lsh.rows,
+            **lsh.last_stats,
+            "input_chunks": len(chunks),
+            "kept_chunks": len(unique_chunks),
+            "clusters": sorted(report_clusters, key=lambda c: -len(c['removed']))
+        }
+        report_file = self.output_dir / "dedup_report.json"
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
         
-        removed = len(chunks) - len(unique_chunks)
-        print(f"✓ Removed {removed} duplicate chunks")
+        print(f"✓ Removed {len(removed_indices)} near-duplicate chunks in {len(groups)} clusters "
+              f"(Jaccard >= {lsh.threshold})")
         print(f"✓ Kept {len(unique_chunks)} unique chunks")
+        print(f"✓ Saved cluster report to {report_file}")
         
         return unique_chunks
     
@@ -339,15 +383,22 @@ class ExpertKBBuilder:
         
         return stats
     
-    def build_vector_store(self, chunks: List[Dict[str, Any]]):
-        """Build vector store from chunks"""
+    def build_vector_store(self, chunks: List[Dict[str, Any]], sync: bool = False):
+        """Build vector store from chunks
+        
+        sync=True re-embeds only new or edited chunks, but also deletes every id
+        that is not an expert chunk - including chunks written by build_focused_kb
+        and the rebuild scripts into the same collection.
+        """
         print("\n" + "="*70)
         print("BUILDING VECTOR STORE")
         print("="*70)
         
         vector_store = VectorStore()
         vector_store.create_collection()
-        vector_store.add_documents(chunks)
+        vector_store.add_documents(chunks, sync=sync)
+        # BM25 + error-code indexes are built with the KB, not on first query
+        vector_store.build_search_indexes()
         
         print("✓ Vector store built successfully")
 
@@ -382,7 +433,7 @@ if __name__ == "__main__":
     print("\n" + "="*70)
     response = input("Build vector store now? (y/n): ")
     if response.lower() == 'y':
-        builder.build_vector_store(chunks)
+        builder.build_vector_store(chunks, sync="--sync" in sys.argv)
         print("\n✓ COMPLETE! Expert knowledge base is ready.")
     else:
         print("\nTo build vector store later, run:")
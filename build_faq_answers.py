@@ -0,0 +1,225 @@
+"""
+Build the FAQ answer table
+Offline step for the precomputed answer tier (src/faq_tier.py):
+
+1. Mine how often each candidate intent comes up in the chat transcripts
+   (training examples in data/processed) and the KB articles (data/kb).
+2. Vet every canonical answer: each fact it states (URL, price, phone
+   number...) must appear verbatim in one of the sources it cites.
+3. Write the intents that are both frequent and vetted, most frequent
+   first, to data/faq/faq_answers.json.
+
+Answers are written for SalesIQ: plain text, no markdown.
+
+Usage:
+    python build_faq_answers.py [min_support]
+"""
+
+import re
+import sys
+import json
+import hashlib
+from datetime import datetime
+from pathlib import Path
+from src.faq_tier import FAQTier, FAQ_FORMAT_VERSION
+from src.bm25_index import tokenize
+from config import settings
+
+CHUNKS_FILE = Path("data/processed/final_chunks.json")
+KB_DIR = Path("data/kb")
+
+# Canonical answers. "phrases" trigger the intent (all words of one phrase
+# must appear), "related" words only count towards coverage.
+FAQ_INTENTS = [
+    {
+        "id": "password_reset",
+        "title": "Password reset (SelfCare)",
+        "phrases": [["reset", "password"], ["forgot", "password"], ["change", "password"],
+                    ["password", "expired"], ["new", "password"]],
+        "related": ["selfcare", "portal", "server", "account", "login", "own", "myself"],
+        "answer": (
+            "You can reset your password yourself on the SelfCare portal: 1. Visit "
+            "https://selfcare.acecloudhosting.com 2. Click 'Forgot your password' 3. Enter your "
+            "server username 4. Enter the CAPTCHA and click Continue 5. Choose an authentication "
+            "method 6. Enter your new password and click Reset. You must have enrolled in SelfCare "
+            "(with Google Authenticator) at least once. If you have trouble, call 1-888-415-5240 or "
+            "email support@acecloudhosting.com."
+        ),
+        "facts": ["selfcare.acecloudhosting.com", "Forgot your password", "CAPTCHA", "Google Authenticator",
+                  "1-888-415-5240"],
+        "sources": ["data/kb/01_password_reset.md", "data/SELFCARE_PORTAL_GUIDE.md", "src/simple_api_working.py"]
+    },
+    {
+        "id": "account_locked",
+        "title": "Account locked",
+        "phrases": [["account", "locked"], ["locked", "out"], ["unlock", "account"]],
+        "related": ["server", "login", "selfcare", "got"],
+        "answer": (
+            "If you are enrolled in SelfCare you can unlock your account yourself at "
+            "https://selfcare.acecloudhosting.com (enrollment is required to reset or unlock your "
+            "account). Otherwise call support at 1-888-415-5240 and they will unlock it within 5-10 "
+            "minutes."
+        ),
+        "facts": ["selfcare.acecloudhosting.com", "Enrollment is required to reset or unlock your account",
+                  "1-888-415-5240", "5-10 minutes"],
+        "sources": ["data/kb/01_password_reset.md", "src/simple_api_working.py"]
+    },
+    {
+        "id": "storage_upgrade_pricing",
+        "title": "Disk storage upgrade plans",
+        "phrases": [["storage", "upgrade"], ["disk", "upgrade"], ["upgrade", "storage"], ["storage", "price"],
+                    ["storage", "cost"], ["storage", "plan"], ["disk", "price"], ["more", "storage"],
+                    ["additional", "storage"]],
+        "related": ["much", "space", "gb", "40gb", "60gb", "80gb", "100gb", "200gb", "disk", "plans", "pricing",
+                    "options", "buy", "add", "server"],
+        "answer": (
+            "We offer these storage upgrade plans: 40GB for $28/Month, 60GB for $40/Month, 80GB for "
+            "$50/Month, 100GB for $60/Month and 200GB for $120/Month. Upgrades are completed within "
+            "2-4 hours with minimal downtime. Tell us which plan you'd like and we'll raise a ticket, "
+            "or contact support at 1-888-415-5240 or support@acecloudhosting.com. Tip: clearing temp "
+            "and cache files first often frees enough space."
+        ),
+        "facts": ["40GB** – $28/Month", "60GB** – $40/Month", "80GB** – $50/Month", "100GB** – $60/Month",
+                  "200GB** – $120/Month", "2-4 hours", "support@acecloudhosting.com"],
+        "sources": ["data/kb/02_disk_storage_upgrade.md"]
+    },
+    {
+        "id": "application_update",
+        "title": "Application update requests",
+        "phrases": [["application", "update"], ["update", "required"], ["requires", "update"], ["needs", "update"],
+                    ["update", "application"]],
+        "related": ["quickbooks", "qb", "lacerte", "drake", "proseries", "adobe", "sage", "cfs", "1099",
+                    "says", "asking", "version", "latest", "new"],
+        "answer": (
+            "Application updates (QuickBooks, Lacerte, Drake, ProSeries, CFS, 1099, Adobe) are handled "
+            "by our support team to avoid downtime for other users. Please contact support at "
+            "1-888-415-5240 or support@acecloudhosting.com and they will schedule the update. Updates "
+            "are usually performed overnight."
+        ),
+        "facts": ["1-888-415-5240", "support@acecloudhosting.com", "application update is performed overnight"],
+        "sources": ["src/simple_api_working.py", "data/zobot_extracted/zobot_qa_pairs.json"]
+    },
+    {
+        "id": "support_contact",
+        "title": "Support contact details",
+        "phrases": [["phone", "number"], ["contact", "support"], ["support", "email"], ["support", "phone"],
+                    ["call", "support"], ["contact", "details"]],
+        "related": ["team", "reach", "ace", "cloud", "hosting", "acecloudhosting", "number", "email", "phone"],
+        "answer": (
+            "You can reach our support team by phone at 1-888-415-5240 or by email at "
+            "support@acecloudhosting.com. For passwords and MFA you can also use the SelfCare portal at "
+            "https://selfcare.acecloudhosting.com."
+        ),
+        "facts": ["Phone: 1-888-415-5240", "Email: support@acecloudhosting.com",
+                  "SelfCare: https://selfcare.acecloudhosting.com"],
+        "sources": ["src/simple_api_working.py"]
+    },
+]
+
+
+def normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).lower()
+
+
+def vet_answer(intent, source_texts):
+    """Facts of the answer that none of its cited sources state"""
+    sources = " ".join(source_texts[source] for source in intent["sources"])
+    return [fact for fact in intent["facts"] if normalize(fact) not in sources]
+
+
+def load_transcripts():
+    with open(CHUNKS_FILE, 'r', encoding='utf-8') as f:
+        chunks = json.load(f)
+    if isinstance(chunks, dict):
+        chunks = chunks.get('chunks', [])
+    return [c["content"] for c in chunks if c.get("metadata", {}).get("type") == "training_example"]
+
+
+def load_kb_sections():
+    sections = []
+    for kb_file in sorted(KB_DIR.glob("*.md")):
+        with open(kb_file, 'r', encoding='utf-8') as f:
+            sections.extend(part for part in re.split(r"\n(?=## )", f.read()) if part.strip())
+    return sections
+
+
+def mine_support(tier, texts):
+    """intent id -> number of texts that trigger it"""
+    support = {}
+    for text in texts:
+        for intent_id in tier.triggered(tokenize(text)):
+            support[intent_id] = support.get(intent_id, 0) + 1
+    return support
+
+
+def build_faq_answers(min_support: int):
+    print("="*70)
+    print("BUILDING FAQ ANSWER TABLE")
+    print("="*70)
+
+    # Mine intent frequency
+    print("\n[1/3] Mining intents from transcripts and KB articles...")
+    transcripts = load_transcripts()
+    kb_sections = load_kb_sections()
+    candidates = FAQTier(FAQ_INTENTS)
+    transcript_support = mine_support(candidates, transcripts)
+    kb_support = mine_support(candidates, kb_sections)
+    print(f"   {len(transcripts)} transcripts, {len(kb_sections)} KB sections")
+
+    # Vet answers against their sources
+    print("\n[2/3] Vetting answers against their sources...")
+    source_texts = {}
+    for intent in FAQ_INTENTS:
+        for source in intent["sources"]:
+            if source not in source_texts:
+                with open(source, 'r', encoding='utf-8') as f:
+                    source_texts[source] = normalize(f.read())
+
+    accepted = []
+    for intent in FAQ_INTENTS:
+        support = transcript_support.get(intent["id"], 0) + kb_support.get(intent["id"], 0)
+        unsupported = vet_answer(intent, source_texts)
+        if unsupported:
+            print(f"   ❌ {intent['id']}: not in cited sources: {unsupported}")
+            continue
+        if support < min_support:
+            print(f"   ⚠️ {intent['id']}: support {support} < {min_support}, skipped")
+            continue
+        print(f"   ✅ {intent['id']}: {transcript_support.get(intent['id'], 0)} transcripts, "
+              f"{kb_support.get(intent['id'], 0)} KB sections")
+        accepted.append({
+            "id": intent["id"],
+            "title": intent["title"],
+            "answer": intent["answer"],
+            "phrases": intent["phrases"],
+            "related": intent["related"],
+            "sources": intent["sources"],
+            "support": {"transcripts": transcript_support.get(intent["id"], 0),
+                        "kb_sections": kb_support.get(intent["id"], 0)}
+        })
+
+    accepted.sort(key=lambda item: -(item["support"]["transcripts"] + item["support"]["kb_sections"]))
+
+    # Write the table
+    print("\n[3/3] Writing table...")
+    output_path = Path(settings.faq_answers_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    table = {
+        "format_version": FAQ_FORMAT_VERSION,
+        "built_at": datetime.now().isoformat(),
+        "sources_fingerprint": hashlib.sha256(
+            "".join(source_texts[source] for source in sorted(source_texts)).encode("utf-8")
+        ).hexdigest(),
+        "intents": accepted
+    }
+    tmp_path = output_path.with_suffix(".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(table, f, ensure_ascii=False, indent=1)
+    tmp_path.replace(output_path)
+
+    print(f"\n✅ {len(accepted)}/{len(FAQ_INTENTS)} intents written to {output_path} "
+          f"({output_path.stat().st_size / 1024:.1f} KB)")
+
+
+if __name__ == "__main__":
+    build_faq_answers(int(sys.argv[1]) if len(sys.argv) > 1 else 1)
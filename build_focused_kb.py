@@ -270,18 +270,17 @@ def build_focused_knowledge_base():
     
     return all_chunks
 
-def rebuild_vector_store_with_focused_data(chunks):
-    """Rebuild vector store with focused chunks"""
+def rebuild_vector_store_with_focused_data(chunks, sync=False):
+    """Rebuild vector store with focused chunks (sync=True only re-embeds changed chunks)"""
     
     print(f"\n{'='*70}")
-    print("REBUILDING VECTOR STORE")
+    print("SYNCING VECTOR STORE" if sync else "REBUILDING VECTOR STORE")
     print(f"{'='*70}")
     
     # Delete existing vector store
-    from config import settings
-    chroma_dir = Path(settings.chroma_persist_directory)
+    chroma_dir = Path(VectorStore.index_directory())
     
-    if chroma_dir.exists():
+    if chroma_dir.exists() and not sync:
         print(f"\nDeleting existing vector store...")
         try:
             shutil.rmtree(chroma_dir)
@@ -290,16 +289,18 @@ def rebuild_vector_store_with_focused_data(chunks):
             print(f"⚠️  Warning: {e}")
     
     # Create new vector store
-    print(f"\nCreating new vector store...")
+    print(f"\nOpening vector store...")
     vector_store = VectorStore()
     vector_store.create_collection()
     
     # Add chunks
     print(f"\nAdding {len(chunks)} chunks...")
-    print("⏳ Generating embeddings (this takes a few minutes)...")
+    if not sync:
+        print("⏳ Generating embeddings (this takes a few minutes)...")
     
     try:
-        vector_store.add_documents(chunks)
+        vector_store.add_documents(chunks, sync=sync)
+        vector_store.build_search_indexes()
         print("✅ Successfully added all chunks!")
     except Exception as e:
         print(f"❌ Error: {e}")
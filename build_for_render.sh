@@ -9,6 +9,10 @@ echo "=================================="
 echo "Installing dependencies..."
 pip install -r requirements.txt
 
+# Cache the tokenizer encodings - token budgets must not depend on network at runtime
+echo "Caching tokenizer encodings..."
+python src/token_counter.py
+
 # Build knowledge base chunks
 echo "Building knowledge base chunks..."
 python -c "
@@ -1,9 +1,16 @@
 """
 Build Knowledge Base for Deployment (Non-Interactive)
+
+Pass --sync to update an existing vector store in place instead of rebuilding it.
+
+After the vector store is built, a versioned index bundle (data/index_bundle) is
+written. The API memory-maps it at startup, so cold starts need no rebuild and
+no OpenAI calls.
 """
 
 import sys
 from build_focused_kb import build_focused_knowledge_base, rebuild_vector_store_with_focused_data
+from src.vector_store import VectorStore
 
 if __name__ == "__main__":
     print("\n🚀 Building Knowledge Base for Deployment\n")
@@ -13,9 +20,15 @@ if __name__ == "__main__":
         chunks = build_focused_knowledge_base()
         
         # Rebuild vector store
-        success = rebuild_vector_store_with_focused_data(chunks)
+        success = rebuild_vector_store_with_focused_data(chunks, sync="--sync" in sys.argv)
         
         if success:
+            # Snapshot the index for memory-mapped cold starts
+            print("\n📦 Writing prebuilt index bundle...")
+            vector_store = VectorStore()
+            vector_store.create_collection()
+            vector_store.export_bundle()
+            
             print("\n✅ Knowledge base built successfully!")
             sys.exit(0)
         else:
@@ -0,0 +1,132 @@
+"""
+Compare reduced-dimension (Matryoshka) embeddings on our own KB and queries
+Reports recall@10 against full-dimension search, query latency and index size
+for each candidate dimension, to pick EMBEDDING_DIMENSIONS.
+
+text-embedding-3-* vectors are Matryoshka-trained: truncating a full vector to
+its first d values and re-normalizing gives the same result as requesting
+dimensions=d. So the KB is embedded once at full size (through the embedding
+cache) and every smaller dimension is derived locally.
+
+Usage:
+    python compare_embedding_dimensions.py [256 512 1024]
+"""
+
+import sys
+import json
+import time
+from pathlib import Path
+import numpy as np
+from src.vector_store import VectorStore
+from config import settings
+
+FULL_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072
+}
+
+TOP_K = 10
+
+# Real support questions seen in SalesIQ / test scripts
+EVAL_QUERIES = [
+    "How do I reset my password?",
+    "I forgot my password",
+    "QuickBooks error -6177",
+    "QuickBooks error -6189, -816",
+    "QuickBooks multi-user mode not working",
+    "QuickBooks frozen on shared server",
+    "QuickBooks company file won't open",
+    "How do I export QuickBooks data to Excel?",
+    "I can't connect to Remote Desktop",
+    "RDP error 0x204",
+    "Remote desktop keeps disconnecting",
+    "How do I connect from my Mac?",
+    "My disk space is showing full",
+    "How much does 200GB storage cost?",
+    "How do I upgrade my storage?",
+    "Printer not showing in RDP session",
+    "Check printing alignment with UniPrint",
+    "Email keeps asking for password in Outlook",
+    "Outlook not receiving emails",
+    "My server is running very slow",
+    "I need to add a new user to my account",
+    "How do I delete a user?",
+    "Lacerte is frozen",
+    "Drake update required",
+    "Backup ProSeries clients",
+    "Adobe keeps crashing",
+    "Set up dual monitors in remote desktop",
+    "Account locked out",
+    "QuickBooks says application requires update",
+    "How do I contact support?",
+]
+
+
+def load_kb_texts():
+    chunks_file = Path("data/expert_kb/expert_kb_chunks.json")
+    if not chunks_file.exists():
+        chunks_file = Path("data/processed/final_chunks.json")
+    with open(chunks_file, 'r', encoding='utf-8') as f:
+        chunks = json.load(f)
+    return [c["content"] for c in chunks if c.get("content")], chunks_file
+
+
+def truncate(matrix: np.ndarray, dims: int) -> np.ndarray:
+    reduced = matrix[:, :dims]
+    norms = np.linalg.norm(reduced, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (reduced / norms).astype(np.float32)
+
+
+def top_k(matrix: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ matrix.T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(top, np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1), axis=1)
+
+
+def compare_dimensions(candidate_dims):
+    full_dims = FULL_DIMENSIONS.get(settings.openai_embedding_model)
+    if not full_dims:
+        print(f"❌ {settings.openai_embedding_model} does not support reduced dimensions")
+        return
+
+    texts, source = load_kb_texts()
+    print("="*70)
+    print("EMBEDDING DIMENSION COMPARISON")
+    print("="*70)
+    print(f"Model: {settings.openai_embedding_model} (full = {full_dims} dims)")
+    print(f"KB: {len(texts)} chunks from {source}")
+    print(f"Queries: {len(EVAL_QUERIES)}")
+
+    vector_store = VectorStore()
+    print("\nEmbedding KB and queries at full dimension (cached after first run)...")
+    kb_full = np.asarray(vector_store.get_embeddings(texts, dimensions=full_dims), dtype=np.float32)
+    query_full = np.asarray(vector_store.get_embeddings(EVAL_QUERIES, dimensions=full_dims), dtype=np.float32)
+
+    baseline = top_k(truncate(kb_full, full_dims), truncate(query_full, full_dims), TOP_K)
+
+    print(f"\n{'Dims':>6} {'Index MB':>10} {'Recall@10':>10} {'Top-1 agree':>12} {'ms/query':>10}")
+    print("-"*52)
+
+    for dims in sorted(set(candidate_dims) | {full_dims}):
+        if dims > full_dims:
+            continue
+        kb = truncate(kb_full, dims)
+        queries = truncate(query_full, dims)
+
+        start = time.perf_counter()
+        for _ in range(20):
+            results = top_k(kb, queries, TOP_K)
+        elapsed_ms = (time.perf_counter() - start) * 1000 / (20 * len(EVAL_QUERIES))
+
+        recall = np.mean([len(set(r) & set(b)) / TOP_K for r, b in zip(results, baseline)])
+        top1 = np.mean(results[:, 0] == baseline[:, 0])
+
+        print(f"{dims:>6} {kb.nbytes / 1e6:>10.2f} {recall:>10.3f} {top1:>12.3f} {elapsed_ms:>10.4f}")
+
+    print("\nSet EMBEDDING_DIMENSIONS and rebuild the index to use a reduced dimension.")
+
+
+if __name__ == "__main__":
+    dims = [int(arg) for arg in sys.argv[1:]] or [256, 512, 1024]
+    compare_dimensions(dims)
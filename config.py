@@ -10,11 +10,58 @@ class Settings(BaseSettings):
     openai_api_key: str = "your_openai_api_key_here"
     openai_model: str = "gpt-4o-mini"
     openai_embedding_model: str = "text-embedding-3-small"
+    embedding_dimensions: Optional[int] = None  # e.g. 256 or 512 (text-embedding-3-* only)
     
     # Vector DB
+    vector_backend: str = "chroma"  # "chroma", "numpy" or "bundle"
     chroma_persist_directory: str = "./data/chroma"
+    numpy_index_directory: str = "./data/numpy_index"
+    index_bundle_directory: str = "./data/index_bundle"
+    vector_quantization: str = "none"  # numpy/bundle only: "none", "float16" or "int8"
+    quantization_rerank_factor: int = 4
     collection_name: str = "acebuddy_kb"
     
+    # Embedding cache
+    embedding_cache_enabled: bool = True
+    embedding_cache_path: str = "./data/embedding_cache/embeddings.sqlite3"
+    query_cache_size: int = 2048
+    query_cache_ttl_seconds: float = 3600
+    embedding_concurrency: int = 4
+    embedding_requests_per_minute: int = 3000
+    embedding_tokens_per_minute: int = 1000000
+    embedding_max_retries: int = 6
+    embedding_max_batch_inputs: int = 2048
+    embedding_max_batch_tokens: int = 250000  # provider cap is 300k per request
+    embedding_max_input_tokens: int = 8191
+    bm25_enabled: bool = True
+    bm25_k1: float = 1.5
+    bm25_b: float = 0.75
+    retrieval_mode: str = "combined"  # "combined" or "rrf"
+    rrf_k: int = 60
+    rrf_vector_weight: float = 1.0
+    rrf_lexical_weight: float = 1.0
+    rrf_depth: int = 0  # candidates per retriever in rrf mode (0 = top_k_results)
+    identifier_index_enabled: bool = True
+    identifier_max_documents: int = 3  # exact-code matches up to this many docs skip vector search
+    semantic_cache_enabled: bool = True
+    semantic_cache_size: int = 500
+    semantic_cache_max_distance: float = 0.08  # cosine distance to the nearest cached question
+    semantic_cache_ttl_seconds: float = 86400
+    faq_enabled: bool = True
+    faq_answers_path: str = "./data/faq/faq_answers.json"
+    faq_min_confidence: float = 0.75  # share of the message the intent must explain
+    retrieval_memory_enabled: bool = True
+    retrieval_memory_sessions: int = 1000
+    retrieval_memory_ttl_seconds: float = 1800
+    follow_up_max_words: int = 6  # longer messages always retrieve fresh
+    single_flight_enabled: bool = True  # identical concurrent first turns share one answer
+    history_compaction_enabled: bool = True
+    history_keep_messages: int = 4  # sent verbatim; older turns are folded into a summary
+    history_summary_max_tokens: int = 200
+    history_max_sessions: int = 1000
+    history_max_stored_messages: int = 40  # per session, even if summaries lag behind
+    history_session_ttl_seconds: float = 3600  # idle sessions are dropped
+    
     # API
     api_host: str = "0.0.0.0"
     api_port: int = 8000
@@ -30,6 +77,10 @@ class Settings(BaseSettings):
     top_k_results: int = 10
     similarity_threshold: float = 0.3
     max_context_length: int = 4000
+    context_token_budget: int = 1000  # prompt tokens for retrieved context
+    context_duplicate_threshold: float = 0.5  # shingle Jaccard above which a chunk is a near-duplicate
+    dedup_jaccard_threshold: float = 0.8  # KB build: shingle Jaccard above which chunks are merged
+    minhash_permutations: int = 128
     
     # Response
     temperature: float = 0.4
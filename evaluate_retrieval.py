@@ -0,0 +1,109 @@
+"""
+Evaluate retrieval modes on the labeled query set
+Compares the current combined_score re-ranking against reciprocal rank fusion
+(RRF) at different candidate depths: recall@k and retrieval latency.
+
+Labels (data/eval/retrieval_queries.json) name the source documents that
+answer each query; a document counts as retrieved when any of its chunks is
+in the top k.
+
+Queries naming an error code are answered by the identifier index before
+either mode runs, so the modes are compared with that index switched off,
+and recall is also reported for code and other queries separately. A last
+row shows what the identifier index gives on the code queries.
+
+Usage:
+    python evaluate_retrieval.py [k]
+"""
+
+import re
+import sys
+import json
+import time
+from pathlib import Path
+from src.expert_rag_engine import ExpertRAGEngine
+from src.identifier_index import extract_codes
+from config import settings
+
+LABELS_FILE = Path("data/eval/retrieval_queries.json")
+
+
+def source_document(chunk_id: str) -> str:
+    return re.sub(r"_chunk_\d+$", "", chunk_id)
+
+
+def recall_at_k(results, relevant, k):
+    retrieved = {source_document(r["id"]) for r in results[:k]}
+    return len(retrieved & set(relevant)) / len(relevant)
+
+
+def evaluate(engine, labeled, mode, k, initial_k, repeats=3):
+    recalls, timings, code_recalls, other_recalls = [], [], [], []
+    for item in labeled:
+        category, _ = engine.classify_query(item["query"])
+        for _ in range(repeats):
+            start = time.perf_counter()
+            results = engine.retrieve_context_advanced(
+                item["query"], category, top_k=k, mode=mode, initial_k=initial_k
+            )
+            timings.append((time.perf_counter() - start) * 1000)
+        recall = recall_at_k(results, item["relevant"], k)
+        recalls.append(recall)
+        (code_recalls if extract_codes(item["query"]) else other_recalls).append(recall)
+    timings.sort()
+    return {
+        "recall": sum(recalls) / len(recalls),
+        "code_recall": sum(code_recalls) / len(code_recalls) if code_recalls else None,
+        "other_recall": sum(other_recalls) / len(other_recalls) if other_recalls else None,
+        "p50_ms": timings[len(timings) // 2],
+        "p95_ms": timings[int(len(timings) * 0.95) - 1]
+    }
+
+
+def format_recall(recall) -> str:
+    return f"{recall:.3f}" if recall is not None else "-"
+
+
+def run_evaluation(k: int):
+    with open(LABELS_FILE, 'r', encoding='utf-8') as f:
+        labeled = json.load(f)
+
+    print("="*70)
+    print("RETRIEVAL EVALUATION")
+    print("="*70)
+
+    engine = ExpertRAGEngine()
+    if engine.bm25_index is None:
+        print("❌ BM25 index unavailable - RRF mode cannot be evaluated")
+        return
+
+    # Warm the query-embedding cache so latency measures retrieval, not the API
+    engine.vector_store.embed_queries([item["query"] for item in labeled])
+
+    code_queries = [item for item in labeled if extract_codes(item["query"])]
+    print(f"Queries: {len(labeled)} ({len(code_queries)} with error codes)  k: {k}  RRF k: {settings.rrf_k}  "
+          f"weights: vector {settings.rrf_vector_weight} / lexical {settings.rrf_lexical_weight}")
+    print(f"\n{'Mode':<10} {'initial_k':>10} {f'Recall@{k}':>10} {'codes':>8} {'other':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    print("-"*68)
+
+    # Compare the rankings themselves - exact code matches would short-circuit both modes
+    identifier_index, engine.identifier_index = engine.identifier_index, None
+    configs = [("combined", k * 2), ("combined", k), ("rrf", k * 2), ("rrf", k), ("rrf", max(3, k // 2))]
+    for mode, initial_k in configs:
+        stats = evaluate(engine, labeled, mode, k, initial_k)
+        print(f"{mode:<10} {initial_k:>10} {stats['recall']:>10.3f} {format_recall(stats['code_recall']):>8} "
+              f"{format_recall(stats['other_recall']):>8} {stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f}")
+    engine.identifier_index = identifier_index
+
+    if identifier_index is not None and code_queries:
+        stats = evaluate(engine, code_queries, None, k, None)
+        print(f"{'identifier':<10} {'-':>10} {'-':>10} {stats['recall']:>8.3f} {'-':>8} "
+              f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f}")
+
+    print("\ncombined @ initial_k = 2k is the current default; set RETRIEVAL_MODE=rrf "
+          "and RRF_DEPTH to switch.")
+
+
+if __name__ == "__main__":
+    top_k = int(sys.argv[1]) if len(sys.argv) > 1 else settings.top_k_results
+    run_evaluation(top_k)
@@ -0,0 +1,86 @@
+"""
+Load test: SalesIQ webhook throughput vs. concurrency
+Runs src/simple_api_working.py against a local OpenAI stand-in that answers
+every chat completion after a fixed delay. With a blocking client the
+throughput stays at ~1/latency whatever the concurrency; with the async
+client it grows with the number of concurrent chats.
+
+Usage:
+    python load_test_async_api.py [latency_seconds] [requests_per_level]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import threading
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+
+STAND_IN_PORT = 8765
+CONCURRENCY_LEVELS = [1, 4, 16, 32]
+
+stand_in = FastAPI()
+LATENCY = float(sys.argv[1]) if len(sys.argv) > 1 else 0.25
+
+
+@stand_in.post("/v1/chat/completions")
+async def chat_completions():
+    await asyncio.sleep(LATENCY)
+    return {
+        "id": "chatcmpl-load-test",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": "gpt-4o-mini",
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": "Please restart the QuickBooks Database Server Manager."},
+            "finish_reason": "stop"
+        }],
+        "usage": {"prompt_tokens": 300, "completion_tokens": 12, "total_tokens": 312}
+    }
+
+
+def start_stand_in():
+    server = uvicorn.Server(uvicorn.Config(stand_in, host="127.0.0.1", port=STAND_IN_PORT, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+
+async def run_level(app, concurrency: int, total: int) -> float:
+    """Requests per second with `concurrency` chats in flight"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://api", timeout=120) as client:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(i):
+            async with semaphore:
+                response = await client.post("/webhook/salesiq", json={
+                    "session_id": f"load_{concurrency}_{i}",
+                    "message": {"text": "QuickBooks shows error 6177 when I open the company file"}
+                })
+                assert "restart" in response.json()["replies"][0], response.json()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        return total / (time.perf_counter() - start)
+
+
+async def main(total: int):
+    from src.simple_api_working import app
+
+    print(f"Stand-in latency {LATENCY * 1000:.0f} ms -> blocking ceiling {1 / LATENCY:.1f} req/s\n")
+    print(f"{'concurrency':>12} {'req/s':>8} {'x ceiling':>10}")
+    for concurrency in CONCURRENCY_LEVELS:
+        throughput = await run_level(app, concurrency, max(total, concurrency))
+        print(f"{concurrency:>12} {throughput:>8.1f} {throughput * LATENCY:>10.1f}")
+
+
+if __name__ == "__main__":
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{STAND_IN_PORT}/v1"
+    os.environ["OPENAI_API_KEY"] = "sk-load-test-0000000000000000"
+    start_stand_in()
+    asyncio.run(main(int(sys.argv[2]) if len(sys.argv) > 2 else 64))
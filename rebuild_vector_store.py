@@ -1,16 +1,20 @@
 """
 Rebuild Vector Store with All Chunks
 This script will properly load all 925 chunks into the vector store
+
+Usage:
+    python rebuild_vector_store.py          # drop and rebuild from scratch
+    python rebuild_vector_store.py --sync   # only embed new/changed chunks
 """
 
+import sys
 import json
 import shutil
 from pathlib import Path
 from src.vector_store import VectorStore
-from config import settings
 
-def rebuild_vector_store():
-    """Rebuild vector store from scratch with all chunks"""
+def rebuild_vector_store(sync: bool = False):
+    """Rebuild vector store from scratch with all chunks (or sync it incrementally)"""
     
     print("="*70)
     print("REBUILDING VECTOR STORE")
@@ -38,9 +42,11 @@ def rebuild_vector_store():
     print(f"   - Training examples: {len(training_chunks)}")
     
     # Step 2: Delete existing vector store
-    chroma_dir = Path(settings.chroma_persist_directory)
+    chroma_dir = Path(VectorStore.index_directory())
     
-    if chroma_dir.exists():
+    if sync:
+        print(f"\n[2/4] Sync mode - keeping existing vector store at {chroma_dir}")
+    elif chroma_dir.exists():
         print(f"\n[2/4] Deleting existing vector store at {chroma_dir}...")
         try:
             shutil.rmtree(chroma_dir)
@@ -52,17 +58,21 @@ def rebuild_vector_store():
         print(f"\n[2/4] No existing vector store found (this is fine)")
     
     # Step 3: Create new vector store
-    print(f"\n[3/4] Creating new vector store...")
+    print(f"\n[3/4] Opening vector store...")
     vector_store = VectorStore()
     vector_store.create_collection()
-    print("✅ Created new collection")
+    print("✅ Collection ready")
     
     # Step 4: Add all chunks
-    print(f"\n[4/4] Adding {len(chunks)} chunks to vector store...")
-    print("⏳ This will take a few minutes (generating embeddings)...")
+    if sync:
+        print(f"\n[4/4] Syncing {len(chunks)} chunks with vector store...")
+    else:
+        print(f"\n[4/4] Adding {len(chunks)} chunks to vector store...")
+        print("⏳ This will take a few minutes (generating embeddings)...")
     
     try:
-        vector_store.add_documents(chunks)
+        vector_store.add_documents(chunks, sync=sync)
+        vector_store.build_search_indexes()
         print("✅ Successfully added all chunks!")
     except Exception as e:
         print(f"❌ Error adding documents: {e}")
@@ -122,7 +132,7 @@ def rebuild_vector_store():
     return True
 
 if __name__ == "__main__":
-    success = rebuild_vector_store()
+    success = rebuild_vector_store(sync="--sync" in sys.argv)
     
     if not success:
         print("\n❌ Rebuild failed. Check errors above.")
@@ -0,0 +1,193 @@
+"""
+Report: prompt tokens spent on conversation history, raw vs. compacted
+Replays the chat transcripts kept in the training examples of
+data/processed/final_chunks.json turn by turn, twice:
+
+- as recorded: visitor and human agent lines
+- with bot replies: the agent lines are replaced by KB articles cut at 1500
+  characters, the length of an ExpertRAGEngine answer in concise mode
+
+Before every user message it counts the history tokens each path sends to
+the model:
+
+- webhook: the simple APIs send the history as is - raw is the last 10 messages
+- engine:  ExpertRAGEngine / RAGEngine re-slice it - raw is the last 5 messages
+
+Compacted is HistoryManager.compact() (summary + last keep_messages), sliced
+the same way. Summaries are flushed between turns, as the seconds a visitor
+takes to type are enough for the background update.
+
+By default summaries come from an extractive stand-in capped at the same
+token budget as the model's (no API calls); --llm uses the chat model.
+
+Usage:
+    python report_history_compaction.py [--llm]
+"""
+
+import re
+import sys
+import json
+from collections import defaultdict
+from pathlib import Path
+
+from src.config import settings
+from src.history_manager import HistoryManager, recent_history
+from src.token_counter import count_tokens
+
+CHUNKS_FILE = Path("data/processed/final_chunks.json")
+BOT_REPLY_CHARS = 1500
+# History length buckets (messages before the current one)
+BUCKETS = [(0, 4), (5, 8), (9, 12), (13, 16), (17, 24), (25, 10**6)]
+
+TIMESTAMP = re.compile(r"\s*\d{1,2}:\d{2}(:\d{2})?\s*[AP]M$")
+METADATA = re.compile(
+    r"^(Website|Operating System|Browser|Device|City|State|Country|Average Response Time|Email|"
+    r"Department|Visitor Details|Chat Transcript|#\d+|\d{1,2} \w{3},|[AP]M$)"
+)
+
+
+def tokens(messages):
+    return sum(count_tokens(m["content"], settings.openai_model) for m in messages)
+
+
+def load_chunks():
+    with open(CHUNKS_FILE, 'r', encoding='utf-8') as f:
+        chunks = json.load(f)
+    if isinstance(chunks, dict):
+        chunks = chunks.get('chunks', [])
+    return chunks
+
+
+def load_transcripts(chunks):
+    """Each training example as alternating user/assistant messages, split on speaker changes"""
+    transcripts = []
+    for chunk in chunks:
+        if chunk.get('metadata', {}).get('type') != 'training_example':
+            continue
+        lines = []
+        for line in chunk['content'].split('\n'):
+            line = TIMESTAMP.sub("", re.sub(r"^[QA]: ", "", line)).strip()
+            if line and not METADATA.match(line):
+                lines.append(line)
+
+        # A speaker is a first word that opens at least two lines
+        first_words = [line.split()[0] for line in lines]
+        speakers = {w for w in first_words if w[0].isupper() and first_words.count(w) >= 2}
+
+        messages, speaker = [], None
+        for line, word in zip(lines, first_words):
+            if messages and (word not in speakers or word == speaker):
+                messages[-1]["content"] += "\n" + line
+                continue
+            role = "user" if not messages or messages[-1]["role"] == "assistant" else "assistant"
+            messages.append({"role": role, "content": line})
+            speaker = word
+        if len(messages) >= 4:
+            transcripts.append(messages)
+    return transcripts
+
+
+def with_bot_replies(transcripts, chunks):
+    """Transcripts with every assistant message replaced by a KB article (cycled in order)"""
+    articles = defaultdict(list)
+    for chunk in chunks:
+        if chunk.get('metadata', {}).get('type') != 'training_example':
+            articles[chunk['metadata'].get('doc_id')].append(chunk['content'])
+    replies = ["\n".join(parts)[:BOT_REPLY_CHARS] for parts in articles.values()]
+
+    replayed, n = [], 0
+    for messages in transcripts:
+        replayed.append([])
+        for message in messages:
+            if message["role"] == "assistant":
+                message = {"role": "assistant", "content": replies[n % len(replies)]}
+                n += 1
+            replayed[-1].append(message)
+    return replayed
+
+
+def extractive_summary(budget):
+    """Stand-in summarizer: first 15 words of each message, oldest dropped past the budget"""
+    def summarize(previous, messages):
+        sentences = [s for s in previous.split("\n") if s]
+        sentences += [f"{m['role']}: {' '.join(m['content'].split()[:15])}" for m in messages]
+        # Keep the opening message (the issue) and the most recent state
+        while len(sentences) > 2 and count_tokens("\n".join(sentences), settings.openai_model) > budget:
+            del sentences[1]
+        return "\n".join(sentences)
+    return summarize
+
+
+def replay(transcripts, manager):
+    rows = defaultdict(lambda: {"turns": 0, "webhook_raw": 0, "webhook": 0, "engine_raw": 0, "engine": 0})
+    for n, messages in enumerate(transcripts):
+        session = f"replay_{n}"
+        for i, message in enumerate(messages):
+            if message["role"] != "user":
+                continue
+            history = messages[:i]
+            compacted = manager.compact(session, history)
+            bucket = next(b for b in BUCKETS if b[0] <= len(history) <= b[1])
+            row = rows[bucket]
+            row["turns"] += 1
+            row["webhook_raw"] += tokens(history[-10:])
+            row["webhook"] += tokens(compacted)
+            row["engine_raw"] += tokens(history[-5:])
+            row["engine"] += tokens(recent_history(compacted, 5))
+            manager.flush()
+        manager.forget(session)
+    return rows
+
+
+def saving(raw, compacted):
+    return f"{100 * (raw - compacted) / raw:+.0f}%" if raw else "-"
+
+
+def report(title, transcripts, manager):
+    rows = replay(transcripts, manager)
+    print(f"\n{title} - mean history tokens per request")
+    print(f"{'history msgs':>12} {'turns':>6} | {'webhook raw':>11} {'compact':>8} {'saving':>7} | "
+          f"{'engine raw':>10} {'compact':>8} {'saving':>7}")
+    totals = defaultdict(int)
+    for bucket in BUCKETS:
+        row = rows.get(bucket)
+        if not row:
+            continue
+        for key, value in row.items():
+            totals[key] += value
+        t = row["turns"]
+        label = f"{bucket[0]}+" if bucket[1] >= 10**6 else f"{bucket[0]}-{bucket[1]}"
+        print(f"{label:>12} {t:>6} | {row['webhook_raw'] / t:>11.0f} {row['webhook'] / t:>8.0f} "
+              f"{saving(row['webhook_raw'], row['webhook']):>7} | {row['engine_raw'] / t:>10.0f} "
+              f"{row['engine'] / t:>8.0f} {saving(row['engine_raw'], row['engine']):>7}")
+    t = totals["turns"]
+    print(f"{'all':>12} {t:>6} | {totals['webhook_raw'] / t:>11.0f} {totals['webhook'] / t:>8.0f} "
+          f"{saving(totals['webhook_raw'], totals['webhook']):>7} | {totals['engine_raw'] / t:>10.0f} "
+          f"{totals['engine'] / t:>8.0f} {saving(totals['engine_raw'], totals['engine']):>7}")
+
+
+def main(use_llm: bool):
+    if not CHUNKS_FILE.exists():
+        print(f"❌ {CHUNKS_FILE} not found")
+        return
+
+    chunks = load_chunks()
+    transcripts = load_transcripts(chunks)
+    budget = settings.history_summary_max_tokens
+    manager = HistoryManager(
+        keep_messages=settings.history_keep_messages,
+        summary_max_tokens=budget,
+        summarize=None if use_llm else extractive_summary(budget)
+    )
+
+    lengths = [len(t) for t in transcripts]
+    print(f"{len(transcripts)} transcripts, {min(lengths)}-{max(lengths)} messages each, "
+          f"keep_messages={manager.keep_messages}, summary budget {budget} tokens "
+          f"({'chat model' if use_llm else 'extractive stand-in'})")
+    report("As recorded", transcripts, manager)
+    report(f"With bot replies ({BOT_REPLY_CHARS} chars)", with_bot_replies(transcripts, chunks), manager)
+    print(f"\n{manager.get_stats()}")
+
+
+if __name__ == "__main__":
+    main("--llm" in sys.argv)
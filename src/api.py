@@ -9,6 +9,7 @@ import hmac
 
 from config import settings
 from src.rag_engine import RAGEngine
+from src.query_cache import query_embedding_cache
 
 app = FastAPI(title="AceBuddy RAG API", version="1.0.0")
 
@@ -177,6 +178,7 @@ async def get_stats():
     return {
         "active_sessions": len(sessions),
         "vector_store": rag_engine.vector_store.get_collection_stats(),
+        "query_embedding_cache": query_embedding_cache.get_stats(),
         "timestamp": datetime.now().isoformat()
     }
 
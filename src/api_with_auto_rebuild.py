@@ -8,9 +8,10 @@ import json
 from datetime import datetime
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
-from openai import OpenAI
+from openai import AsyncOpenAI
 import uvicorn
 import sys
 from pathlib import Path
@@ -31,7 +32,7 @@ app.add_middleware(
 )
 
 # Initialize OpenAI
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 # Session storage
 sessions: Dict[str, list] = {}
@@ -51,36 +52,25 @@ try:
     if str(parent_dir) not in sys.path:
         sys.path.insert(0, str(parent_dir))
     
+    from src.vector_store import VectorStore
+    from src.index_bundle import IndexBundle
+    
+    # Prefer the prebuilt index bundle (memory-mapped, no embedding calls at boot)
+    bundle_dir = IndexBundle.resolve(VectorStore.index_directory("bundle"))
+    use_bundle = bundle_dir is not None
+    
     # Check if ChromaDB exists
     chroma_path = parent_dir / "data" / "chroma" / "chroma.sqlite3"
     processed_path = parent_dir / "data" / "processed" / "final_chunks.json"
     
-    if not chroma_path.exists() and processed_path.exists():
+    if use_bundle:
+        print(f"⚡ Prebuilt index bundle found ({bundle_dir.name}) - skipping rebuild")
+    elif not chroma_path.exists() and processed_path.exists():
         print("⚠️ ChromaDB not found, but processed data exists")
         print("🔨 Rebuilding ChromaDB from processed data...")
         
         # Quick rebuild from processed chunks
         try:
-            import chromadb
-            from chromadb.config import Settings
-            
-            # Create ChromaDB client
-            chroma_client = chromadb.PersistentClient(
-                path=str(parent_dir / "data" / "chroma"),
-                settings=Settings(anonymized_telemetry=False)
-            )
-            
-            # Create collection
-            try:
-                collection = chroma_client.get_collection("acebuddy_kb")
-                print("✅ Collection already exists")
-            except:
-                collection = chroma_client.create_collection(
-                    name="acebuddy_kb",
-                    metadata={"hnsw:space": "cosine"}
-                )
-                print("✅ Created new collection")
-            
             # Load processed chunks
             with open(processed_path, 'r', encoding='utf-8') as f:
                 chunks = json.load(f)
@@ -91,53 +81,26 @@ try:
             
             print(f"📚 Found {len(chunks)} chunks to process")
             
-            # Add chunks in batches
-            batch_size = 100
-            for i in range(0, len(chunks), batch_size):
-                batch = chunks[i:i+batch_size]
-                
-                ids = []
-                documents = []
-                metadatas = []
-                
-                for j, chunk in enumerate(batch):
-                    # Handle different chunk formats safely
-                    if isinstance(chunk, dict):
-                        chunk_id = chunk.get('id', f'chunk_{i+j}')
-                        text = chunk.get('text', chunk.get('content', ''))
-                        metadata = chunk.get('metadata', {})
-                    else:
-                        # If chunk is not a dict, convert to string
-                        chunk_id = f'chunk_{i+j}'
-                        text = str(chunk) if chunk else ''
-                        metadata = {}
-                    
-                    ids.append(chunk_id)
-                    documents.append(text)
-                    metadatas.append(metadata)
-                
-                # Generate embeddings using OpenAI
-                texts_to_embed = [doc[:8000] for doc in documents]  # Limit length
-                
-                try:
-                    response = client.embeddings.create(
-                        model="text-embedding-3-small",
-                        input=texts_to_embed
-                    )
-                    embeddings = [item.embedding for item in response.data]
-                    
-                    # Add to collection
-                    collection.add(
-                        ids=ids,
-                        embeddings=embeddings,
-                        documents=documents,
-                        metadatas=metadatas
-                    )
-                    
-                    print(f"✅ Processed batch {i//batch_size + 1}/{(len(chunks)-1)//batch_size + 1}")
-                except Exception as e:
-                    print(f"⚠️ Error processing batch: {e}")
-                    continue
+            # Normalize the different chunk formats
+            documents = []
+            for i, chunk in enumerate(chunks):
+                if isinstance(chunk, dict):
+                    documents.append({
+                        "id": chunk.get('id', f'chunk_{i}'),
+                        "content": chunk.get('text', chunk.get('content', '')),
+                        "metadata": chunk.get('metadata', {})
+                    })
+                else:
+                    # If chunk is not a dict, convert to string
+                    documents.append({"id": f'chunk_{i}', "content": str(chunk) if chunk else '', "metadata": {}})
+            
+            # Concurrent, rate-limited embedding with retries; cached batches make
+            # a restarted rebuild resume, and a batch that keeps failing aborts the
+            # rebuild instead of leaving silent gaps in the KB
+            builder = VectorStore(backend="chroma")
+            builder.create_collection()
+            builder.add_documents(documents, sync=True)
+            builder.build_search_indexes()
             
             print("✅ ChromaDB rebuilt successfully!")
             
@@ -147,7 +110,9 @@ try:
     
     # Now try to load RAG engine
     from src.expert_rag_engine import ExpertRAGEngine
-    rag_engine = ExpertRAGEngine()
+    rag_engine = ExpertRAGEngine(
+        vector_store=VectorStore(backend="bundle") if use_bundle else None
+    )
     USE_RAG = True
     print("✅ RAG engine loaded - using KB docs!")
     
@@ -156,6 +121,15 @@ except Exception as e:
     print("✅ Using simple prompt instead")
     USE_RAG = False
 
+# Precomputed answers for the most common questions (independent of the KB load)
+try:
+    from src.faq_tier import faq_tier
+except Exception as e:
+    print(f"⚠️ FAQ answers unavailable: {e}")
+    faq_tier = None
+
+from src.history_manager import history_manager, recent_history
+
 print("="*70)
 
 # Enhanced prompt (fallback)
@@ -180,10 +154,11 @@ CRITICAL KNOWLEDGE BASE:
 
 **DISK STORAGE UPGRADES:**
 - Current tiers and pricing:
-  * 40GB: $10/month
-  * 80GB: $20/month
-  * 120GB: $30/month
-  * 200GB: $50/month
+  * 40GB: $28/month
+  * 60GB: $40/month
+  * 80GB: $50/month
+  * 100GB: $60/month
+  * 200GB: $120/month
 - Upgrade process: Contact support@acecloudhosting.com or call 1-888-415-5240
 - Upgrade time: 2-4 hours typically
 - Check current space: Right-click C: drive → Properties
@@ -203,6 +178,9 @@ GREETING: "Hello! I'm AceBuddy. How can I assist you today?"
 # Keep original for /chat endpoint
 ENHANCED_PROMPT = SALESIQ_PROMPT
 
+# Longest reply sent to SalesIQ
+SALESIQ_MAX_CHARS = 1800
+
 class ChatRequest(BaseModel):
     message: str
     conversation_id: str = "default"
@@ -238,14 +216,15 @@ async def chat(request: ChatRequest):
         if request.conversation_id not in sessions:
             sessions[request.conversation_id] = []
         
-        conversation_history = sessions[request.conversation_id][-10:]
+        conversation_history = history_manager.compact(request.conversation_id, sessions[request.conversation_id])
         
         # Try RAG first
         if USE_RAG and rag_engine:
             try:
-                result = rag_engine.process_query_expert(
+                result = await rag_engine.process_query_expert_async(
                     request.message,
-                    conversation_history=conversation_history
+                    conversation_history=conversation_history,
+                    session_id=request.conversation_id
                 )
                 ai_response = result["response"]
                 
@@ -267,7 +246,7 @@ async def chat(request: ChatRequest):
                 messages.extend(conversation_history)
                 messages.append({"role": "user", "content": request.message})
                 
-                response = client.chat.completions.create(
+                response = await client.chat.completions.create(
                     model="gpt-4o-mini",
                     messages=messages,
                     temperature=0.3,
@@ -280,7 +259,7 @@ async def chat(request: ChatRequest):
             messages.extend(conversation_history)
             messages.append({"role": "user", "content": request.message})
             
-            response = client.chat.completions.create(
+            response = await client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=messages,
                 temperature=0.3,
@@ -300,9 +279,70 @@ async def chat(request: ChatRequest):
         print(f"[Chat Error] {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def chat_events(message: str, conversation_history: list, conversation_id: str):
+    """Answer events for /chat/stream: RAG, or the plain prompt when RAG is off or fails before answering"""
+    from src.sse_streaming import stream_chat_completion
+    if USE_RAG and rag_engine:
+        started = False
+        try:
+            async for kind, payload in rag_engine.stream_query_expert(
+                message,
+                conversation_history=conversation_history,
+                session_id=conversation_id
+            ):
+                started = True
+                yield kind, payload
+            return
+        except Exception as e:
+            if started:
+                raise
+            print(f"RAG failed: {e}, using fallback")
+    
+    messages = [{"role": "system", "content": ENHANCED_PROMPT}]
+    messages.extend(conversation_history)
+    messages.append({"role": "user", "content": message})
+    
+    parts = []
+    async for text in stream_chat_completion(
+        client,
+        model="gpt-4o-mini",
+        messages=messages,
+        temperature=0.3,
+        max_tokens=500
+    ):
+        parts.append(text)
+        yield "token", text
+    yield "done", {"response": "".join(parts).strip(), "escalate": False, "sources": []}
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """Streaming /chat: SSE "token" events as the answer is generated, then a "done" event with the metadata"""
+    from src.sse_streaming import sse_chat_stream, SSE_HEADERS
+    if request.conversation_id not in sessions:
+        sessions[request.conversation_id] = []
+    
+    conversation_history = history_manager.compact(request.conversation_id, sessions[request.conversation_id])
+    
+    def on_done(result):
+        sessions[request.conversation_id].append({"role": "user", "content": request.message})
+        sessions[request.conversation_id].append({"role": "assistant", "content": result["response"]})
+        print(f"🔍 STREAMED: {request.message[:100]} -> {result.get('category', 'N/A')}, "
+              f"{len(result.get('sources', []))} sources")
+        return {
+            "conversation_id": request.conversation_id,
+            "category": result.get("category"),
+            "confidence": result.get("confidence"),
+            "escalate": result.get("escalate", False),
+            "sources": result.get("sources", [])
+        }
+    
+    events = chat_events(request.message, conversation_history, request.conversation_id)
+    return StreamingResponse(sse_chat_stream(events, on_done), media_type="text/event-stream", headers=SSE_HEADERS)
+
 @app.post("/webhook/salesiq")
 async def salesiq_webhook(request: Request):
     """SalesIQ webhook - BULLETPROOF VERSION"""
+    from src.sse_streaming import bounded_chat_completion, trim_to_sentence
     ai_response = "I'm here to help! How can I assist you today?"  # Default fallback
     
     try:
@@ -346,47 +386,48 @@ async def salesiq_webhook(request: Request):
                 if session_key not in sessions:
                     sessions[session_key] = []
                 
-                conversation_history = sessions[session_key][-10:]
+                conversation_history = history_manager.compact(session_key, sessions[session_key])
+                
+                # Common opening questions have precomputed answers - no retrieval or LLM call.
+                # Later turns depend on the conversation, so they always go to the engine.
+                faq = faq_tier.match(message) if faq_tier and not sessions[session_key] else None
+                if faq:
+                    ai_response = faq["answer"]
+                    print(f"✅ FAQ Answer: {faq['intent']} ({faq['confidence']})")
                 
                 # Try RAG first
-                if USE_RAG and rag_engine:
+                elif USE_RAG and rag_engine:
                     try:
-                        # Generate response
-                        result = rag_engine.process_query_expert(
+                        # Generate response - one completion, stopped at a sentence inside the limit
+                        result = await rag_engine.process_query_expert_async(
                             message,
                             conversation_history=conversation_history,
-                            concise_mode=False
+                            session_id=session_key,
+                            concise_mode=True,
+                            max_chars=SALESIQ_MAX_CHARS
                         )
                         ai_response = result.get("response", "").strip()
                         
-                        print(f"✅ RAG Response Length: {len(ai_response)} chars")
-                        
-                        # If too long, regenerate concisely
-                        if len(ai_response) > 1800:
-                            print(f"⚠️ Too long, regenerating...")
-                            result = rag_engine.process_query_expert(
-                                message,
-                                conversation_history=conversation_history,
-                                concise_mode=True
-                            )
-                            ai_response = result.get("response", "").strip()
-                            print(f"✅ Concise: {len(ai_response)} chars")
+                        print(f"✅ RAG Response Length: {len(ai_response)} chars"
+                              f"{' (stopped at limit)' if result.get('truncated') else ''}")
                             
                     except Exception as e:
                         print(f"❌ RAG Error: {e}")
                         # Fallback to simple prompt
                         try:
                             messages = [{"role": "system", "content": SALESIQ_PROMPT + "\n\nBe concise (under 1500 chars)."}]
-                            messages.extend(conversation_history[-5:])
+                            messages.extend(recent_history(conversation_history, 5))
                             messages.append({"role": "user", "content": message})
                             
-                            response = client.chat.completions.create(
+                            bounded = await bounded_chat_completion(
+                                client,
+                                SALESIQ_MAX_CHARS,
                                 model="gpt-4o-mini",
                                 messages=messages,
                                 temperature=0.3,
                                 max_tokens=500
                             )
-                            ai_response = response.choices[0].message.content.strip()
+                            ai_response = bounded["text"]
                         except Exception as e2:
                             print(f"❌ Fallback Error: {e2}")
                             ai_response = "I'm experiencing technical difficulties. Please contact support@acecloudhosting.com or call 1-888-415-5240."
@@ -396,9 +437,8 @@ async def salesiq_webhook(request: Request):
                 while "  " in ai_response:
                     ai_response = ai_response.replace("  ", " ")
                 
-                # Truncate if needed
-                if len(ai_response) > 1900:
-                    ai_response = ai_response[:1800] + "... Contact support@acecloudhosting.com or 1-888-415-5240 for more details."
+                # Enforce the limit on every path (cleaning only ever shortens)
+                ai_response = trim_to_sentence(ai_response, SALESIQ_MAX_CHARS)
                 
                 # Remove problematic chars
                 ai_response = ai_response.replace('"', "'").replace('\r', '').replace('\t', ' ')
@@ -439,10 +479,22 @@ async def salesiq_webhook(request: Request):
 
 @app.get("/stats")
 async def get_stats():
+    from src.query_cache import query_embedding_cache
+    from src.semantic_cache import semantic_response_cache
+    from src.retrieval_memory import retrieval_memory
+    from src.single_flight import single_flight
+    from src.sse_streaming import time_to_first_token
     return {
         "active_sessions": len(sessions),
         "total_messages": sum(len(msgs) for msgs in sessions.values()),
         "using_rag": USE_RAG,
+        "query_embedding_cache": query_embedding_cache.get_stats(),
+        "semantic_response_cache": semantic_response_cache.get_stats(),
+        "retrieval_memory": retrieval_memory.get_stats(),
+        "single_flight": single_flight.get_stats(),
+        "history": history_manager.get_stats(),
+        "faq_tier": faq_tier.get_stats() if faq_tier else None,
+        "time_to_first_token": time_to_first_token.get_stats(),
         "timestamp": datetime.now().isoformat()
     }
 
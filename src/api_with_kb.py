@@ -20,6 +20,11 @@ if str(parent_dir) not in sys.path:
 
 # Import RAG engine
 from src.expert_rag_engine import ExpertRAGEngine
+from src.query_cache import query_embedding_cache
+from src.semantic_cache import semantic_response_cache
+from src.retrieval_memory import retrieval_memory
+from src.single_flight import single_flight
+from src.history_manager import history_manager
 
 app = FastAPI(
     title="AceBuddy API with KB",
@@ -59,6 +64,7 @@ async def root():
         "service": "AceBuddy API with KB",
         "version": "3.0.0",
         "using_kb_docs": True,
+        "query_embedding_cache": query_embedding_cache.get_stats(),
         "timestamp": datetime.now().isoformat()
     }
 
@@ -68,6 +74,7 @@ async def health():
         "status": "healthy",
         "active_sessions": len(sessions),
         "using_kb_docs": True,
+        "query_embedding_cache": query_embedding_cache.get_stats(),
         "timestamp": datetime.now().isoformat()
     }
 
@@ -79,12 +86,13 @@ async def chat(request: ChatRequest):
         if request.conversation_id not in sessions:
             sessions[request.conversation_id] = []
         
-        conversation_history = sessions[request.conversation_id][-10:]
+        conversation_history = history_manager.compact(request.conversation_id, sessions[request.conversation_id])
         
         # Process with RAG engine (uses your KB docs!)
-        result = rag_engine.process_query_expert(
+        result = await rag_engine.process_query_expert_async(
             request.message,
-            conversation_history=conversation_history
+            conversation_history=conversation_history,
+            session_id=request.conversation_id
         )
         
         # Update history
@@ -131,14 +139,15 @@ async def salesiq_webhook(request: Request):
         if session_key not in sessions:
             sessions[session_key] = []
         
-        conversation_history = sessions[session_key][-10:]
+        conversation_history = history_manager.compact(session_key, sessions[session_key])
         
         print(f"[SalesIQ] Processing with KB docs...")
         
         # Process with RAG engine (uses your KB docs!)
-        result = rag_engine.process_query_expert(
+        result = await rag_engine.process_query_expert_async(
             message,
-            conversation_history=conversation_history
+            conversation_history=conversation_history,
+            session_id=session_key
         )
         
         ai_response = result["response"]
@@ -175,6 +184,11 @@ async def get_stats():
         "active_sessions": len(sessions),
         "total_messages": sum(len(msgs) for msgs in sessions.values()),
         "using_kb_docs": True,
+        "query_embedding_cache": query_embedding_cache.get_stats(),
+        "semantic_response_cache": semantic_response_cache.get_stats(),
+        "retrieval_memory": retrieval_memory.get_stats(),
+        "single_flight": single_flight.get_stats(),
+        "history": history_manager.get_stats(),
         "timestamp": datetime.now().isoformat()
     }
 
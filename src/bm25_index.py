@@ -0,0 +1,216 @@
+"""
+BM25 Inverted Index
+Lexical first-stage retriever over every KB chunk. Exact tokens such as
+error codes ("-6177", "0x204") and product names ("UniPrint") that embeddings
+blur together are matched directly.
+
+Persisted next to the vector index:
+    bm25/<collection>/
+        manifest.json   KB version, parameters, vocabulary size
+        postings.npz    CSR-style postings (term offsets, doc rows, term freqs)
+        docs.json       chunk ids, metadata (for filtering) and vocabulary
+"""
+
+import re
+import json
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+import sys
+
+import numpy as np
+
+# Add parent directory to path for imports (Render compatibility)
+current_dir = Path(__file__).parent
+parent_dir = current_dir.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+try:
+    from vector_backends import matches_where
+except ImportError:
+    from src.vector_backends import matches_where
+
+BM25_FORMAT_VERSION = 1
+
+STOP_WORDS = {
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+    'of', 'with', 'by', 'from', 'is', 'are', 'was', 'were', 'been', 'be',
+    'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could',
+    'should', 'may', 'might', 'can', 'my', 'i', 'me', 'how', 'what', 'when',
+    'it', 'this', 'that', 'you', 'your', 'we', 'our', 'not', 'if', 'as', 'so'
+}
+
+# Hex codes first so "0x204" stays one token; error codes like "-6177" index as "6177"
+TOKEN_PATTERN = re.compile(r"0x[0-9a-f]+|[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word/number tokens without stop words"""
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOP_WORDS]
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed chunk set"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.kb_version: Optional[str] = None
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.metadatas: List[Dict[str, Any]] = []
+        self.vocabulary: Dict[str, int] = {}
+        self.term_offsets = np.zeros(1, dtype=np.int64)
+        self.postings_rows = np.zeros(0, dtype=np.int32)
+        self.postings_tf = np.zeros(0, dtype=np.float32)
+        self.doc_lengths = np.zeros(0, dtype=np.float32)
+        self.idf = np.zeros(0, dtype=np.float32)
+
+    @classmethod
+    def build(
+        cls,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        kb_version: Optional[str] = None,
+        k1: float = 1.5,
+        b: float = 0.75
+    ) -> "BM25Index":
+        index = cls(k1=k1, b=b)
+        index.kb_version = kb_version
+        index.ids = list(ids)
+        index.metadatas = [meta or {} for meta in metadatas]
+
+        postings: Dict[str, Dict[int, int]] = {}
+        lengths = np.zeros(len(ids), dtype=np.float32)
+        for row, document in enumerate(documents):
+            tokens = tokenize(document or "")
+            lengths[row] = len(tokens)
+            for token in tokens:
+                term_postings = postings.setdefault(token, {})
+                term_postings[row] = term_postings.get(row, 0) + 1
+
+        terms = sorted(postings)
+        index.vocabulary = {term: i for i, term in enumerate(terms)}
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        rows, tfs = [], []
+        for i, term in enumerate(terms):
+            for row, tf in sorted(postings[term].items()):
+                rows.append(row)
+                tfs.append(tf)
+            offsets[i + 1] = len(rows)
+
+        index.term_offsets = offsets
+        index.postings_rows = np.asarray(rows, dtype=np.int32)
+        index.postings_tf = np.asarray(tfs, dtype=np.float32)
+        index.doc_lengths = lengths
+        index._compute_idf()
+        return index
+
+    def _compute_idf(self):
+        self.rows = {chunk_id: row for row, chunk_id in enumerate(self.ids)}
+        n_docs = len(self.ids)
+        doc_freq = np.diff(self.term_offsets).astype(np.float32)
+        self.idf = np.log(1.0 + (n_docs - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+        self.avg_doc_length = float(self.doc_lengths.mean()) if n_docs else 0.0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def score(self, query: str) -> np.ndarray:
+        """BM25 score of every chunk for the query"""
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        if not self.ids:
+            return scores
+        norm = self.k1 * (1 - self.b + self.b * self.doc_lengths / max(self.avg_doc_length, 1e-9))
+
+        for term in set(tokenize(query)):
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                continue
+            start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+            rows = self.postings_rows[start:end]
+            tf = self.postings_tf[start:end]
+            scores[rows] += self.idf[term_id] * tf * (self.k1 + 1) / (tf + norm[rows])
+        return scores
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        where: Optional[Dict] = None,
+        scores: Optional[np.ndarray] = None
+    ) -> List[Tuple[str, float]]:
+        """(chunk id, score) pairs for the best-matching chunks, best first"""
+        if scores is None:
+            scores = self.score(query)
+        candidates = np.nonzero(scores > 0)[0]
+        if where:
+            candidates = np.array(
+                [row for row in candidates if matches_where(self.metadatas[row], where)],
+                dtype=np.int64
+            )
+        if len(candidates) == 0:
+            return []
+
+        k = min(top_k, len(candidates))
+        candidate_scores = scores[candidates]
+        top = np.argpartition(-candidate_scores, k - 1)[:k]
+        # Ties broken by row so results are deterministic
+        top = sorted(top, key=lambda i: (-candidate_scores[i], candidates[i]))
+        return [(self.ids[candidates[i]], float(candidate_scores[i])) for i in top]
+
+    def save(self, directory: str):
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        # Invalidate any previous index until the new one is fully written
+        (path / "manifest.json").unlink(missing_ok=True)
+        np.savez(
+            path / "postings.npz",
+            term_offsets=self.term_offsets,
+            postings_rows=self.postings_rows,
+            postings_tf=self.postings_tf,
+            doc_lengths=self.doc_lengths
+        )
+        terms = sorted(self.vocabulary, key=self.vocabulary.get)
+        with open(path / "docs.json", 'w', encoding='utf-8') as f:
+            json.dump({"ids": self.ids, "metadatas": self.metadatas, "terms": terms}, f, ensure_ascii=False)
+        # Manifest last - its presence marks a complete index
+        with open(path / "manifest.json", 'w', encoding='utf-8') as f:
+            json.dump({
+                "format_version": BM25_FORMAT_VERSION,
+                "kb_version": self.kb_version,
+                "k1": self.k1,
+                "b": self.b,
+                "documents": len(self.ids),
+                "terms": len(terms)
+            }, f, indent=2)
+
+    @classmethod
+    def load(cls, directory: str, kb_version: Optional[str] = None) -> Optional["BM25Index"]:
+        """Load a saved index; None if missing, outdated or built for another KB version"""
+        path = Path(directory)
+        manifest_file = path / "manifest.json"
+        if not manifest_file.exists():
+            return None
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get("format_version") != BM25_FORMAT_VERSION:
+            return None
+        if kb_version is not None and manifest.get("kb_version") != kb_version:
+            return None
+
+        index = cls(k1=manifest["k1"], b=manifest["b"])
+        index.kb_version = manifest.get("kb_version")
+        arrays = np.load(path / "postings.npz")
+        index.term_offsets = arrays["term_offsets"]
+        index.postings_rows = arrays["postings_rows"]
+        index.postings_tf = arrays["postings_tf"]
+        index.doc_lengths = arrays["doc_lengths"]
+        with open(path / "docs.json", 'r', encoding='utf-8') as f:
+            docs = json.load(f)
+        index.ids = docs["ids"]
+        index.metadatas = docs["metadatas"]
+        index.vocabulary = {term: i for i, term in enumerate(docs["terms"])}
+        index._compute_idf()
+        return index
@@ -7,6 +7,8 @@ class Settings:
     openai_api_key = os.getenv("OPENAI_API_KEY", "")
     openai_model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
     openai_embedding_model = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+    # Reduced (Matryoshka) dimensions, e.g. 256 or 512 - unset means model default
+    embedding_dimensions = int(os.getenv("EMBEDDING_DIMENSIONS")) if os.getenv("EMBEDDING_DIMENSIONS") else None
     
     # Generation params
     temperature = float(os.getenv("TEMPERATURE", "0.4"))
@@ -16,9 +18,63 @@ class Settings:
     top_k_results = 5
     similarity_threshold = 0.3
     max_context_length = 3000
+    context_token_budget = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1000"))  # prompt tokens for retrieved context
+    context_duplicate_threshold = float(os.getenv("CONTEXT_DUPLICATE_THRESHOLD", "0.5"))
     
-    # ChromaDB
+    # Vector DB ("chroma", "numpy" or "bundle")
+    vector_backend = os.getenv("VECTOR_BACKEND", "chroma")
     chroma_persist_directory = str(Path(__file__).parent.parent / "data" / "chroma")
+    numpy_index_directory = str(Path(__file__).parent.parent / "data" / "numpy_index")
+    index_bundle_directory = str(Path(__file__).parent.parent / "data" / "index_bundle")
+    vector_quantization = os.getenv("VECTOR_QUANTIZATION", "none")  # numpy/bundle only
+    quantization_rerank_factor = int(os.getenv("QUANTIZATION_RERANK_FACTOR", "4"))
     collection_name = "acebuddy_kb"
+    
+    # Embedding cache
+    embedding_cache_enabled = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    embedding_cache_path = os.getenv(
+        "EMBEDDING_CACHE_PATH",
+        str(Path(__file__).parent.parent / "data" / "embedding_cache" / "embeddings.sqlite3")
+    )
+    query_cache_size = int(os.getenv("QUERY_CACHE_SIZE", "2048"))
+    query_cache_ttl_seconds = float(os.getenv("QUERY_CACHE_TTL_SECONDS", "3600"))
+    embedding_concurrency = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))
+    embedding_requests_per_minute = int(os.getenv("EMBEDDING_REQUESTS_PER_MINUTE", "3000"))
+    embedding_tokens_per_minute = int(os.getenv("EMBEDDING_TOKENS_PER_MINUTE", "1000000"))
+    embedding_max_retries = int(os.getenv("EMBEDDING_MAX_RETRIES", "6"))
+    embedding_max_batch_inputs = int(os.getenv("EMBEDDING_MAX_BATCH_INPUTS", "2048"))
+    embedding_max_batch_tokens = int(os.getenv("EMBEDDING_MAX_BATCH_TOKENS", "250000"))  # provider cap is 300k
+    embedding_max_input_tokens = int(os.getenv("EMBEDDING_MAX_INPUT_TOKENS", "8191"))
+    bm25_enabled = os.getenv("BM25_ENABLED", "true").lower() == "true"
+    bm25_k1 = float(os.getenv("BM25_K1", "1.5"))
+    bm25_b = float(os.getenv("BM25_B", "0.75"))
+    retrieval_mode = os.getenv("RETRIEVAL_MODE", "combined")  # "combined" or "rrf"
+    rrf_k = int(os.getenv("RRF_K", "60"))
+    rrf_vector_weight = float(os.getenv("RRF_VECTOR_WEIGHT", "1.0"))
+    rrf_lexical_weight = float(os.getenv("RRF_LEXICAL_WEIGHT", "1.0"))
+    rrf_depth = int(os.getenv("RRF_DEPTH", "0"))  # candidates per retriever (0 = top_k_results)
+    identifier_index_enabled = os.getenv("IDENTIFIER_INDEX_ENABLED", "true").lower() == "true"
+    identifier_max_documents = int(os.getenv("IDENTIFIER_MAX_DOCUMENTS", "3"))
+    semantic_cache_enabled = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+    semantic_cache_size = int(os.getenv("SEMANTIC_CACHE_SIZE", "500"))
+    semantic_cache_max_distance = float(os.getenv("SEMANTIC_CACHE_MAX_DISTANCE", "0.08"))  # cosine distance
+    semantic_cache_ttl_seconds = float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "86400"))
+    faq_enabled = os.getenv("FAQ_ENABLED", "true").lower() == "true"
+    faq_answers_path = os.getenv(
+        "FAQ_ANSWERS_PATH",
+        str(Path(__file__).parent.parent / "data" / "faq" / "faq_answers.json")
+    )
+    faq_min_confidence = float(os.getenv("FAQ_MIN_CONFIDENCE", "0.75"))
+    retrieval_memory_enabled = os.getenv("RETRIEVAL_MEMORY_ENABLED", "true").lower() == "true"
+    retrieval_memory_sessions = int(os.getenv("RETRIEVAL_MEMORY_SESSIONS", "1000"))
+    retrieval_memory_ttl_seconds = float(os.getenv("RETRIEVAL_MEMORY_TTL_SECONDS", "1800"))
+    follow_up_max_words = int(os.getenv("FOLLOW_UP_MAX_WORDS", "6"))  # longer messages retrieve fresh
+    single_flight_enabled = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+    history_compaction_enabled = os.getenv("HISTORY_COMPACTION_ENABLED", "true").lower() == "true"
+    history_keep_messages = int(os.getenv("HISTORY_KEEP_MESSAGES", "4"))  # older turns are summarized
+    history_summary_max_tokens = int(os.getenv("HISTORY_SUMMARY_MAX_TOKENS", "200"))
+    history_max_sessions = int(os.getenv("HISTORY_MAX_SESSIONS", "1000"))
+    history_max_stored_messages = int(os.getenv("HISTORY_MAX_STORED_MESSAGES", "40"))
+    history_session_ttl_seconds = float(os.getenv("HISTORY_SESSION_TTL_SECONDS", "3600"))
 
 settings = Settings()
@@ -0,0 +1,150 @@
+"""
+Context Packer
+Fills a fixed prompt-token budget with retrieved chunks:
+
+1. Near-duplicates are dropped by word-shingle Jaccard similarity against
+   every higher-ranked chunk already kept (not just a 100-char prefix).
+2. The remaining chunks are chosen as a 0/1 knapsack: maximise total
+   relevance with token counts (from the local tokenizer) as weights.
+3. Chosen chunks are emitted whole, in relevance order. Only a single
+   chunk larger than the whole budget is cut, at a token boundary.
+
+Prompt tokens per request therefore never exceed the budget, and the
+budget goes to the most relevant distinct text.
+"""
+
+import re
+import zlib
+from typing import List, Dict, Any, Set, Callable
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports (Render compatibility)
+current_dir = Path(__file__).parent
+parent_dir = current_dir.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+try:
+    from token_counter import count_tokens, split_by_tokens
+except ImportError:
+    from src.token_counter import count_tokens, split_by_tokens
+
+SHINGLE_SIZE = 5
+# Knapsack capacity is bucketed so the DP stays ~200 columns wide for any budget
+KNAPSACK_COLUMNS = 200
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[int]:
+    """Hashed word n-grams of text (the words themselves for short texts)"""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= size:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))}
+    return {zlib.crc32(" ".join(words[i:i + size]).encode("utf-8")) for i in range(len(words) - size + 1)}
+
+
+def jaccard(a: Set[int], b: Set[int]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def relevance(result: Dict[str, Any]) -> float:
+    """combined_score when re-ranked, else similarity from the vector distance"""
+    if result.get('combined_score') is not None:
+        return result['combined_score']
+    distance = result.get('distance')
+    return 1.0 - distance if distance is not None else 0.0
+
+
+def knapsack(weights: List[int], values: List[float], capacity: int) -> List[int]:
+    """Indices of the subset with the highest total value whose weight fits capacity"""
+    if not weights:
+        return []
+    # Round weights up to buckets: the chosen set can never exceed the capacity
+    bucket = max(1, -(-capacity // KNAPSACK_COLUMNS))
+    columns = capacity // bucket
+    scaled = [-(-weight // bucket) for weight in weights]
+
+    best = [0.0] * (columns + 1)
+    keep = [[False] * (columns + 1) for _ in weights]
+    for i, (weight, value) in enumerate(zip(scaled, values)):
+        for c in range(columns, weight - 1, -1):
+            candidate = best[c - weight] + value
+            if candidate > best[c]:
+                best[c] = candidate
+                keep[i][c] = True
+
+    chosen = []
+    c = columns
+    for i in range(len(weights) - 1, -1, -1):
+        if keep[i][c]:
+            chosen.append(i)
+            c -= scaled[i]
+    return sorted(chosen)
+
+
+class ContextPacker:
+    """Token-budgeted, de-duplicated context assembly"""
+
+    def __init__(
+        self,
+        token_budget: int = 1000,
+        duplicate_threshold: float = 0.5,
+        model: str = "gpt-4o-mini"
+    ):
+        self.token_budget = token_budget
+        self.duplicate_threshold = duplicate_threshold
+        self.model = model
+
+    def pack(
+        self,
+        results: List[Dict[str, Any]],
+        format_part: Callable[[int, Dict[str, Any], str], str],
+        header: str = "",
+        separator: str = ""
+    ) -> Dict[str, Any]:
+        """Pack results into {"context", "tokens", "included", "duplicates", "over_budget"}
+
+        format_part(number, result, content) renders one source; numbers are
+        assigned after packing so the prompt always reads Source 1..n.
+        """
+        budget = self.token_budget - count_tokens(header, self.model)
+
+        # Drop near-duplicates, keeping the higher-ranked copy
+        ranked = sorted(results, key=relevance, reverse=True)
+        candidates, kept_shingles, duplicates = [], [], []
+        for result in ranked:
+            result_shingles = shingles(result['content'])
+            if any(jaccard(result_shingles, other) >= self.duplicate_threshold for other in kept_shingles):
+                duplicates.append(result['id'])
+                continue
+            kept_shingles.append(result_shingles)
+            candidates.append(result)
+
+        # Token cost of each source as it will appear in the prompt
+        separator_tokens = count_tokens(separator, self.model) if separator else 0
+        weights = [
+            count_tokens(format_part(len(candidates), result, result['content']), self.model) + separator_tokens
+            for result in candidates
+        ]
+        values = [max(relevance(result), 1e-3) for result in candidates]
+        chosen = knapsack(weights, values, budget) if budget > 0 else []
+
+        contents = {i: candidates[i]['content'] for i in chosen}
+        if not chosen and candidates and budget > 0:
+            # Even the best chunk alone is over budget: keep its leading part
+            overhead = weights[0] - count_tokens(candidates[0]['content'], self.model)
+            contents = {0: split_by_tokens(candidates[0]['content'], max(budget - overhead, 1), self.model)[0] + "..."}
+            chosen = [0]
+
+        parts = [format_part(number, candidates[i], contents[i]) for number, i in enumerate(chosen, 1)]
+        context = header + separator.join(parts)
+        return {
+            "context": context,
+            "tokens": count_tokens(context, self.model),
+            "included": [candidates[i]['id'] for i in chosen],
+            "duplicates": duplicates,
+            "over_budget": [candidates[i]['id'] for i in range(len(candidates)) if i not in contents]
+        }
+
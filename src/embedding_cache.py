@@ -0,0 +1,103 @@
+"""
+Persistent Embedding Cache
+Content-addressed SQLite store keyed by (embedding model, SHA-256 of text),
+so rebuilds only send new or changed chunk text to the embedding provider.
+"""
+
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Iterable
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """Disk-backed cache of text embeddings shared by every KB build"""
+
+    # SQLite caps the number of bound parameters per statement
+    _LOOKUP_BATCH = 500
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )"""
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        """SHA-256 of the exact text sent to the provider"""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, model: str, texts: Iterable[str]) -> Dict[str, List[float]]:
+        """Return cached embeddings for the given texts, keyed by text hash"""
+        hashes = list({self.text_hash(t) for t in texts})
+        found: Dict[str, List[float]] = {}
+
+        with self._lock:
+            for i in range(0, len(hashes), self._LOOKUP_BATCH):
+                batch = hashes[i:i + self._LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch]
+                ).fetchall()
+                for text_hash, blob in rows:
+                    found[text_hash] = np.frombuffer(blob, dtype=np.float32).tolist()
+
+            self.hits += len(found)
+            self.misses += len(hashes) - len(found)
+
+        return found
+
+    def put_many(self, model: str, texts: List[str], embeddings: List[List[float]]):
+        """Store embeddings for texts (overwrites existing entries)"""
+        rows = [
+            (model, self.text_hash(text), len(vector),
+             np.asarray(vector, dtype=np.float32).tobytes())
+            for text, vector in zip(texts, embeddings)
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, dim, vector) "
+                "VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def count(self, model: str = None) -> int:
+        """Number of cached embeddings (optionally for one model)"""
+        with self._lock:
+            if model:
+                row = self._conn.execute(
+                    "SELECT COUNT(*) FROM embeddings WHERE model = ?", (model,)
+                ).fetchone()
+            else:
+                row = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        return row[0]
+
+    def get_stats(self) -> Dict[str, int]:
+        """Hit/miss counters for this process"""
+        return {
+            "entries": self.count(),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
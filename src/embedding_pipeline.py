@@ -0,0 +1,247 @@
+"""
+Embedding Pipeline
+Concurrent, rate-limit-aware batch embedding for KB builds.
+
+- Inputs are packed into requests by token count (per-request token and
+  input caps) rather than a fixed number of texts
+- Inputs over the per-input token cap are split into consecutive pieces and
+  their piece embeddings averaged (token-weighted) instead of truncated
+- Several batches are in flight at once (thread pool)
+- Token buckets keep requests/min and tokens/min under the account limits
+- 429 / 5xx / connection errors are retried with jittered exponential backoff
+- Every finished batch is handed to on_batch (VectorStore writes it to the
+  embedding cache), so an interrupted build resumes where it stopped
+- A batch that still fails after all retries raises EmbeddingPipelineError;
+  nothing is ever skipped silently
+"""
+
+import math
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Optional, Callable, Dict, Any
+
+from openai import RateLimitError, APIConnectionError, APITimeoutError, APIStatusError
+
+try:
+    from token_counter import count_tokens, split_by_tokens
+except ImportError:
+    from src.token_counter import count_tokens, split_by_tokens
+
+
+class EmbeddingPipelineError(RuntimeError):
+    """Raised when one or more batches could not be embedded"""
+
+    def __init__(self, failed_batches: Dict[int, Exception], total_batches: int):
+        self.failed_batches = failed_batches
+        first = next(iter(failed_batches.values()))
+        super().__init__(
+            f"{len(failed_batches)}/{total_batches} embedding batches failed "
+            f"(batches {[i + 1 for i in sorted(failed_batches)]}); first error: {first}"
+        )
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at rate_per_minute"""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1):
+        """Block until amount tokens are available, then take them"""
+        # A single request larger than the bucket would wait forever
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, server errors and dropped connections are worth retrying"""
+    if isinstance(error, (RateLimitError, APIConnectionError, APITimeoutError)):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def combine_embeddings(embeddings: List[List[float]], weights: List[int]) -> List[float]:
+    """Weighted average of piece embeddings, re-normalized to unit length"""
+    total = sum(weights) or 1
+    combined = [
+        sum(weight * embedding[d] for embedding, weight in zip(embeddings, weights)) / total
+        for d in range(len(embeddings[0]))
+    ]
+    norm = math.sqrt(sum(value * value for value in combined)) or 1.0
+    return [value / norm for value in combined]
+
+
+class EmbeddingPipeline:
+    """Embeds a list of texts in concurrent, rate-limited, retried batches"""
+
+    def __init__(
+        self,
+        client,
+        model: str,
+        dimensions: Optional[int] = None,
+        max_batch_inputs: int = 2048,
+        max_batch_tokens: int = 250_000,
+        max_input_tokens: int = 8191,
+        max_workers: int = 4,
+        requests_per_minute: float = 3000,
+        tokens_per_minute: float = 1_000_000,
+        max_retries: int = 6,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0
+    ):
+        self.client = client
+        self.model = model
+        self.dimensions = dimensions
+        self.max_batch_inputs = max_batch_inputs
+        self.max_batch_tokens = max_batch_tokens
+        self.max_input_tokens = max_input_tokens
+        self.max_workers = max(1, max_workers)
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stats = {"requests": 0, "retries": 0, "tokens": 0, "split_inputs": 0}
+        self._stats_lock = threading.Lock()
+
+    def _request(self, batch: List[str], tokens: int) -> List[List[float]]:
+        """One embeddings call, retried with full-jitter exponential backoff"""
+        extra = {"dimensions": self.dimensions} if self.dimensions else {}
+
+        for attempt in range(self.max_retries + 1):
+            self.request_bucket.acquire(1)
+            self.token_bucket.acquire(tokens)
+            try:
+                response = self.client.embeddings.create(model=self.model, input=batch, **extra)
+                with self._stats_lock:
+                    self.stats["requests"] += 1
+                    self.stats["tokens"] += tokens
+                return [item.embedding for item in response.data]
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                with self._stats_lock:
+                    self.stats["retries"] += 1
+                print(f"⚠️ Embedding batch retry {attempt + 1}/{self.max_retries} in {delay:.1f}s: {e}")
+                time.sleep(delay)
+
+    def _pack(self, token_counts: List[int]) -> List[List[int]]:
+        """Greedy, order-preserving packing of input indices into request batches"""
+        batches, current, current_tokens = [], [], 0
+        for index, tokens in enumerate(token_counts):
+            if current and (len(current) >= self.max_batch_inputs
+                            or current_tokens + tokens > self.max_batch_tokens):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(index)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def embed(
+        self,
+        texts: List[str],
+        on_batch: Optional[Callable[[List[str], List[List[float]]], None]] = None,
+        show_progress: bool = False
+    ) -> List[List[float]]:
+        """Embed texts in order; on_batch is called with texts as they complete"""
+        # Split over-long inputs into pieces that fit the per-input cap
+        pieces: List[str] = []
+        piece_tokens: List[int] = []
+        owners: List[int] = []
+        first_piece: List[int] = []
+        for text_index, text in enumerate(texts):
+            first_piece.append(len(pieces))
+            tokens = count_tokens(text, self.model)
+            if tokens <= self.max_input_tokens:
+                parts, part_tokens = [text], [tokens]
+            else:
+                parts = split_by_tokens(text, self.max_input_tokens, self.model)
+                part_tokens = [count_tokens(part, self.model) for part in parts]
+                self.stats["split_inputs"] += 1
+            pieces.extend(parts)
+            piece_tokens.extend(part_tokens)
+            owners.extend([text_index] * len(parts))
+
+        first_piece.append(len(pieces))
+        pieces_left = [first_piece[i + 1] - first_piece[i] for i in range(len(texts))]
+        piece_embeddings: List[Optional[List[float]]] = [None] * len(pieces)
+        results: List[Optional[List[float]]] = [None] * len(texts)
+
+        batches = self._pack(piece_tokens)
+        failed: Dict[int, Exception] = {}
+
+        def complete(batch: List[int], embeddings: List[List[float]]):
+            finished = []
+            for piece_index, embedding in zip(batch, embeddings):
+                piece_embeddings[piece_index] = embedding
+                owner = owners[piece_index]
+                pieces_left[owner] -= 1
+                if pieces_left[owner] == 0:
+                    finished.append(owner)
+            for owner in finished:
+                start, end = first_piece[owner], first_piece[owner + 1]
+                if end - start == 1:
+                    results[owner] = piece_embeddings[start]
+                else:
+                    results[owner] = combine_embeddings(piece_embeddings[start:end], piece_tokens[start:end])
+            if on_batch and finished:
+                on_batch([texts[i] for i in finished], [results[i] for i in finished])
+
+        def run(batch: List[int]) -> List[List[float]]:
+            return self._request([pieces[i] for i in batch], sum(piece_tokens[i] for i in batch))
+
+        # Query-time calls are a single batch - no need for the pool
+        if len(batches) <= 1 or self.max_workers == 1:
+            for index, batch in enumerate(batches):
+                try:
+                    embeddings = run(batch)
+                except Exception as e:
+                    failed[index] = e
+                    continue
+                complete(batch, embeddings)
+        else:
+            done = 0
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {executor.submit(run, batch): index for index, batch in enumerate(batches)}
+                for future in as_completed(futures):
+                    index = futures[future]
+                    try:
+                        embeddings = future.result()
+                    except Exception as e:
+                        failed[index] = e
+                        print(f"❌ Embedding batch {index + 1}/{len(batches)} failed: {e}")
+                        continue
+                    complete(batches[index], embeddings)
+                    done += 1
+                    if show_progress:
+                        print(f"  Embedded batch {done}/{len(batches)}")
+
+        if failed:
+            # Completed texts were already handed to on_batch, so a rerun only redoes these
+            raise EmbeddingPipelineError(failed, len(batches))
+
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return dict(self.stats)
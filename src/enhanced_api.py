@@ -4,6 +4,7 @@ Combines Zobot flows with RAG responses
 
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 import uvicorn
@@ -18,6 +19,10 @@ from config import settings
 from src.hybrid_chatbot import HybridChatbot
 from src.zoho_desk_integration import ZohoDeskIntegration
 from src.salesiq_handler import SalesIQHandler
+from src.query_cache import query_embedding_cache
+from src.single_flight import single_flight
+from src.history_manager import history_manager, SessionHistories
+from src.sse_streaming import sse_chat_stream, time_to_first_token, SSE_HEADERS
 
 app = FastAPI(title="AceBuddy Hybrid RAG API", version="2.0.0")
 
@@ -35,8 +40,12 @@ hybrid_chatbot = HybridChatbot()
 zoho_desk = ZohoDeskIntegration()
 salesiq_handler = SalesIQHandler()
 
-# Session storage
-sessions: Dict[str, List[Dict[str, str]]] = {}
+# Session storage: trimmed to what the summary does not cover yet, idle sessions evicted
+sessions = SessionHistories(
+    history_manager,
+    max_sessions=settings.history_max_sessions,
+    ttl_seconds=settings.history_session_ttl_seconds
+)
 
 class ChatRequest(BaseModel):
     query: str
@@ -106,7 +115,8 @@ async def chat(request: ChatRequest):
         user_id = request.user_id or "anonymous"
         
         # Process query with hybrid chatbot (including workflow detection)
-        result = hybrid_chatbot.process_query(request.query, conversation_history, session_id, user_id)
+        prompt_history = history_manager.compact(session_id, conversation_history)
+        result = hybrid_chatbot.process_query(request.query, prompt_history, session_id, user_id)
         
         # Get quick actions
         quick_actions = hybrid_chatbot.get_quick_actions(request.query)
@@ -114,7 +124,7 @@ async def chat(request: ChatRequest):
         # Update conversation history
         conversation_history.append({"role": "user", "content": request.query})
         conversation_history.append({"role": "assistant", "content": result["response"]})
-        sessions[session_id] = conversation_history[-10:]  # Keep last 10 messages
+        sessions[session_id] = conversation_history  # trimmed once older turns are summarized
         
         return ChatResponse(
             response=result["response"],
@@ -131,6 +141,32 @@ async def chat(request: ChatRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
 
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """Streaming /chat: SSE "token" events as the answer is generated, then a "done" event with the metadata"""
+    session_id = request.session_id or f"session_{datetime.now().timestamp()}"
+    conversation_history = sessions.get(session_id, [])
+    user_id = request.user_id or "anonymous"
+    
+    def on_done(result: Dict[str, Any]) -> Dict[str, Any]:
+        conversation_history.append({"role": "user", "content": request.query})
+        conversation_history.append({"role": "assistant", "content": result["response"]})
+        sessions[session_id] = conversation_history  # trimmed once older turns are summarized
+        return {
+            "session_id": session_id,
+            "escalate": result["escalate"],
+            "confidence": result["confidence"],
+            "source": result.get("source", "unknown"),
+            "sources": result.get("sources", []),
+            "quick_actions": hybrid_chatbot.get_quick_actions(request.query),
+            "follow_up": result.get("follow_up"),
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    prompt_history = history_manager.compact(session_id, conversation_history)
+    events = hybrid_chatbot.stream_query(request.query, prompt_history, session_id, user_id)
+    return StreamingResponse(sse_chat_stream(events, on_done), media_type="text/event-stream", headers=SSE_HEADERS)
+
 @app.post("/action")
 async def handle_action(request: ActionRequest):
     """Handle quick action button clicks"""
@@ -142,7 +178,7 @@ async def handle_action(request: ActionRequest):
             conversation_history = sessions.get(request.session_id, [])
             conversation_history.append({"role": "user", "content": f"[Action: {request.action}]"})
             conversation_history.append({"role": "assistant", "content": result["response"]})
-            sessions[request.session_id] = conversation_history[-10:]
+            sessions[request.session_id] = conversation_history
         
         return {
             "response": result["response"],
@@ -211,6 +247,10 @@ async def get_stats():
             "active_sessions": len(hybrid_chatbot.workflow_executor.active_sessions)
         },
         "workflow_stats": hybrid_chatbot.workflow_executor.get_workflow_stats(),
+        "query_embedding_cache": query_embedding_cache.get_stats(),
+        "time_to_first_token": time_to_first_token.get_stats(),
+        "single_flight": single_flight.get_stats(),
+        "history": history_manager.get_stats(),
         "timestamp": datetime.now().isoformat()
     }
 
@@ -7,8 +7,10 @@ Expert-Level RAG Engine with Advanced Features
 - Context compression and optimization
 """
 
-from typing import List, Dict, Any, Optional, Tuple
-from openai import OpenAI
+import asyncio
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator
+from concurrent.futures import ThreadPoolExecutor
+from openai import OpenAI, AsyncOpenAI
 import re
 from collections import Counter
 import sys
@@ -39,26 +41,78 @@ try:
 except ImportError:
     from src.vector_store import VectorStore
 
+try:
+    from query_router import query_router, CATEGORY_KEYWORDS
+except ImportError:
+    from src.query_router import query_router, CATEGORY_KEYWORDS
+
+try:
+    from rank_fusion import reciprocal_rank_fusion
+except ImportError:
+    from src.rank_fusion import reciprocal_rank_fusion
+
+try:
+    from semantic_cache import semantic_response_cache
+except ImportError:
+    from src.semantic_cache import semantic_response_cache
+
+try:
+    from retrieval_memory import retrieval_memory
+except ImportError:
+    from src.retrieval_memory import retrieval_memory
+
+try:
+    from context_packer import ContextPacker
+except ImportError:
+    from src.context_packer import ContextPacker
+
+try:
+    from single_flight import single_flight, normalize_query
+except ImportError:
+    from src.single_flight import single_flight, normalize_query
+
+try:
+    from sse_streaming import stream_chat_completion, streamed_tokens, bounded_chat_completion
+except ImportError:
+    from src.sse_streaming import stream_chat_completion, streamed_tokens, bounded_chat_completion
+
+try:
+    from identifier_index import extract_codes, extract_products
+except ImportError:
+    from src.identifier_index import extract_codes, extract_products
+
+try:
+    from history_manager import recent_history
+except ImportError:
+    from src.history_manager import recent_history
+
+# A category-filtered search with fewer hits falls back to the whole KB
+MIN_CATEGORY_RESULTS = 3
+
 class ExpertRAGEngine:
     """Advanced RAG engine with multi-source retrieval and intelligent routing"""
     
-    def __init__(self):
+    def __init__(self, vector_store: Optional[VectorStore] = None):
         self.openai_client = OpenAI(api_key=settings.openai_api_key)
-        self.vector_store = VectorStore()
+        self.async_openai_client = AsyncOpenAI(api_key=settings.openai_api_key)
+        self.vector_store = vector_store or VectorStore()
         self.vector_store.create_collection()
+        self.bm25_index = self._load_bm25_index()
+        self.identifier_index = self._load_identifier_index()
         
-        # Query categories for intelligent routing
-        self.query_categories = {
-            "password_reset": ["password", "reset", "forgot", "login", "selfcare"],
-            "disk_storage": ["disk", "storage", "space", "full", "upgrade", "c drive"],
-            "rdp_connection": ["rdp", "remote desktop", "connection", "connect", "disconnect"],
-            "quickbooks": ["quickbooks", "qb", "error", "multi-user", "payroll"],
-            "email": ["email", "outlook", "smtp", "send", "receive"],
-            "printer": ["print", "printer", "uniprint", "check printing"],
-            "performance": ["slow", "performance", "lag", "freeze", "hang"],
-            "user_management": ["user", "add user", "delete user", "permission"],
-            "billing": ["billing", "payment", "invoice", "subscription", "pricing"]
-        }
+        # Fills a fixed token budget with the most relevant distinct chunks
+        self.context_packer = ContextPacker(
+            token_budget=getattr(settings, "context_token_budget", 1000),
+            duplicate_threshold=getattr(settings, "context_duplicate_threshold", 0.5),
+            model=settings.openai_model
+        )
+        
+        # Runs the lexical retriever and the unfiltered fallback search
+        # alongside the main vector search
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="retrieval")
+        
+        # Query categories for intelligent routing (matched by the shared query router)
+        self.query_categories = CATEGORY_KEYWORDS
         
         self.expert_system_prompt = """You are AceBuddy, an EXPERT-LEVEL IT support specialist for ACE Cloud Hosting.
 
@@ -75,7 +129,7 @@ User: "I need to reset my password"
 You: "I can help you reset your password. Visit https://selfcare.acecloudhosting.com, click 'Forgot Password', enter your email, and check your inbox for the reset link (arrives in 2-3 minutes). If you're not registered, contact support@acecloudhosting.com or call 1-888-415-5240."
 
 User: "What are the disk upgrade options?"
-You: "Here are our disk storage upgrade tiers: 40GB ($10/month), 80GB ($20/month), 120GB ($30/month), 200GB ($50/month). Upgrades typically take 2-4 hours. Contact support@acecloudhosting.com or call 1-888-415-5240 to proceed."
+You: "Here are our disk storage upgrade tiers: 40GB ($28/month), 60GB ($40/month), 80GB ($50/month), 100GB ($60/month), 200GB ($120/month). Upgrades typically take 2-4 hours. Contact support@acecloudhosting.com or call 1-888-415-5240 to proceed."
 
 User: "QuickBooks error -6177"
 You: "Error -6177, 0 means the QuickBooks Database Server Manager isn't running. Fix: Open Services (services.msc), find QuickBooksDBXX, right-click and select Start. Then try opening QuickBooks again."
@@ -128,7 +182,7 @@ DOMAIN EXPERTISE:
 **Disk Storage:**
 - Check: Right-click C: → Properties
 - Quick cleanup: Delete temp files, run Disk Cleanup
-- Upgrade tiers: 40GB ($10), 80GB ($20), 120GB ($30), 200GB ($50)
+- Upgrade tiers: 40GB ($28), 60GB ($40), 80GB ($50), 100GB ($60), 200GB ($120)
 - Contact: support@acecloudhosting.com or call 1-888-415-5240
 - Ticket ETA: 2-4 hours for upgrade
 
@@ -169,23 +223,41 @@ When user first says hello/hi or starts conversation, respond with:
 
 Remember: You're having a CONVERSATION, not writing a manual. Ask first, solve second."""
 
+    def _load_bm25_index(self):
+        """Lexical index over all chunks (built once, persisted next to the vector index)"""
+        if not getattr(settings, "bm25_enabled", True):
+            return None
+        try:
+            index = self.vector_store.load_bm25_index()
+            print(f"[OK] BM25 index ready ({len(index)} chunks)")
+            return index
+        except Exception as e:
+            print(f"⚠️ BM25 index unavailable, using vector search only: {e}")
+            return None
+    
+    def _load_identifier_index(self):
+        """Exact error-code / product lookup (built with the KB, persisted next to the vector index)"""
+        if not getattr(settings, "identifier_index_enabled", True):
+            return None
+        try:
+            index = self.vector_store.load_identifier_index()
+            print(f"[OK] Identifier index ready ({len(set(index.title_codes) | set(index.content_codes))} codes)")
+            return index
+        except Exception as e:
+            print(f"⚠️ Identifier index unavailable: {e}")
+            return None
+    
     def classify_query(self, query: str) -> Tuple[str, float]:
         """Classify query into category for intelligent routing"""
-        query_lower = query.lower()
+        # One pass over the query finds every category keyword hit
+        best = query_router.route(query).best("category")
         
-        # Count keyword matches for each category
-        category_scores = {}
-        for category, keywords in self.query_categories.items():
-            score = sum(1 for keyword in keywords if keyword in query_lower)
-            if score > 0:
-                category_scores[category] = score
-        
-        if not category_scores:
+        if not best:
             return "general", 0.0
         
-        # Get best matching category
-        best_category = max(category_scores, key=category_scores.get)
-        confidence = category_scores[best_category] / len(self.query_categories[best_category])
+        # Get best matching category (ties go to the category listed first)
+        best_category, score = best
+        confidence = score / len(self.query_categories[best_category])
         
         return best_category, min(confidence, 1.0)
     
@@ -207,41 +279,187 @@ Remember: You're having a CONVERSATION, not writing a manual. Ask first, solve s
         self, 
         query: str, 
         category: str = None,
-        top_k: int = None
+        top_k: int = None,
+        mode: str = None,
+        initial_k: int = None,
+        query_embedding: Optional[List[float]] = None
     ) -> List[Dict[str, Any]]:
-        """Advanced retrieval with category filtering and re-ranking"""
+        """Advanced retrieval with category filtering and re-ranking
+        
+        mode "combined" re-ranks vector + BM25 candidates by semantic score plus
+        a capped BM25 boost; mode "rrf" runs both retrievers in parallel and
+        fuses their rankings with reciprocal rank fusion. A precomputed
+        query_embedding skips the embedding call.
+        """
         k = top_k or settings.top_k_results
+        mode = mode or getattr(settings, "retrieval_mode", "combined")
+        
+        # Exact error codes resolve straight to their KB article - no embedding call
+        exact_results = self._retrieve_by_identifier(query, k)
+        if exact_results:
+            return exact_results
+        
+        if mode == "rrf" and self.bm25_index is not None:
+            depth = initial_k or getattr(settings, "rrf_depth", 0) or k
+            return self._retrieve_rrf(query, category, k, depth, query_embedding)
         
         # Get more results initially for re-ranking
-        initial_k = k * 2
+        initial_k = initial_k or k * 2
+        
+        # Embed once - the filtered and unfiltered lookups share the vector
+        if query_embedding is None:
+            query_embedding = self.vector_store.embed_queries([query])[0]
         
         # Retrieve from vector store
+        results, filter_dict = self._vector_search(query_embedding, category, initial_k)
+        
+        # Lexical first stage: BM25 over the whole KB with the same filter,
+        # so chunks matching exact codes ("-6177", "0x204") are candidates too
+        bm25_scores = None
+        if self.bm25_index is not None:
+            bm25_scores, lexical_hits = self._lexical_search(query, initial_k, filter_dict)
+            seen_ids = {r['id'] for r in results}
+            new_ids = [chunk_id for chunk_id, _ in lexical_hits if chunk_id not in seen_ids]
+            results.extend(self.vector_store.fetch_by_ids(new_ids, query_embedding))
+        
+        self._score_results(results, bm25_scores)
+        
+        # Sort by combined score
+        results.sort(key=lambda x: x['combined_score'], reverse=True)
+        
+        return self._apply_threshold(results, k)
+    
+    async def retrieve_context_advanced_async(
+        self,
+        query: str,
+        category: str = None,
+        top_k: int = None,
+        mode: str = None,
+        initial_k: int = None
+    ) -> List[Dict[str, Any]]:
+        """retrieve_context_advanced for async handlers: the embedding call is
+        awaited and the local index search runs in a worker thread"""
+        # Exact error codes resolve without an embedding call
+        exact_results = await asyncio.to_thread(self._retrieve_by_identifier, query, top_k or settings.top_k_results)
+        if exact_results:
+            return exact_results
+        query_embedding = (await self.vector_store.embed_queries_async([query]))[0]
+        return await asyncio.to_thread(
+            self.retrieve_context_advanced, query, category, top_k, mode, initial_k, query_embedding
+        )
+    
+    def _retrieve_by_identifier(self, query: str, k: int) -> Optional[List[Dict[str, Any]]]:
+        """Chunks of the documents named by a confident identifier match, in document order"""
+        if self.identifier_index is None:
+            return None
+        match = self.identifier_index.lookup(query)
+        if not match or not match["confident"]:
+            return None
+        
+        results = self.vector_store.fetch_by_ids(match["chunk_ids"][:k])
+        for result in results:
+            result['combined_score'] = 1.0
+            result['match_type'] = "identifier"
+            result['matched_identifiers'] = match["identifiers"]
+        return results or None
+    
+    def _retrieve_rrf(
+        self,
+        query: str,
+        category: str,
+        k: int,
+        depth: int,
+        query_embedding: Optional[List[float]] = None
+    ) -> List[Dict[str, Any]]:
+        """Vector top-depth and BM25 top-depth in parallel, fused by reciprocal rank"""
+        category_filter = self._category_filter(category)
+        lexical_future = self._executor.submit(self._lexical_search, query, depth, category_filter)
+        
+        if query_embedding is None:
+            query_embedding = self.vector_store.embed_queries([query])[0]
+        vector_results, filter_dict = self._vector_search(query_embedding, category, depth)
+        
+        bm25_scores, lexical_hits = lexical_future.result()
+        if filter_dict != category_filter:
+            # Vector side fell back to the whole KB - keep the lexical side consistent
+            lexical_hits = self.bm25_index.search(query, top_k=depth, where=filter_dict, scores=bm25_scores)
+        
+        fused = reciprocal_rank_fusion(
+            [[r['id'] for r in vector_results], [chunk_id for chunk_id, _ in lexical_hits]],
+            weights=[settings.rrf_vector_weight, settings.rrf_lexical_weight],
+            k=settings.rrf_k
+        )[:k]
+        
+        by_id = {r['id']: r for r in vector_results}
+        missing = [chunk_id for chunk_id, _ in fused if chunk_id not in by_id]
+        for result in self.vector_store.fetch_by_ids(missing, query_embedding):
+            by_id[result['id']] = result
+        
+        results = []
+        for chunk_id, rrf_score in fused:
+            if chunk_id in by_id:
+                by_id[chunk_id]['rrf_score'] = rrf_score
+                results.append(by_id[chunk_id])
+        
+        # combined_score is still computed - thresholds and confidence are calibrated on it
+        self._score_results(results, bm25_scores)
+        return self._apply_threshold(results, k)
+    
+    def _category_filter(self, category: str = None) -> Optional[Dict]:
         if category and category != "general":
-            # Try category-specific search first
-            filter_dict = {"category": category.replace("_", " ").title()}
-            results = self.vector_store.search(query, top_k=initial_k, filter_dict=filter_dict)
-            
-            # If not enough results, search without filter
-            if len(results) < 3:
-                results = self.vector_store.search(query, top_k=initial_k)
-        else:
-            results = self.vector_store.search(query, top_k=initial_k)
+            return {"category": category.replace("_", " ").title()}
+        return None
+    
+    def _vector_search(
+        self,
+        query_embedding: List[float],
+        category: str,
+        n_results: int
+    ) -> Tuple[List[Dict[str, Any]], Optional[Dict]]:
+        """Category-filtered vector search with unfiltered fallback; returns (results, filter used)
         
-        # Re-rank based on keyword matching
-        keywords = self.extract_keywords(query)
+        Both lookups run concurrently on the same embedding. A filtered set of
+        MIN_CATEGORY_RESULTS or more is returned as soon as it arrives;
+        otherwise it is merged with the unfiltered results.
+        """
+        filter_dict = self._category_filter(category)
+        if not filter_dict:
+            return self.vector_store.search_by_embedding(query_embedding, top_k=n_results), None
+        
+        unfiltered_future = self._executor.submit(
+            self.vector_store.search_by_embedding, query_embedding, n_results
+        )
+        results = self.vector_store.search_by_embedding(query_embedding, top_k=n_results, filter_dict=filter_dict)
+        if len(results) >= MIN_CATEGORY_RESULTS:
+            unfiltered_future.cancel()
+            return results, filter_dict
+        
+        # Sparse category: fill up from the whole KB, closest first
+        seen_ids = {r['id'] for r in results}
+        results.extend(r for r in unfiltered_future.result() if r['id'] not in seen_ids)
+        results.sort(key=lambda r: r.get('distance', 1.0))
+        return results[:n_results], None
+    
+    def _lexical_search(self, query: str, n_results: int, filter_dict: Optional[Dict]):
+        """BM25 scores for every chunk plus the top hits passing the filter"""
+        bm25_scores = self.bm25_index.score(query)
+        return bm25_scores, self.bm25_index.search(query, top_k=n_results, where=filter_dict, scores=bm25_scores)
+    
+    def _score_results(self, results: List[Dict[str, Any]], bm25_scores=None):
+        """Set combined_score: semantic similarity plus normalized BM25 score"""
+        max_bm25 = float(bm25_scores.max()) if bm25_scores is not None and len(bm25_scores) else 0.0
         for result in results:
-            content_lower = result['content'].lower()
-            keyword_score = sum(1 for kw in keywords if kw in content_lower)
+            row = self.bm25_index.rows.get(result['id']) if bm25_scores is not None else None
+            lexical_score = float(bm25_scores[row]) / max_bm25 if row is not None and max_bm25 > 0 else 0.0
             
             # Combine semantic similarity with keyword matching
             semantic_score = 1 - (result.get('distance', 0.5))
-            keyword_boost = min(keyword_score * 0.1, 0.3)  # Max 30% boost
+            keyword_boost = 0.3 * lexical_score  # Max 30% boost
             
+            result['bm25_score'] = lexical_score
             result['combined_score'] = semantic_score + keyword_boost
-        
-        # Sort by combined score
-        results.sort(key=lambda x: x['combined_score'], reverse=True)
-        
+    
+    def _apply_threshold(self, results: List[Dict[str, Any]], k: int) -> List[Dict[str, Any]]:
         # Filter by threshold
         filtered_results = [
             r for r in results[:k]
@@ -261,54 +479,30 @@ Remember: You're having a CONVERSATION, not writing a manual. Ask first, solve s
         category: str = None
     ) -> str:
         """Build optimized context with deduplication and compression"""
+        return self.pack_context(results, query, category)["context"]
+    
+    def pack_context(
+        self, 
+        results: List[Dict[str, Any]], 
+        query: str,
+        category: str = None
+    ) -> Dict[str, Any]:
+        """Context within the token budget, plus token count and included / dropped chunk ids"""
         if not results:
-            return "No relevant information found in knowledge base."
-        
-        context_parts = []
-        seen_content = set()
-        total_length = 0
-        max_length = settings.max_context_length
+            return {"context": "No relevant information found in knowledge base.", "tokens": 0,
+                    "included": [], "duplicates": [], "over_budget": []}
         
         # Add category context if available
+        header = ""
         if category and category != "general":
-            category_intro = f"[Category: {category.replace('_', ' ').title()}]\n"
-            context_parts.append(category_intro)
-            total_length += len(category_intro)
+            header = f"[Category: {category.replace('_', ' ').title()}]\n"
         
-        for i, result in enumerate(results, 1):
-            content = result['content']
-            
-            # Skip near-duplicates
-            content_hash = content[:100]  # Use first 100 chars as hash
-            if content_hash in seen_content:
-                continue
-            seen_content.add(content_hash)
-            
-            # Get metadata
+        def format_part(number: int, result: Dict[str, Any], content: str) -> str:
             category_meta = result['metadata'].get('category', 'General')
-            source_type = result['metadata'].get('source_type', 'KB')
             relevance = result.get('combined_score', result.get('distance', 0))
-            
-            # Format source
-            part = f"[Source {i} - {category_meta} | Relevance: {relevance:.2f}]\n{content}\n\n"
-            
-            # Check length
-            if total_length + len(part) > max_length:
-                # Try to compress by removing less relevant parts
-                if i > 3:  # Keep at least top 3
-                    break
-                # Truncate content if needed
-                available = max_length - total_length - 100
-                if available > 200:
-                    content_truncated = content[:available] + "..."
-                    part = f"[Source {i} - {category_meta}]\n{content_truncated}\n\n"
-                else:
-                    break
-            
-            context_parts.append(part)
-            total_length += len(part)
+            return f"[Source {number} - {category_meta} | Relevance: {relevance:.2f}]\n{content}\n\n"
         
-        return "".join(context_parts)
+        return self.context_packer.pack(results, format_part, header=header)
     
     def generate_expert_response(
         self, 
@@ -319,12 +513,54 @@ Remember: You're having a CONVERSATION, not writing a manual. Ask first, solve s
         concise_mode: bool = False
     ) -> Dict[str, Any]:
         """Generate expert-level response with category awareness"""
+        response = self.openai_client.chat.completions.create(
+            **self._expert_completion_request(query, context, category, conversation_history, concise_mode)
+        )
+        return self._expert_completion_result(response, category)
+    
+    async def generate_expert_response_async(
+        self, 
+        query: str, 
+        context: str,
+        category: str = None,
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        concise_mode: bool = False,
+        max_chars: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """generate_expert_response with the completion call awaited
+        
+        With max_chars the completion is streamed and stopped once it passes
+        the budget; the answer ends at the last sentence boundary inside it.
+        """
+        request = self._expert_completion_request(query, context, category, conversation_history, concise_mode)
+        if not max_chars:
+            response = await self.async_openai_client.chat.completions.create(**request)
+            return self._expert_completion_result(response, category)
+        
+        bounded = await bounded_chat_completion(self.async_openai_client, max_chars, **request)
+        return {
+            "response": bounded["text"],
+            "model": settings.openai_model,
+            "tokens_used": streamed_tokens(request["messages"], bounded["text"], settings.openai_model),
+            "category": category,
+            "truncated": bounded["truncated"]
+        }
+    
+    def _expert_completion_request(
+        self, 
+        query: str, 
+        context: str,
+        category: str = None,
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        concise_mode: bool = False
+    ) -> Dict[str, Any]:
+        """Arguments of the chat completion call"""
         
         messages = [{"role": "system", "content": self.expert_system_prompt}]
         
         # Add conversation history
         if conversation_history:
-            messages.extend(conversation_history[-5:])
+            messages.extend(recent_history(conversation_history, 5))
         
         # Build enhanced prompt
         category_hint = f"\n[Query Category: {category.replace('_', ' ').title()}]" if category else ""
@@ -353,16 +589,17 @@ User Question: {query}
         # Adjust max_tokens for concise mode (600 tokens ≈ 1200-1500 chars)
         max_tokens = 600 if concise_mode else settings.max_tokens
         
-        # Generate response with higher quality settings
-        response = self.openai_client.chat.completions.create(
-            model=settings.openai_model,
-            messages=messages,
-            temperature=0.3,  # Lower for more consistent expert responses
-            max_tokens=max_tokens,
-            presence_penalty=0.1,  # Slight penalty for repetition
-            frequency_penalty=0.1
-        )
-        
+        # Higher quality settings
+        return {
+            "model": settings.openai_model,
+            "messages": messages,
+            "temperature": 0.3,  # Lower for more consistent expert responses
+            "max_tokens": max_tokens,
+            "presence_penalty": 0.1,  # Slight penalty for repetition
+            "frequency_penalty": 0.1
+        }
+    
+    def _expert_completion_result(self, response, category: str = None) -> Dict[str, Any]:
         return {
             "response": response.choices[0].message.content,
             "model": settings.openai_model,
@@ -378,17 +615,14 @@ User Question: {query}
     ) -> Tuple[bool, str]:
         """Advanced escalation logic with reasoning"""
         
+        route = query_router.route(query)
+        
         # Check for explicit escalation requests
-        escalation_phrases = [
-            "speak to human", "talk to agent", "real person",
-            "not helpful", "doesn't work", "still not working"
-        ]
-        if any(phrase in query.lower() for phrase in escalation_phrases):
+        if route.has("escalation", "human_request"):
             return True, "User requested human agent"
         
         # Check for billing/legal issues (always escalate)
-        critical_keywords = ["billing", "refund", "cancel subscription", "legal", "complaint"]
-        if any(keyword in query.lower() for keyword in critical_keywords):
+        if route.has("escalation", "critical"):
             return True, "Billing/legal issue requires human agent"
         
         # Check retrieval quality
@@ -411,49 +645,311 @@ User Question: {query}
         self, 
         query: str, 
         conversation_history: Optional[List[Dict[str, str]]] = None,
-        concise_mode: bool = False
+        concise_mode: bool = False,
+        session_id: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Main expert-level query processing"""
+        """Main expert-level query processing
+        
+        With a session_id, follow-up turns ("Done", "yes", "still not working")
+        reuse the previous turn's retrieval instead of searching again.
+        Identical first turns arriving together share one computation.
+        """
+        key = self._single_flight_key(query, conversation_history, concise_mode)
+        if key is None:
+            return self._process_query_expert(query, conversation_history, concise_mode, session_id)
+        
+        leader = []
+        
+        def compute():
+            leader.append(True)
+            return self._process_query_expert(query, None, concise_mode, session_id)
         
+        response = single_flight.run(key, compute)
+        if not leader:
+            self._remember_sources(session_id, query, response)
+        return response
+    
+    def _process_query_expert(
+        self, 
+        query: str, 
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        concise_mode: bool = False,
+        session_id: Optional[str] = None
+    ) -> Dict[str, Any]:
         # Step 1: Classify query
         category, category_confidence = self.classify_query(query)
         
+        # Follow-ups keep the topic's context; exact codes resolve without an embedding call
+        topic = self._session_topic(session_id, query, conversation_history)
+        exact_results = None if topic else self._retrieve_by_identifier(query, settings.top_k_results)
+        
+        # Repeated first-turn questions reuse an earlier answer (no retrieval, no completion)
+        cache_key = None
+        if not topic and not exact_results:
+            cache_key = self._semantic_cache_key(query, category, conversation_history, concise_mode)
+            cached = self._cached_response(cache_key)
+            if cached:
+                self._remember_sources(session_id, query, cached)
+                return cached
+        
         # Step 2: Advanced retrieval
-        retrieved_results = self.retrieve_context_advanced(query, category)
+        if topic:
+            category = topic["category"]
+            retrieved_results = self._reuse_retrieval(topic)
+            retrieval_memory.touch(session_id)
+        else:
+            retrieved_results = exact_results or self.retrieve_context_advanced(
+                query, category, query_embedding=cache_key[0] if cache_key else None
+            )
+            self._remember_retrieval(session_id, query, category, retrieved_results)
         
         # Step 3: Check escalation
-        should_escalate, escalation_reason = self.should_escalate_advanced(
-            query, retrieved_results, category
-        )
-        
-        if should_escalate:
-            return {
-                "response": f"I'd like to connect you with one of our support specialists who can better assist you with this request. Reason: {escalation_reason}",
-                "escalate": True,
-                "confidence": "low",
-                "category": category,
-                "escalation_reason": escalation_reason,
-                "sources": []
-            }
+        escalation = self._escalation_response(query, retrieved_results, category)
+        if escalation:
+            return escalation
         
-        # Step 4: Build optimized context
-        context = self.build_context_optimized(retrieved_results, query, category)
+        # Step 4: Build optimized context (fixed token budget)
+        packed = self.pack_context(retrieved_results, query, category)
         
         # Step 5: Generate expert response (with concise mode for SalesIQ)
         result = self.generate_expert_response(
-            query, context, category, conversation_history, concise_mode=concise_mode
+            query, packed["context"], category, conversation_history, concise_mode=concise_mode
+        )
+        
+        # Step 6: Assemble with confidence and retrieval stats
+        return self._expert_response(
+            query, result, retrieved_results, packed, category, category_confidence, topic, cache_key
+        )
+    
+    async def process_query_expert_async(
+        self, 
+        query: str, 
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        concise_mode: bool = False,
+        session_id: Optional[str] = None,
+        max_chars: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """process_query_expert for async handlers
+        
+        The embedding and completion calls are awaited and the local index
+        search runs in a worker thread, so the event loop keeps serving other
+        requests while this one waits on OpenAI. max_chars bounds the answer
+        length (see generate_expert_response_async).
+        """
+        key = self._single_flight_key(query, conversation_history, concise_mode, max_chars)
+        if key is None:
+            return await self._process_query_expert_async(
+                query, conversation_history, concise_mode, session_id, max_chars
+            )
+        
+        leader = []
+        
+        async def compute():
+            leader.append(True)
+            return await self._process_query_expert_async(query, None, concise_mode, session_id, max_chars)
+        
+        response = await single_flight.run_async(key, compute)
+        if not leader:
+            self._remember_sources(session_id, query, response)
+        return response
+    
+    async def _process_query_expert_async(
+        self, 
+        query: str, 
+        conversation_history: Optional[List[Dict[str, str]]],
+        concise_mode: bool,
+        session_id: Optional[str],
+        max_chars: Optional[int]
+    ) -> Dict[str, Any]:
+        state = await self._prepare_expert_async(query, conversation_history, concise_mode, session_id)
+        if "final" in state:
+            return state["final"]
+        
+        result = await self.generate_expert_response_async(
+            query, state["packed"]["context"], state["category"], conversation_history,
+            concise_mode=concise_mode, max_chars=max_chars
+        )
+        response = self._expert_response(query, result, **self._response_args(state))
+        if result.get("truncated"):
+            response["truncated"] = True
+        return response
+    
+    async def stream_query_expert(
+        self, 
+        query: str, 
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        concise_mode: bool = False,
+        session_id: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """process_query_expert_async as events: ("token", text) per completion delta, then ("done", response)
+        
+        Cached answers and escalations arrive as a single token.
+        """
+        state = await self._prepare_expert_async(query, conversation_history, concise_mode, session_id)
+        if "final" in state:
+            yield "token", state["final"]["response"]
+            yield "done", state["final"]
+            return
+        
+        request = self._expert_completion_request(
+            query, state["packed"]["context"], state["category"], conversation_history, concise_mode
         )
+        parts = []
+        async for text in stream_chat_completion(self.async_openai_client, **request):
+            parts.append(text)
+            yield "token", text
+        
+        response_text = "".join(parts)
+        result = {
+            "response": response_text,
+            "model": settings.openai_model,
+            "tokens_used": streamed_tokens(request["messages"], response_text, settings.openai_model),
+            "category": state["category"]
+        }
+        yield "done", self._expert_response(query, result, **self._response_args(state))
+    
+    async def _prepare_expert_async(
+        self, 
+        query: str, 
+        conversation_history: Optional[List[Dict[str, str]]],
+        concise_mode: bool,
+        session_id: Optional[str]
+    ) -> Dict[str, Any]:
+        """Everything before the completion call
+        
+        Returns {"final": response} for cached answers and escalations,
+        otherwise the retrieval state the answer is generated from.
+        """
+        category, category_confidence = self.classify_query(query)
+        
+        topic = self._session_topic(session_id, query, conversation_history)
+        exact_results = None
+        if not topic:
+            exact_results = await asyncio.to_thread(self._retrieve_by_identifier, query, settings.top_k_results)
         
-        # Step 6: Calculate confidence
+        # Only queries that go on to vector / RRF retrieval pay for an embedding
+        query_embedding, cache_key = None, None
+        if not topic and not exact_results:
+            query_embedding = (await self.vector_store.embed_queries_async([query]))[0]
+            cache_key = self._semantic_cache_key(query, category, conversation_history, concise_mode, query_embedding)
+        cached = self._cached_response(cache_key)
+        if cached:
+            self._remember_sources(session_id, query, cached)
+            return {"final": cached}
+        
+        if topic:
+            category = topic["category"]
+            retrieved_results = await asyncio.to_thread(self._reuse_retrieval, topic)
+            retrieval_memory.touch(session_id)
+        else:
+            retrieved_results = exact_results or await asyncio.to_thread(
+                self.retrieve_context_advanced, query, category, query_embedding=query_embedding
+            )
+            self._remember_retrieval(session_id, query, category, retrieved_results)
+        
+        escalation = self._escalation_response(query, retrieved_results, category)
+        if escalation:
+            return {"final": escalation}
+        
+        return {
+            "category": category,
+            "category_confidence": category_confidence,
+            "topic": topic,
+            "cache_key": cache_key,
+            "retrieved_results": retrieved_results,
+            "packed": self.pack_context(retrieved_results, query, category)
+        }
+    
+    @staticmethod
+    def _response_args(state: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: state[key] for key in (
+            "retrieved_results", "packed", "category", "category_confidence", "topic", "cache_key"
+        )}
+    
+    def _single_flight_key(
+        self,
+        query: str,
+        conversation_history: Optional[List[Dict[str, str]]],
+        concise_mode: bool,
+        max_chars: Optional[int] = None
+    ) -> Optional[Tuple]:
+        """Coalescing key for first turns: normalized query, category, answer variant, KB version"""
+        if conversation_history or not getattr(settings, "single_flight_enabled", True):
+            return None
+        try:
+            kb_version = self.vector_store.get_kb_version()
+        except Exception:
+            return None
+        category, _ = self.classify_query(query)
+        return ("expert", normalize_query(query), category, concise_mode, max_chars, kb_version)
+    
+    def _remember_sources(self, session_id: Optional[str], query: str, response: Dict[str, Any]):
+        """Start the session's topic from an answer computed elsewhere (shared flight or answer cache)"""
+        results = [{"id": s["id"], "combined_score": s.get("relevance", 0)} for s in response.get("sources", [])]
+        self._remember_retrieval(session_id, query, response.get("category", "general"), results)
+    
+    def _cached_response(self, cache_key) -> Optional[Dict[str, Any]]:
+        """Earlier answer to a semantically identical first-turn question"""
+        if not cache_key:
+            return None
+        cached = semantic_response_cache.lookup(*cache_key)
+        if not cached:
+            return None
+        response, distance, cached_query = cached
+        return {**response, "cache": {"type": "semantic", "distance": round(distance, 4), "matched_query": cached_query}}
+    
+    def _remember_retrieval(
+        self,
+        session_id: Optional[str],
+        query: str,
+        category: str,
+        retrieved_results: List[Dict[str, Any]]
+    ):
+        if session_id and getattr(settings, "retrieval_memory_enabled", True):
+            retrieval_memory.remember(session_id, query, category, retrieved_results)
+    
+    def _escalation_response(
+        self,
+        query: str,
+        retrieved_results: List[Dict[str, Any]],
+        category: str
+    ) -> Optional[Dict[str, Any]]:
+        should_escalate, escalation_reason = self.should_escalate_advanced(
+            query, retrieved_results, category
+        )
+        if not should_escalate:
+            return None
+        return {
+            "response": f"I'd like to connect you with one of our support specialists who can better assist you with this request. Reason: {escalation_reason}",
+            "escalate": True,
+            "confidence": "low",
+            "category": category,
+            "escalation_reason": escalation_reason,
+            "sources": []
+        }
+    
+    def _expert_response(
+        self,
+        query: str,
+        result: Dict[str, Any],
+        retrieved_results: List[Dict[str, Any]],
+        packed: Dict[str, Any],
+        category: str,
+        category_confidence: float,
+        topic: Optional[Dict[str, Any]],
+        cache_key
+    ) -> Dict[str, Any]:
+        """Final response with confidence and retrieval stats; stored in the answer cache when eligible"""
         avg_score = sum(r.get('combined_score', 0) for r in retrieved_results[:3]) / min(3, len(retrieved_results))
         confidence = "high" if avg_score > 0.7 else "medium" if avg_score > 0.4 else "low"
         
-        return {
+        response = {
             "response": result["response"],
             "escalate": False,
             "confidence": confidence,
             "category": category,
             "category_confidence": category_confidence,
+            "retrieval": "reused" if topic else "fresh",
             "sources": [
                 {
                     "id": r["id"],
@@ -467,9 +963,64 @@ User Question: {query}
             "retrieval_stats": {
                 "total_retrieved": len(retrieved_results),
                 "avg_relevance": avg_score,
-                "top_score": retrieved_results[0].get('combined_score', 0) if retrieved_results else 0
+                "top_score": retrieved_results[0].get('combined_score', 0) if retrieved_results else 0,
+                "context_tokens": packed["tokens"],
+                "context_chunks": len(packed["included"]),
+                "duplicates_dropped": len(packed["duplicates"])
             }
         }
+        
+        if cache_key:
+            embedding, scope, kb_version = cache_key
+            semantic_response_cache.store(embedding, scope, kb_version, query, response)
+        
+        return response
+    
+    def _session_topic(
+        self,
+        session_id: Optional[str],
+        query: str,
+        conversation_history: Optional[List[Dict[str, str]]]
+    ) -> Optional[Dict[str, Any]]:
+        """The session's current topic if query is a follow-up to it"""
+        if not session_id or not conversation_history or not getattr(settings, "retrieval_memory_enabled", True):
+            return None
+        return retrieval_memory.follow_up(session_id, query)
+    
+    def _reuse_retrieval(self, topic: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Previous turn's chunks with their original scores - no embedding or vector search"""
+        scores = dict(topic["results"])
+        results = self.vector_store.fetch_by_ids(list(scores))
+        for result in results:
+            result['combined_score'] = scores[result['id']]
+        return results
+    
+    def _semantic_cache_key(
+        self,
+        query: str,
+        category: str,
+        conversation_history: Optional[List[Dict[str, str]]],
+        concise_mode: bool,
+        embedding: Optional[List[float]] = None
+    ) -> Optional[Tuple[List[float], Tuple, str]]:
+        """(query embedding, scope, KB version) if this query may use the answer cache"""
+        if not getattr(settings, "semantic_cache_enabled", True) or conversation_history:
+            return None
+        # Escalation phrases must always reach the escalation check
+        if query_router.route(query).labels("escalation"):
+            return None
+        try:
+            # Same embedding retrieval uses - the query LRU makes the second call free
+            if embedding is None:
+                embedding = self.vector_store.embed_queries([query])[0]
+            kb_version = self.vector_store.get_kb_version()
+        except Exception as e:
+            print(f"⚠️ Semantic cache skipped: {e}")
+            return None
+        # Nearby questions about different error codes or products need different answers
+        identifiers = (tuple(sorted(extract_codes(query))), tuple(sorted(extract_products(query))))
+        scope = (settings.openai_model, category, concise_mode, identifiers)
+        return embedding, scope, kb_version
 
 
 if __name__ == "__main__":
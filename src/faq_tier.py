@@ -0,0 +1,176 @@
+"""
+FAQ Answer Tier
+Serves precomputed, vetted answers (password reset, storage pricing, support
+contacts...) without retrieval or an LLM call. The table is produced offline
+by build_faq_answers.py and stored in data/faq/faq_answers.json.
+
+A message is answered from the table only when one intent explains almost
+all of it: an intent phrase must match, and nearly every remaining word has
+to be a filler or a word related to that intent. Anything more specific
+("reset password but SelfCare shows error 403") goes to the LLM.
+The APIs consult the tier on the first turn of a conversation only; later
+messages are read in the context of the history.
+"""
+
+import json
+import threading
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Set
+import sys
+
+# Add parent directory to path for imports (Render compatibility)
+current_dir = Path(__file__).parent
+parent_dir = current_dir.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+# Import with fallback
+try:
+    from config import settings
+except ImportError:
+    from src.config import settings
+
+try:
+    from bm25_index import tokenize
+except ImportError:
+    from src.bm25_index import tokenize
+
+try:
+    from query_router import query_router, SUFFIXES
+except ImportError:
+    from src.query_router import query_router, SUFFIXES
+
+FAQ_FORMAT_VERSION = 1
+
+# Words that never make a question more specific
+FILLER_WORDS = {
+    "please", "help", "need", "want", "hi", "hello", "hey", "thanks", "thank",
+    "know", "tell", "get", "where", "which", "there", "any", "some", "t", "s",
+    "am", "im", "us", "just", "like", "ok", "okay", "again"
+}
+
+
+def word_matches(token: str, word: str) -> bool:
+    """token is word or an inflection of it ("passwords" -> "password")"""
+    return token == word or (token.startswith(word) and token[len(word):] in SUFFIXES)
+
+
+class FAQTier:
+    """Intent phrases -> canonical answers, matched on whole-message coverage"""
+
+    def __init__(self, intents: List[Dict[str, Any]], min_confidence: float = 0.75):
+        self.intents = intents
+        self.min_confidence = min_confidence
+        self._lock = threading.Lock()
+        self.served = 0
+        self.misses = 0
+        self.served_by_intent: Dict[str, int] = {}
+
+    @classmethod
+    def load(cls, path: str, min_confidence: float = 0.75) -> Optional["FAQTier"]:
+        """Load the built table; None if it is missing or from another format version"""
+        path = Path(path)
+        if not path.exists():
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("format_version") != FAQ_FORMAT_VERSION:
+            return None
+        return cls(data["intents"], min_confidence=min_confidence)
+
+    def triggered(self, tokens: List[str]) -> Dict[str, Set[int]]:
+        """intent id -> positions of the query tokens it explains (only intents with a full phrase match)"""
+        explained = {}
+        for intent in self.intents:
+            positions = set()
+            for phrase in intent["phrases"]:
+                hits = [
+                    [i for i, token in enumerate(tokens) if word_matches(token, word)]
+                    for word in phrase
+                ]
+                if all(hits):
+                    positions.update(i for found in hits for i in found)
+            if not positions:
+                continue
+            related = intent.get("related", [])
+            positions.update(
+                i for i, token in enumerate(tokens)
+                if any(word_matches(token, word) for word in related)
+            )
+            explained[intent["id"]] = positions
+        return explained
+
+    def match(self, query: str) -> Optional[Dict[str, Any]]:
+        """Canonical answer for query, or None when the LLM should handle it"""
+        result = self._match(query)
+        with self._lock:
+            if result:
+                self.served += 1
+                self.served_by_intent[result["intent"]] = self.served_by_intent.get(result["intent"], 0) + 1
+            else:
+                self.misses += 1
+        return result
+
+    def _match(self, query: str) -> Optional[Dict[str, Any]]:
+        # Requests for a person or billing disputes always reach the normal flow
+        if query_router.route(query).labels("escalation"):
+            return None
+
+        tokens = tokenize(query)
+        if not tokens:
+            return None
+        explained = self.triggered(tokens)
+        if not explained:
+            return None
+
+        filler = {i for i, token in enumerate(tokens) if token in FILLER_WORDS}
+        scored = sorted(
+            ((len(positions | filler) / len(tokens), intent_id) for intent_id, positions in explained.items()),
+            reverse=True
+        )
+        confidence, intent_id = scored[0]
+        # Two intents explaining the message equally well is ambiguous
+        if len(scored) > 1 and scored[1][0] >= confidence:
+            return None
+        if confidence < self.min_confidence:
+            return None
+
+        intent = next(intent for intent in self.intents if intent["id"] == intent_id)
+        return {
+            "intent": intent_id,
+            "title": intent.get("title", intent_id),
+            "answer": intent["answer"],
+            "confidence": round(confidence, 3)
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.served + self.misses
+            return {
+                "intents": len(self.intents),
+                "min_confidence": self.min_confidence,
+                "served": self.served,
+                "passed_to_llm": self.misses,
+                "serve_rate": round(self.served / total, 3) if total else 0.0,
+                "served_by_intent": dict(self.served_by_intent)
+            }
+
+
+def load_faq_tier() -> Optional[FAQTier]:
+    """The configured FAQ table, or None if disabled / not built yet"""
+    if not getattr(settings, "faq_enabled", True):
+        return None
+    try:
+        tier = FAQTier.load(settings.faq_answers_path, min_confidence=settings.faq_min_confidence)
+    except Exception as e:
+        print(f"⚠️ FAQ answers unavailable: {e}")
+        return None
+    if tier is None:
+        print(f"⚠️ FAQ answers not built ({settings.faq_answers_path}) - run build_faq_answers.py")
+        return None
+    print(f"[OK] FAQ answer tier ready ({len(tier.intents)} intents)")
+    return tier
+
+
+# Shared by the SalesIQ webhooks
+faq_tier = load_faq_tier()
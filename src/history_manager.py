@@ -0,0 +1,307 @@
+"""
+Conversation History Compaction
+The APIs used to send the raw last 10 messages of a session on every turn,
+so prompt size tracked the length of the latest replies and everything
+before them was simply dropped.
+
+HistoryManager keeps the last few messages verbatim and folds older turns
+into a rolling summary (issue, error codes, names, what was already tried).
+Summaries are updated on a background thread after the turn that pushed a
+message out of the verbatim window - the request never waits for them.
+Until a summary catches up, the newest keep_messages of the turns it has not
+folded in yet are sent verbatim as well; anything older than that is left
+out until the update lands, so the history stays bounded either way.
+While the older part of the raw 10-message window fits in the summary
+budget, a summary would not be shorter and that window is sent unchanged.
+
+Stored history is bounded too: trim() drops messages the summary already
+covers (keeping the raw window), and SessionHistories evicts idle sessions.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Callable
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports (Render compatibility)
+current_dir = Path(__file__).parent
+parent_dir = current_dir.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+# Import with fallback
+try:
+    from config import settings
+except ImportError:
+    from src.config import settings
+
+try:
+    from token_counter import count_tokens
+except ImportError:
+    from src.token_counter import count_tokens
+
+# What the APIs sent before compaction: the last 10 messages as they are
+RAW_WINDOW = 10
+
+# Marks the summary message so engines that re-slice history keep it
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+SUMMARY_PROMPT = """You maintain a running summary of an IT support chat for ACE Cloud Hosting.
+Update the summary with the new messages. Keep: the customer's issue, products,
+server/user names, error codes, URLs, steps already tried and their outcome, and
+anything still pending. Drop greetings and small talk. Reply with the summary only,
+as short plain sentences."""
+
+
+def is_summary(message: Dict[str, str]) -> bool:
+    return message.get("role") == "system" and message.get("content", "").startswith(SUMMARY_PREFIX)
+
+
+def recent_history(history: List[Dict[str, str]], n: int) -> List[Dict[str, str]]:
+    """Last n messages; a leading summary message is kept in place of the oldest of them"""
+    if history and is_summary(history[0]) and n > 1:
+        return [history[0]] + history[1:][-(n - 1):]
+    return history[-n:]
+
+
+def format_transcript(messages: List[Dict[str, str]]) -> str:
+    return "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+
+
+class HistoryManager:
+    """session id -> rolling summary of the messages before the verbatim window; LRU"""
+
+    def __init__(
+        self,
+        keep_messages: int = 4,
+        summary_max_tokens: int = 200,
+        max_sessions: int = 1000,
+        max_stored_messages: int = 40,
+        enabled: bool = True,
+        summarize: Optional[Callable[[str, List[Dict[str, str]]], str]] = None
+    ):
+        self.keep_messages = keep_messages
+        self.summary_max_tokens = summary_max_tokens
+        self.max_sessions = max_sessions
+        self.max_stored_messages = max(max_stored_messages, RAW_WINDOW)
+        self.enabled = enabled
+        # summarize(previous_summary, new_messages) -> summary; defaults to the chat model
+        self.summarize = summarize or self._summarize_with_llm
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="history-summary")
+        self._pending = set()
+        self._client = None
+        self.compacted = 0
+        self.summaries = 0
+        self.failures = 0
+
+    def compact(self, session_id: str, messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """History to send for a session: summary message + unsummarized messages + last keep_messages"""
+        if not self.enabled:
+            return messages[-RAW_WINDOW:]
+
+        split = max(0, len(messages) - self.keep_messages)
+        if split == 0:
+            return list(messages)
+
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None or state["folded"] > split:
+                # New session, or its history was reset under us
+                state = self._sessions[session_id] = {"summary": "", "folded": 0, "updating": False}
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            summary = state["summary"]
+
+        # Chats of short messages: the raw window costs less than a summary would
+        window = messages[-RAW_WINDOW:]
+        if not summary and self._tokens(window[:-self.keep_messages]) <= self.summary_max_tokens:
+            return window
+
+        with self._lock:
+            summary, folded = state["summary"], state["folded"]
+            schedule = folded < split and not state["updating"]
+            if schedule:
+                state["updating"] = True
+            self.compacted += 1
+
+        if schedule:
+            self._schedule(session_id, state, messages[folded:split], split)
+
+        history = []
+        if summary:
+            history.append({"role": "system", "content": SUMMARY_PREFIX + summary})
+        # Older messages the summary has not caught up with yet; bounded while an update runs
+        history.extend(messages[folded:split][-self.keep_messages:])
+        history.extend(messages[split:])
+        return history
+
+    def trim(self, session_id: str, messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """History worth storing: messages already in the summary go, the raw window stays
+
+        Unsummarized messages are kept up to max_stored_messages, so failing
+        summaries cannot make a session grow without bound.
+        """
+        if not self.enabled:
+            return messages[-RAW_WINDOW:]
+
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is not None and state["updating"]:
+                # The running update counts from the current start; trim next turn
+                return messages
+            folded = state["folded"] if state else 0
+            drop = max(min(len(messages) - RAW_WINDOW, folded), len(messages) - self.max_stored_messages, 0)
+            if state is not None:
+                state["folded"] = max(0, folded - drop)
+        return messages[drop:]
+
+    def _tokens(self, messages: List[Dict[str, str]]) -> int:
+        return sum(count_tokens(m["content"], settings.openai_model) for m in messages)
+
+    def _schedule(self, session_id: str, state: Dict[str, Any], messages: List[Dict[str, str]], folded: int):
+        future = self._executor.submit(self._update, session_id, state, messages, folded)
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._done)
+
+    def _done(self, future):
+        with self._lock:
+            self._pending.discard(future)
+
+    def _update(self, session_id: str, state: Dict[str, Any], messages: List[Dict[str, str]], folded: int):
+        # Only this task changes the summary while "updating" is set, so reading it unlocked is safe
+        try:
+            summary = self.summarize(state["summary"], messages).strip()
+        except Exception as e:
+            print(f"⚠️ History summary failed for {session_id}: {str(e)}")
+            with self._lock:
+                self.failures += 1
+                state["updating"] = False
+            return
+
+        with self._lock:
+            # A reset or evicted session has a new state by now - it drops this result
+            state.update(summary=summary, folded=folded, updating=False)
+            self.summaries += 1
+
+    def _summarize_with_llm(self, summary: str, messages: List[Dict[str, str]]) -> str:
+        if self._client is None:
+            from openai import OpenAI
+            self._client = OpenAI(api_key=settings.openai_api_key)
+
+        response = self._client.chat.completions.create(
+            model=settings.openai_model,
+            messages=[
+                {"role": "system", "content": SUMMARY_PROMPT},
+                {"role": "user", "content": f"Current summary:\n{summary or '(none yet)'}\n\n"
+                                            f"New messages:\n{format_transcript(messages)}"}
+            ],
+            temperature=0,
+            max_tokens=self.summary_max_tokens
+        )
+        return response.choices[0].message.content
+
+    def flush(self, timeout: Optional[float] = None):
+        """Wait for scheduled summary updates (tests and replays)"""
+        with self._lock:
+            pending = list(self._pending)
+        for future in pending:
+            future.result(timeout=timeout)
+
+    def forget(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "sessions": len(self._sessions),
+                "keep_messages": self.keep_messages,
+                "max_stored_messages": self.max_stored_messages,
+                "compacted_requests": self.compacted,
+                "summaries": self.summaries,
+                "summary_failures": self.failures,
+                "pending_summaries": len(self._pending)
+            }
+
+
+class SessionHistories:
+    """session id -> stored messages, trimmed by a HistoryManager; LRU + idle TTL
+
+    Supports the dict operations the APIs use (get, [], =, in, del, len).
+    """
+
+    def __init__(self, manager: HistoryManager, max_sessions: int = 1000, ttl_seconds: float = 3600):
+        self.manager = manager
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def get(self, session_id: str, default: Optional[List[Dict[str, str]]] = None) -> Optional[List[Dict[str, str]]]:
+        with self._lock:
+            self._evict_idle()
+            entry = self._sessions.get(session_id)
+        return entry["messages"] if entry else default
+
+    def __getitem__(self, session_id: str) -> List[Dict[str, str]]:
+        messages = self.get(session_id)
+        if messages is None:
+            raise KeyError(session_id)
+        return messages
+
+    def __setitem__(self, session_id: str, messages: List[Dict[str, str]]):
+        messages = self.manager.trim(session_id, messages)
+        with self._lock:
+            self._sessions[session_id] = {"messages": messages, "seen": time.monotonic()}
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._drop(next(iter(self._sessions)))
+            self._evict_idle()
+
+    def __delitem__(self, session_id: str):
+        with self._lock:
+            if session_id not in self._sessions:
+                raise KeyError(session_id)
+            self._sessions.pop(session_id)
+        self.manager.forget(session_id)
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._evict_idle()
+            return len(self._sessions)
+
+    def _evict_idle(self):
+        # Oldest first - stop at the first session still in use
+        now = time.monotonic()
+        while self._sessions:
+            session_id, entry = next(iter(self._sessions.items()))
+            if now - entry["seen"] <= self.ttl_seconds:
+                break
+            self._drop(session_id)
+
+    def _drop(self, session_id: str):
+        self._sessions.pop(session_id)
+        self.manager.forget(session_id)
+        self.evicted += 1
+
+
+# Shared by every API in the process
+history_manager = HistoryManager(
+    keep_messages=settings.history_keep_messages,
+    summary_max_tokens=settings.history_summary_max_tokens,
+    max_sessions=settings.history_max_sessions,
+    max_stored_messages=settings.history_max_stored_messages,
+    enabled=settings.history_compaction_enabled
+)
@@ -3,11 +3,13 @@ Combines rule-based Zobot flows with RAG-based AI responses
 """
 
 import json
+import asyncio
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple, AsyncIterator
 from src.rag_engine import RAGEngine
 from src.workflow_engine import WorkflowExecutor
 from src.automation_workflows import WorkflowType
+from src.query_router import query_router, AUTOMATION_TRIGGERS
 import re
 
 class HybridChatbot:
@@ -31,35 +33,9 @@ class HybridChatbot:
     def _load_automation_triggers(self) -> Dict[str, WorkflowType]:
         """Map query patterns to automation workflows"""
         return {
-            "disk": WorkflowType.DISK_UPGRADE,
-            "storage": WorkflowType.DISK_UPGRADE,
-            "upgrade": WorkflowType.DISK_UPGRADE,
-            "password": WorkflowType.PASSWORD_RESET,
-            "reset": WorkflowType.PASSWORD_RESET,
-            "forgot": WorkflowType.PASSWORD_RESET,
-            "locked": WorkflowType.ACCOUNT_LOCKED,
-            "account locked": WorkflowType.ACCOUNT_LOCKED,
-            "add user": WorkflowType.USER_MANAGEMENT,
-            "delete user": WorkflowType.USER_MANAGEMENT,
-            "new employee": WorkflowType.USER_MANAGEMENT,
-            "monitor": WorkflowType.MONITOR_SETUP,
-            "display": WorkflowType.MONITOR_SETUP,
-            "printer": WorkflowType.PRINTER_ISSUES,
-            "print": WorkflowType.PRINTER_ISSUES,
-            "slow": WorkflowType.SERVER_SLOWNESS,
-            "performance": WorkflowType.SERVER_SLOWNESS,
-            "rdp": WorkflowType.RDP_CONNECTION,
-            "remote": WorkflowType.RDP_CONNECTION,
-            "reboot": WorkflowType.SERVER_REBOOT,
-            "restart": WorkflowType.SERVER_REBOOT,
-            "mfa": WorkflowType.QB_MFA,
-            "security code": WorkflowType.QB_MFA,
-            "email": WorkflowType.EMAIL_ISSUES,
-            "outlook": WorkflowType.EMAIL_ISSUES,
-            "quickbooks": WorkflowType.QB_ISSUES,
-            "qb": WorkflowType.QB_ISSUES,
-            "windows update": WorkflowType.WINDOWS_UPDATE,
-            "update failed": WorkflowType.WINDOWS_UPDATE,
+            trigger: WorkflowType(workflow)
+            for workflow, triggers in AUTOMATION_TRIGGERS.items()
+            for trigger in triggers
         }
     
     def _load_conversation_flows(self) -> Dict[str, Any]:
@@ -186,13 +162,9 @@ class HybridChatbot:
     
     def _detect_automation_workflow(self, query: str) -> Optional[WorkflowType]:
         """Detect if query should trigger an automation workflow"""
-        query_lower = query.lower()
-        
-        for trigger, workflow_type in self.automation_triggers.items():
-            if trigger in query_lower:
-                return workflow_type
-        
-        return None
+        # Workflow with the most trigger hits; ties go to the workflow listed first
+        best = query_router.route(query).best("automation")
+        return WorkflowType(best[0]) if best else None
     
     def process_query(self, query: str, conversation_history: Optional[List[Dict[str, str]]] = None, session_id: Optional[str] = None, user_id: Optional[str] = None) -> Dict[str, Any]:
         """Main method to process queries with hybrid approach"""
@@ -234,6 +206,24 @@ class HybridChatbot:
         
         return rag_result
     
+    async def stream_query(self, query: str, conversation_history: Optional[List[Dict[str, str]]] = None, session_id: Optional[str] = None, user_id: Optional[str] = None) -> AsyncIterator[Tuple[str, Any]]:
+        """process_query as events: ("token", text)..., then ("done", result)
+        
+        Pure RAG answers stream token by token; workflow and Zobot answers are
+        ready at once and arrive as a single token.
+        """
+        workflow_type = self._detect_automation_workflow(query)
+        if (workflow_type and session_id and user_id) or self._match_zobot_pattern(query):
+            result = await asyncio.to_thread(self.process_query, query, conversation_history, session_id, user_id)
+            yield "token", result["response"]
+            yield "done", result
+            return
+        
+        async for kind, payload in self.rag_engine.stream_query(query, conversation_history):
+            if kind == "done":
+                payload["source"] = "rag_only"
+            yield kind, payload
+    
     def get_quick_actions(self, query: str) -> List[Dict[str, str]]:
         """Get quick action buttons based on query"""
         query_lower = query.lower()
@@ -0,0 +1,208 @@
+"""
+Identifier Index
+Exact lookup from error codes (-6177, 15212, 0x204, PS077, QBWC1039) and
+product names (Lacerte, Drake, ProSeries...) to the KB documents about them.
+
+Codes found in a document title are authoritative and select the whole
+document; codes only seen in chunk text are used when no title mentions them
+and select just the chunks that contain them. A lookup is "confident" when the
+query's codes (narrowed by any product names) resolve to at most a few
+documents - those queries can skip embedding and vector search entirely.
+Product names alone only narrow a match; they never make it confident.
+"""
+
+import re
+import json
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Set
+
+IDENTIFIER_FORMAT_VERSION = 2
+
+# Hex-style RDP codes, letter+digit codes, negative codes (-816) and 4-6 digit
+# codes (15212). Numbers glued to units, prices, versions, paths or phone
+# numbers are ignored, as are short numbers in names like "Office 365".
+CODE_PATTERN = re.compile(
+    r"(?<![\w.$/:+-])(0x[0-9a-z]+|[a-z]{2,5}\d{3,5}|-\d{3,6}|\d{4,6})(?![\w.%/:$-]|,\d{3})"
+)
+
+PRODUCT_TERMS = {
+    "lacerte": "lacerte",
+    "drake": "drake",
+    "proseries": "proseries",
+    "uniprint": "uniprint",
+    "tsscan": "tsscan",
+    "smartvault": "smartvault",
+    "bill.com": "bill.com",
+    "sage 50": "sage 50",
+    "sage 100": "sage 100",
+    "web connector": "webconnector",
+    "webconnector": "webconnector",
+    "atx": "atx",
+    "chromebook": "chromebook",
+    "google drive": "google drive",
+}
+PRODUCT_PATTERN = re.compile(
+    r"\b(" + "|".join(re.escape(term) for term in sorted(PRODUCT_TERMS, key=len, reverse=True)) + r")\b"
+)
+
+# Years are numbers too, but never identify a document
+IGNORED_CODES = {str(year) for year in range(1990, 2100)}
+
+
+def extract_codes(text: str) -> List[str]:
+    """Normalized codes in text ("-6177" and "6177" both become "6177")"""
+    codes = []
+    for match in CODE_PATTERN.findall(text.lower()):
+        code = match.lstrip("-")
+        if code not in IGNORED_CODES and code not in codes:
+            codes.append(code)
+    return codes
+
+
+def extract_products(text: str) -> List[str]:
+    products = []
+    for match in PRODUCT_PATTERN.findall(text.lower()):
+        product = PRODUCT_TERMS[match]
+        if product not in products:
+            products.append(product)
+    return products
+
+
+def document_title(chunk_id: str, metadata: Dict[str, Any]) -> str:
+    title = metadata.get("filename") or metadata.get("doc_id") or re.sub(r"_chunk_\d+$", "", chunk_id)
+    return re.sub(r"\.(pdf|docx?|txt|md)$", "", title.replace("_", " "), flags=re.IGNORECASE)
+
+
+class IdentifierIndex:
+    """code / product -> documents -> ordered chunk ids; content-only codes -> the chunks containing them"""
+
+    def __init__(self, max_documents: int = 3):
+        self.max_documents = max_documents
+        self.kb_version: Optional[str] = None
+        self.title_codes: Dict[str, List[str]] = {}
+        self.content_codes: Dict[str, List[str]] = {}  # code -> chunk ids
+        self.products: Dict[str, List[str]] = {}
+        self.documents: Dict[str, List[str]] = {}
+        self.chunk_documents: Dict[str, str] = {}
+
+    @classmethod
+    def build(
+        cls,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        kb_version: Optional[str] = None,
+        max_documents: int = 3
+    ) -> "IdentifierIndex":
+        index = cls(max_documents=max_documents)
+        index.kb_version = kb_version
+
+        doc_chunks: Dict[str, List[tuple]] = {}
+        title_codes: Dict[str, Set[str]] = {}
+        content_codes: Dict[str, Set[str]] = {}
+        products: Dict[str, Set[str]] = {}
+
+        for chunk_id, content, meta in zip(ids, documents, metadatas):
+            meta = meta or {}
+            doc_id = meta.get("doc_id") or re.sub(r"_chunk_\d+$", "", chunk_id)
+            doc_chunks.setdefault(doc_id, []).append((int(meta.get("chunk_number", 0) or 0), chunk_id))
+
+            title = document_title(chunk_id, meta)
+            for code in extract_codes(title):
+                title_codes.setdefault(code, set()).add(doc_id)
+            for product in extract_products(title):
+                products.setdefault(product, set()).add(doc_id)
+            # Chat-transcript training examples mention codes in passing
+            if meta.get("type") != "training_example":
+                for code in extract_codes(content or ""):
+                    content_codes.setdefault(code, set()).add(chunk_id)
+
+        index.documents = {doc_id: [cid for _, cid in sorted(chunks)] for doc_id, chunks in doc_chunks.items()}
+        index.title_codes = {code: sorted(docs) for code, docs in title_codes.items()}
+        index.content_codes = {code: sorted(chunks) for code, chunks in content_codes.items()}
+        index.products = {product: sorted(docs) for product, docs in products.items()}
+        index._map_chunks()
+        return index
+
+    def _map_chunks(self):
+        self.chunk_documents = {
+            chunk_id: doc_id for doc_id, chunk_ids in self.documents.items() for chunk_id in chunk_ids
+        }
+
+    def lookup(self, query: str) -> Optional[Dict[str, Any]]:
+        """Documents and chunk ids for the identifiers in query (None if it has no known code)"""
+        matched_codes = []
+        candidates: Optional[Set[str]] = None
+        title_documents: Set[str] = set()
+        content_chunks: Set[str] = set()
+        for code in extract_codes(query):
+            docs = self.title_codes.get(code)
+            if docs:
+                title_documents.update(docs)
+            else:
+                chunks = self.content_codes.get(code, [])
+                content_chunks.update(chunks)
+                docs = {self.chunk_documents[chunk_id] for chunk_id in chunks if chunk_id in self.chunk_documents}
+            if not docs:
+                continue
+            matched_codes.append(code)
+            candidates = set(docs) if candidates is None else candidates & set(docs)
+
+        if candidates is None:
+            return None
+
+        matched_products = []
+        for product in extract_products(query):
+            narrowed = candidates & set(self.products.get(product, []))
+            if narrowed:
+                candidates = narrowed
+                matched_products.append(product)
+
+        documents = sorted(candidates)
+        return {
+            "identifiers": matched_codes + matched_products,
+            "documents": documents,
+            # A title match takes the whole document; a content match only the chunks naming the code
+            "chunk_ids": [
+                chunk_id for doc_id in documents for chunk_id in self.documents.get(doc_id, [])
+                if doc_id in title_documents or chunk_id in content_chunks
+            ],
+            "confident": 0 < len(documents) <= self.max_documents
+        }
+
+    def save(self, path: str):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "format_version": IDENTIFIER_FORMAT_VERSION,
+                "kb_version": self.kb_version,
+                "title_codes": self.title_codes,
+                "content_codes": self.content_codes,
+                "products": self.products,
+                "documents": self.documents
+            }, f, ensure_ascii=False)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: str, kb_version: Optional[str] = None, max_documents: int = 3) -> Optional["IdentifierIndex"]:
+        """Load a saved index; None if missing or built for another KB version"""
+        path = Path(path)
+        if not path.exists():
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("format_version") != IDENTIFIER_FORMAT_VERSION:
+            return None
+        if kb_version is not None and data.get("kb_version") != kb_version:
+            return None
+
+        index = cls(max_documents=max_documents)
+        index.kb_version = data.get("kb_version")
+        index.title_codes = data["title_codes"]
+        index.content_codes = data["content_codes"]
+        index.products = data["products"]
+        index.documents = data["documents"]
+        index._map_chunks()
+        return index
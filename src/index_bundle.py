@@ -0,0 +1,184 @@
+"""
+Prebuilt Index Bundle
+Versioned, memory-mappable snapshot of the vector index for fast cold starts.
+
+Layout (one sub-directory per KB version, LATEST points at the current one):
+    index_bundle/
+        LATEST
+        <kb_version>/
+            manifest.json    format version, KB version, embedding model, shape
+            embeddings.npy   float32 (N, D) L2-normalized matrix
+            texts.bin        UTF-8 chunk texts concatenated
+            offsets.npy      int64 (N + 1) byte offsets into texts.bin
+            metadata.json    chunk ids + columnar metadata table
+"""
+
+import json
+import shutil
+import hashlib
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+BUNDLE_FORMAT_VERSION = 1
+
+
+def compute_kb_version(ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]]) -> str:
+    """Stable fingerprint of the indexed content (order independent)"""
+    digest = hashlib.sha256()
+    for chunk_id, document, meta in sorted(zip(ids, documents, metadatas), key=lambda x: x[0]):
+        content_hash = (meta or {}).get("content_hash") or hashlib.sha256(document.encode("utf-8")).hexdigest()
+        digest.update(f"{chunk_id}\0{content_hash}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class BundleTexts:
+    """Lazy, read-only sequence of chunk texts backed by a memory-mapped blob"""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self._blob = blob
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        if i < 0:
+            i += len(self)
+        start, end = int(self._offsets[i]), int(self._offsets[i + 1])
+        return self._blob[start:end].tobytes().decode("utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class IndexBundle:
+    """Read side of the bundle - everything heavy stays on disk via mmap"""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+        with open(self.directory / "manifest.json", 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+
+        if self.manifest.get("format_version") != BUNDLE_FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported index bundle format {self.manifest.get('format_version')} "
+                f"(expected {BUNDLE_FORMAT_VERSION})"
+            )
+
+        self.embeddings = np.load(self.directory / "embeddings.npy", mmap_mode='r')
+        offsets = np.load(self.directory / "offsets.npy", mmap_mode='r')
+        texts_file = self.directory / "texts.bin"
+        blob = (np.memmap(texts_file, dtype=np.uint8, mode='r')
+                if texts_file.stat().st_size else np.zeros(0, dtype=np.uint8))
+        self.documents = BundleTexts(blob, offsets)
+
+        with open(self.directory / "metadata.json", 'r', encoding='utf-8') as f:
+            table = json.load(f)
+        self.ids: List[str] = table["ids"]
+        columns: Dict[str, List[Any]] = table["columns"]
+        self.metadatas: List[Dict[str, Any]] = [
+            {key: values[i] for key, values in columns.items() if values[i] is not None}
+            for i in range(len(self.ids))
+        ]
+
+    @property
+    def kb_version(self) -> str:
+        return self.manifest["kb_version"]
+
+    @staticmethod
+    def resolve(root: str) -> Optional[Path]:
+        """Directory of the latest bundle under root, or None if there is none"""
+        root_path = Path(root)
+        latest = root_path / "LATEST"
+        if not latest.exists():
+            return None
+        bundle_dir = root_path / latest.read_text(encoding='utf-8').strip()
+        return bundle_dir if (bundle_dir / "manifest.json").exists() else None
+
+    @classmethod
+    def load_latest(cls, root: str) -> "IndexBundle":
+        bundle_dir = cls.resolve(root)
+        if bundle_dir is None:
+            raise FileNotFoundError(f"No index bundle found under {root}")
+        return cls(bundle_dir)
+
+
+def write_bundle(
+    root: str,
+    ids: List[str],
+    embeddings,
+    documents: List[str],
+    metadatas: List[Dict[str, Any]],
+    embedding_model: str,
+    collection_name: str,
+    embedding_dimensions: int = 0,
+    keep_versions: int = 2
+) -> Path:
+    """Write a new bundle version and point LATEST at it"""
+    root_path = Path(root)
+    root_path.mkdir(parents=True, exist_ok=True)
+
+    kb_version = compute_kb_version(ids, documents, metadatas)
+    version_name = kb_version[:16]
+    staging_dir = root_path / f".staging_{version_name}"
+    final_dir = root_path / version_name
+
+    if staging_dir.exists():
+        shutil.rmtree(staging_dir)
+    staging_dir.mkdir()
+
+    # Embedding matrix (normalized so queries are a single matmul)
+    matrix = np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    np.save(staging_dir / "embeddings.npy", matrix / norms)
+
+    # Text blob with offsets
+    offsets = np.zeros(len(documents) + 1, dtype=np.int64)
+    with open(staging_dir / "texts.bin", 'wb') as f:
+        for i, document in enumerate(documents):
+            encoded = document.encode("utf-8")
+            f.write(encoded)
+            offsets[i + 1] = offsets[i] + len(encoded)
+    np.save(staging_dir / "offsets.npy", offsets)
+
+    # Columnar metadata table
+    keys = sorted({key for meta in metadatas for key in (meta or {})})
+    columns = {key: [(meta or {}).get(key) for meta in metadatas] for key in keys}
+    with open(staging_dir / "metadata.json", 'w', encoding='utf-8') as f:
+        json.dump({"ids": list(ids), "columns": columns}, f, ensure_ascii=False)
+
+    manifest = {
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "kb_version": kb_version,
+        "collection_name": collection_name,
+        "embedding_model": embedding_model,
+        "embedding_dimensions": embedding_dimensions,
+        "count": len(ids),
+        "dimensions": int(matrix.shape[1]) if len(ids) else 0,
+        "created_at": datetime.now().isoformat()
+    }
+    with open(staging_dir / "manifest.json", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    if final_dir.exists():
+        shutil.rmtree(final_dir)
+    staging_dir.rename(final_dir)
+    (root_path / "LATEST").write_text(version_name, encoding='utf-8')
+
+    # Prune old versions (other directories, e.g. bm25/, are left alone)
+    versions = sorted(
+        (p for p in root_path.iterdir() if p.is_dir() and (p / "manifest.json").exists()),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True
+    )
+    for old in versions[keep_versions:]:
+        if old != final_dir:
+            shutil.rmtree(old, ignore_errors=True)
+
+    return final_dir
@@ -0,0 +1,132 @@
+"""
+MinHash + LSH Near-Duplicate Detection
+Finds chunks whose word-shingle sets overlap by at least a Jaccard
+threshold, across all sources, in near-linear time:
+
+1. Each chunk gets a MinHash signature (num_perm universal hashes of its
+   5-word shingles, minimum per hash).
+2. Signatures are split into LSH bands; chunks sharing any band bucket
+   become candidate pairs.
+3. Candidates are verified with the exact shingle Jaccard, and verified
+   pairs are merged into clusters (union-find).
+4. duplicates() picks the copy to keep per cluster. Clusters are
+   transitive (A~B, B~C does not mean A~C), so only members verified
+   against the kept copy are dropped; the rest are resolved again.
+
+Only candidate pairs are compared, so cost grows with corpus size rather
+than with the number of chunk pairs.
+"""
+
+from typing import List, Dict, Any, Tuple, Callable
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports (Render compatibility)
+current_dir = Path(__file__).parent
+parent_dir = current_dir.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+try:
+    from context_packer import shingles, jaccard
+except ImportError:
+    from src.context_packer import shingles, jaccard
+
+# Mersenne prime: (a * x + b) stays below 2**63 for 32-bit shingle hashes
+MERSENNE_PRIME = (1 << 31) - 1
+
+
+def lsh_parameters(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """(bands, rows) with bands * rows == num_perm whose S-curve rises just below threshold
+
+    Candidates are verified exactly, so the layout errs towards extra
+    candidates (cheap) rather than missed duplicates.
+    """
+    options = [(num_perm // rows, rows) for rows in range(1, num_perm + 1) if num_perm % rows == 0]
+    midpoint = lambda option: (1 / option[0]) ** (1 / option[1])
+    below = [option for option in options if midpoint(option) <= 0.9 * threshold]
+    return max(below, key=midpoint) if below else min(options, key=midpoint)
+
+
+class MinHashLSH:
+    """Near-duplicate clusters of texts at a Jaccard threshold"""
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, seed: int = 1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands, self.rows = lsh_parameters(num_perm, threshold)
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_set) -> np.ndarray:
+        hashes = np.fromiter(shingle_set, dtype=np.uint64, count=len(shingle_set))
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % MERSENNE_PRIME
+        return permuted.min(axis=1)
+
+    def clusters(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """Groups of near-duplicate texts: [{"members": [indices], "similarity": {index: jaccard to first}}]"""
+        shingle_sets = [shingles(text) for text in texts]
+
+        # LSH buckets: one dict per band
+        candidates = set()
+        buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        for i, shingle_set in enumerate(shingle_sets):
+            signature = self.signature(shingle_set)
+            for band in range(self.bands):
+                key = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+                bucket = buckets[band].setdefault(key, [])
+                candidates.update((j, i) for j in bucket)
+                bucket.append(i)
+
+        # Verify candidates exactly, merge with union-find
+        parent = list(range(len(texts)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        verified = 0
+        for i, j in candidates:
+            if jaccard(shingle_sets[i], shingle_sets[j]) >= self.threshold:
+                verified += 1
+                root_i, root_j = find(i), find(j)
+                if root_i != root_j:
+                    parent[max(root_i, root_j)] = min(root_i, root_j)
+        self.last_stats = {"candidate_pairs": len(candidates), "verified_pairs": verified}
+
+        groups: Dict[int, List[int]] = {}
+        for i in range(len(texts)):
+            groups.setdefault(find(i), []).append(i)
+        return [
+            {
+                "members": members,
+                "similarity": {i: jaccard(shingle_sets[members[0]], shingle_sets[i]) for i in members[1:]}
+            }
+            for members in groups.values() if len(members) > 1
+        ]
+
+    def duplicates(self, texts: List[str], preference: Callable[[int], Any]) -> List[Dict[str, Any]]:
+        """Copies to drop: [{"kept": index, "removed": {index: jaccard to kept}}]
+
+        In each cluster the member with the highest preference(index) is kept
+        and every member at least threshold-similar to it is removed. Members
+        only linked through a removed one stay and are resolved among
+        themselves the same way.
+        """
+        groups = []
+        for cluster in self.clusters(texts):
+            members = cluster["members"]
+            shingle_sets = {i: shingles(texts[i]) for i in members}
+            while len(members) > 1:
+                kept = max(members, key=preference)
+                similarity = {i: jaccard(shingle_sets[kept], shingle_sets[i]) for i in members if i != kept}
+                removed = {i: sim for i, sim in similarity.items() if sim >= self.threshold}
+                members = [i for i in members if i != kept and i not in removed]
+                if removed:
+                    groups.append({"kept": kept, "removed": removed})
+        return groups
@@ -0,0 +1,60 @@
+"""
+Quantized Embedding Storage
+Compact in-memory copies of the embedding matrix (float16 or int8) used for a
+first-pass top-N; exact scores are recomputed from the full-precision matrix,
+which can stay memory-mapped on disk.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+QUANTIZATION_MODES = ("none", "float16", "int8")
+
+
+class QuantizedMatrix:
+    """Scalar-quantized (int8, per-dimension scale) or float16 copy of a matrix"""
+
+    def __init__(self, matrix: np.ndarray, mode: str, block_size: int = 4096):
+        if mode not in ("float16", "int8"):
+            raise ValueError(f"Unsupported quantization mode: {mode} (expected 'float16' or 'int8')")
+
+        self.mode = mode
+        self.block_size = block_size
+        n_rows, dim = matrix.shape
+        self.scale: Optional[np.ndarray] = None
+
+        if mode == "int8":
+            # Per-dimension scale so each column uses the full int8 range
+            max_abs = np.zeros(dim, dtype=np.float32)
+            for start in range(0, n_rows, block_size):
+                block = np.asarray(matrix[start:start + block_size], dtype=np.float32)
+                max_abs = np.maximum(max_abs, np.abs(block).max(axis=0))
+            max_abs[max_abs == 0] = 1.0
+            self.scale = (127.0 / max_abs).astype(np.float32)
+
+        dtype = np.int8 if mode == "int8" else np.float16
+        self.data = np.empty((n_rows, dim), dtype=dtype)
+        # Read the source in blocks so a memory-mapped matrix is never fully resident
+        for start in range(0, n_rows, block_size):
+            block = np.asarray(matrix[start:start + block_size], dtype=np.float32)
+            if self.scale is not None:
+                block = np.clip(np.rint(block * self.scale), -127, 127)
+            self.data[start:start + block_size] = block.astype(dtype)
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes + (self.scale.nbytes if self.scale is not None else 0)
+
+    def scores(self, queries: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Approximate dot products (n_queries x n_rows), computed block by block"""
+        data = self.data if rows is None else self.data[rows]
+        # Fold the int8 scale into the queries instead of dequantizing the matrix
+        q = queries if self.scale is None else queries / self.scale
+        q = q.astype(np.float32)
+
+        out = np.empty((q.shape[0], data.shape[0]), dtype=np.float32)
+        for start in range(0, data.shape[0], self.block_size):
+            block = data[start:start + self.block_size].astype(np.float32)
+            out[:, start:start + block.shape[0]] = q @ block.T
+        return out
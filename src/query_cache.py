@@ -0,0 +1,101 @@
+"""
+Query Embedding Cache
+Bounded, thread-safe LRU (with TTL) of normalized query text -> embedding.
+One process-wide instance is shared by every engine through VectorStore, so a
+repeated SalesIQ question skips the OpenAI embedding round trip.
+"""
+
+import re
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports (Render compatibility)
+current_dir = Path(__file__).parent
+parent_dir = current_dir.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+# Import with fallback
+try:
+    from config import settings
+except ImportError:
+    from src.config import settings
+
+
+class QueryEmbeddingCache:
+    """LRU + TTL cache for query embeddings with hit/miss counters"""
+
+    def __init__(self, max_size: int = 2048, ttl_seconds: float = 3600):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, List[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Case-, whitespace- and trailing-punctuation-insensitive key"""
+        text = re.sub(r"\s+", " ", query.lower()).strip()
+        return text.rstrip("?!. ")
+
+    def get(self, model: str, query: str) -> Optional[List[float]]:
+        key = (model, self.normalize(query))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            stored_at, embedding = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return embedding
+
+    def put(self, model: str, query: str, embedding: List[float]):
+        if self.max_size <= 0:
+            return
+        key = (model, self.normalize(query))
+        with self._lock:
+            self._entries[key] = (time.monotonic(), embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+
+# Shared by RAGEngine, ExpertRAGEngine and HybridChatbot (via VectorStore)
+query_embedding_cache = QueryEmbeddingCache(
+    max_size=settings.query_cache_size,
+    ttl_seconds=settings.query_cache_ttl_seconds
+)
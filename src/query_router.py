@@ -0,0 +1,186 @@
+"""
+Query Router
+One precompiled multi-pattern matcher shared by every keyword router:
+ExpertRAGEngine.classify_query, HybridChatbot._detect_automation_workflow
+and the escalation checks in RAGEngine / ExpertRAGEngine.
+
+All phrases of all tables are compiled into one word-level trie (Aho-Corasick
+over words rather than characters). The query is tokenized once and walked
+once, so one O(len(query)) pass returns every category, workflow and
+escalation hit. Matching is on whole words plus common inflections, so
+"print" matches "printing" but "qb" no longer matches inside "qbo". Ties are
+broken by declaration order, which is explicit here rather than an accident
+of dict iteration elsewhere.
+
+Results of the shared query_router are cached per query text at module
+level; cached hits are read-only mappings since every caller shares them.
+"""
+
+import re
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+
+# Words keep inner apostrophes and hyphens ("doesn't", "multi-user")
+WORD_PATTERN = re.compile(r"[a-z0-9]+(?:['-][a-z0-9]+)*")
+
+# Inflections accepted after any phrase word ("user" -> "users", "connect" -> "connection")
+SUFFIXES = ("s", "es", "ed", "d", "ing", "er", "ers", "ion", "ions", "ness")
+
+CATEGORY_KEYWORDS: Dict[str, List[str]] = {
+    "password_reset": ["password", "reset", "forgot", "login", "selfcare"],
+    "disk_storage": ["disk", "storage", "space", "full", "upgrade", "c drive"],
+    "rdp_connection": ["rdp", "remote desktop", "connection", "connect", "disconnect"],
+    "quickbooks": ["quickbooks", "qb", "error", "multi-user", "payroll"],
+    "email": ["email", "outlook", "smtp", "send", "receive"],
+    "printer": ["print", "printer", "uniprint", "check printing"],
+    "performance": ["slow", "performance", "lag", "freeze", "hang"],
+    "user_management": ["user", "add user", "delete user", "permission"],
+    "billing": ["billing", "payment", "invoice", "subscription", "pricing"]
+}
+
+# Workflow value (automation_workflows.WorkflowType) -> trigger phrases
+AUTOMATION_TRIGGERS: Dict[str, List[str]] = {
+    "disk_upgrade": ["disk", "storage", "upgrade"],
+    "password_reset": ["password", "reset", "forgot"],
+    "account_locked": ["locked", "account locked"],
+    "user_management": ["add user", "delete user", "new employee"],
+    "monitor_setup": ["monitor", "display"],
+    "printer_issues": ["printer", "print"],
+    "server_slowness": ["slow", "performance"],
+    "rdp_connection": ["rdp", "remote"],
+    "server_reboot": ["reboot", "restart"],
+    "qb_mfa": ["mfa", "security code"],
+    "email_issues": ["email", "outlook"],
+    "qb_issues": ["quickbooks", "qb"],
+    "windows_update": ["windows update", "update failed"]
+}
+
+ESCALATION_PHRASES: Dict[str, List[str]] = {
+    # Explicit requests for a person (ExpertRAGEngine)
+    "human_request": [
+        "speak to human", "talk to agent", "real person",
+        "not helpful", "doesn't work", "still not working"
+    ],
+    # Billing/legal - always a human (ExpertRAGEngine)
+    "critical": ["billing", "refund", "cancel subscription", "legal", "complaint"],
+    # Truly urgent topics (RAGEngine)
+    "urgent": [
+        "billing", "payment", "cancel subscription", "refund",
+        "complaint", "speak to manager", "legal"
+    ]
+}
+
+
+class RouteResult:
+    """Hits of one query: namespace -> label -> number of distinct phrases matched"""
+
+    def __init__(self, hits: Mapping[str, Mapping[str, int]], label_order: Dict[str, Dict[str, int]]):
+        self.hits = hits
+        self._label_order = label_order
+
+    def labels(self, namespace: str) -> Mapping[str, int]:
+        return self.hits.get(namespace, {})
+
+    def has(self, namespace: str, label: str) -> bool:
+        return label in self.hits.get(namespace, {})
+
+    def best(self, namespace: str) -> Optional[Tuple[str, int]]:
+        """(label, hits) with the most hits; ties go to the label declared first"""
+        labels = self.hits.get(namespace)
+        if not labels:
+            return None
+        order = self._label_order[namespace]
+        best = None
+        for label, count in labels.items():
+            if best is None or count > labels[best] or (count == labels[best] and order[label] < order[best]):
+                best = label
+        return best, labels[best]
+
+
+class KeywordRouter:
+    """Word-level trie over namespace -> label -> phrases tables"""
+
+    def __init__(self, tables: Dict[str, Dict[str, List[str]]]):
+        self.tables = tables
+        self.label_order = {
+            namespace: {label: i for i, label in enumerate(labels)}
+            for namespace, labels in tables.items()
+        }
+
+        self._phrase_labels: Dict[str, List[Tuple[str, str]]] = {}
+        for namespace, labels in tables.items():
+            for label, phrases in labels.items():
+                for phrase in phrases:
+                    targets = self._phrase_labels.setdefault(phrase.lower(), [])
+                    if (namespace, label) not in targets:
+                        targets.append((namespace, label))
+
+        # Nested dict per word; the None key marks the end of a phrase
+        self._trie: Dict = {}
+        self._words = set()
+        self._form_cache: Dict[str, Tuple[str, ...]] = {}
+        for phrase in self._phrase_labels:
+            node = self._trie
+            for word in WORD_PATTERN.findall(phrase):
+                self._words.add(word)
+                node = node.setdefault(word, {})
+            node[None] = phrase
+
+    def route(self, text: str) -> RouteResult:
+        text = text.lower()
+        hits = _shared_hits(text) if self is query_router else self._scan(text)
+        return RouteResult(hits, self.label_order)
+
+    def _forms(self, token: str) -> Tuple[str, ...]:
+        """Phrase words a query token can stand for ("printer" -> printer, print)"""
+        forms = self._form_cache.get(token)
+        if forms is None:
+            candidates = [token] + [token[:-len(suffix)] for suffix in SUFFIXES if token.endswith(suffix)]
+            forms = tuple(dict.fromkeys(form for form in candidates if form in self._words))
+            if len(self._form_cache) < 10000:
+                self._form_cache[token] = forms
+        return forms
+
+    def _walk(self, node: Dict, tokens: List[Tuple[str, ...]], position: int, matched: set):
+        phrase = node.get(None)
+        if phrase is not None:
+            matched.add(phrase)
+        if position < len(tokens):
+            for form in tokens[position]:
+                child = node.get(form)
+                if child is not None:
+                    self._walk(child, tokens, position + 1, matched)
+
+    def _scan(self, text: str) -> Mapping[str, Mapping[str, int]]:
+        cache = self._form_cache
+        tokens = [cache[token] if token in cache else self._forms(token) for token in WORD_PATTERN.findall(text)]
+
+        matched = set()
+        for start, forms in enumerate(tokens):
+            # Most words start no phrase at all
+            for form in forms:
+                node = self._trie.get(form)
+                if node is not None:
+                    self._walk(node, tokens, start + 1, matched)
+
+        hits: Dict[str, Dict[str, int]] = {}
+        for phrase in matched:
+            for namespace, label in self._phrase_labels[phrase]:
+                labels = hits.setdefault(namespace, {})
+                labels[label] = labels.get(label, 0) + 1
+        return MappingProxyType({namespace: MappingProxyType(labels) for namespace, labels in hits.items()})
+
+
+# Shared by ExpertRAGEngine, RAGEngine and HybridChatbot
+query_router = KeywordRouter({
+    "category": CATEGORY_KEYWORDS,
+    "automation": AUTOMATION_TRIGGERS,
+    "escalation": ESCALATION_PHRASES
+})
+
+
+@lru_cache(maxsize=1024)
+def _shared_hits(text: str) -> Mapping[str, Mapping[str, int]]:
+    """query_router hits for a lowercased query (repeated messages skip the scan)"""
+    return query_router._scan(text)
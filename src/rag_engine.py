@@ -1,5 +1,6 @@
-from typing import List, Dict, Any, Optional
-from openai import OpenAI
+import asyncio
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator
+from openai import OpenAI, AsyncOpenAI
 import sys
 from pathlib import Path
 
@@ -20,13 +21,44 @@ try:
 except ImportError:
     from src.vector_store import VectorStore
 
+try:
+    from query_router import query_router
+except ImportError:
+    from src.query_router import query_router
+
+try:
+    from context_packer import ContextPacker
+except ImportError:
+    from src.context_packer import ContextPacker
+
+try:
+    from single_flight import single_flight, normalize_query
+except ImportError:
+    from src.single_flight import single_flight, normalize_query
+
+try:
+    from sse_streaming import stream_chat_completion, streamed_tokens
+except ImportError:
+    from src.sse_streaming import stream_chat_completion, streamed_tokens
+
+try:
+    from history_manager import recent_history
+except ImportError:
+    from src.history_manager import recent_history
+
 class RAGEngine:
     """Core RAG engine for query processing and response generation"""
     
     def __init__(self):
         self.openai_client = OpenAI(api_key=settings.openai_api_key)
+        self.async_openai_client = AsyncOpenAI(api_key=settings.openai_api_key)
         self.vector_store = VectorStore()
         self.vector_store.create_collection()
+        self.context_packer = ContextPacker(
+            token_budget=getattr(settings, "context_token_budget", 1000),
+            duplicate_threshold=getattr(settings, "context_duplicate_threshold", 0.5),
+            model=settings.openai_model
+        )
         
         self.system_prompt = """You are AceBuddy, an expert IT support assistant for ACE Cloud Hosting services.
 
@@ -104,26 +136,15 @@ Remember: Concise, complete, actionable. One response solves the issue."""
         return filtered_results
     
     def build_context_string(self, results: List[Dict[str, Any]]) -> str:
-        """Build context string from retrieved documents"""
+        """Build context string from retrieved documents (within the context token budget)"""
         if not results:
             return "No relevant information found in knowledge base."
         
-        context_parts = []
-        total_length = 0
-        
-        for i, result in enumerate(results, 1):
-            content = result['content']
+        def format_part(number: int, result: Dict[str, Any], content: str) -> str:
             category = result['metadata'].get('category', 'General')
-            
-            part = f"[Source {i} - {category}]\n{content}\n"
-            
-            if total_length + len(part) > settings.max_context_length:
-                break
-            
-            context_parts.append(part)
-            total_length += len(part)
+            return f"[Source {number} - {category}]\n{content}\n"
         
-        return "\n".join(context_parts)
+        return self.context_packer.pack(results, format_part, separator="\n")["context"]
     
     def generate_response(
         self, 
@@ -132,12 +153,28 @@ Remember: Concise, complete, actionable. One response solves the issue."""
         conversation_history: Optional[List[Dict[str, str]]] = None
     ) -> Dict[str, Any]:
         """Generate response using OpenAI with retrieved context"""
+        response = self.openai_client.chat.completions.create(
+            **self._completion_request(query, context, conversation_history)
+        )
         
+        return {
+            "response": response.choices[0].message.content,
+            "model": settings.openai_model,
+            "tokens_used": response.usage.total_tokens
+        }
+    
+    def _completion_request(
+        self, 
+        query: str, 
+        context: str, 
+        conversation_history: Optional[List[Dict[str, str]]] = None
+    ) -> Dict[str, Any]:
+        """Arguments of the chat completion call"""
         messages = [{"role": "system", "content": self.system_prompt}]
         
         # Add conversation history if available
         if conversation_history:
-            messages.extend(conversation_history[-5:])  # Last 5 messages for context
+            messages.extend(recent_history(conversation_history, 5))  # Last 5 messages (or summary + 4) for context
         
         # Add current query with context
         user_message = f"""Based on the following knowledge base information, please answer the user's question.
@@ -151,18 +188,11 @@ Please provide a helpful, accurate response. If the information isn't in the kno
         
         messages.append({"role": "user", "content": user_message})
         
-        # Generate response
-        response = self.openai_client.chat.completions.create(
-            model=settings.openai_model,
-            messages=messages,
-            temperature=settings.temperature,
-            max_tokens=settings.max_tokens
-        )
-        
         return {
-            "response": response.choices[0].message.content,
             "model": settings.openai_model,
-            "tokens_used": response.usage.total_tokens
+            "messages": messages,
+            "temperature": settings.temperature,
+            "max_tokens": settings.max_tokens
         }
     
     def should_escalate(self, query: str, retrieved_results: List[Dict[str, Any]]) -> bool:
@@ -179,12 +209,7 @@ Please provide a helpful, accurate response. If the information isn't in the kno
                 return True
         
         # Check for escalation keywords - only truly urgent ones
-        escalation_keywords = [
-            "billing", "payment", "cancel subscription", "refund", 
-            "complaint", "speak to manager", "legal"
-        ]
-        
-        if any(keyword in query.lower() for keyword in escalation_keywords):
+        if query_router.route(query).has("escalation", "urgent"):
             return True
         
         return False
@@ -194,19 +219,29 @@ Please provide a helpful, accurate response. If the information isn't in the kno
         query: str, 
         conversation_history: Optional[List[Dict[str, str]]] = None
     ) -> Dict[str, Any]:
-        """Main method to process a user query"""
+        """Main method to process a user query (identical first turns arriving together share one answer)"""
+        if conversation_history or not getattr(settings, "single_flight_enabled", True):
+            return self._process_query(query, conversation_history)
         
+        try:
+            kb_version = self.vector_store.get_kb_version()
+        except Exception:
+            return self._process_query(query, conversation_history)
+        
+        key = ("rag", normalize_query(query), kb_version)
+        return single_flight.run(key, lambda: self._process_query(query))
+    
+    def _process_query(
+        self, 
+        query: str, 
+        conversation_history: Optional[List[Dict[str, str]]] = None
+    ) -> Dict[str, Any]:
         # Retrieve relevant context
         retrieved_results = self.retrieve_context(query)
         
         # Check if should escalate
         if self.should_escalate(query, retrieved_results):
-            return {
-                "response": "I'd like to connect you with one of our support specialists who can better assist you with this request. Please hold while I transfer you.",
-                "escalate": True,
-                "confidence": "low",
-                "sources": []
-            }
+            return self._escalation_result()
         
         # Build context
         context = self.build_context_string(retrieved_results)
@@ -214,6 +249,46 @@ Please provide a helpful, accurate response. If the information isn't in the kno
         # Generate response
         result = self.generate_response(query, context, conversation_history)
         
+        return self._query_result(result, retrieved_results)
+    
+    async def stream_query(
+        self, 
+        query: str, 
+        conversation_history: Optional[List[Dict[str, str]]] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """process_query as events: ("token", text) per completion delta, then ("done", result)"""
+        retrieved_results = await asyncio.to_thread(self.retrieve_context, query)
+        
+        if self.should_escalate(query, retrieved_results):
+            result = self._escalation_result()
+            yield "token", result["response"]
+            yield "done", result
+            return
+        
+        context = self.build_context_string(retrieved_results)
+        request = self._completion_request(query, context, conversation_history)
+        parts = []
+        async for text in stream_chat_completion(self.async_openai_client, **request):
+            parts.append(text)
+            yield "token", text
+        
+        response_text = "".join(parts)
+        result = {
+            "response": response_text,
+            "model": settings.openai_model,
+            "tokens_used": streamed_tokens(request["messages"], response_text, settings.openai_model)
+        }
+        yield "done", self._query_result(result, retrieved_results)
+    
+    def _escalation_result(self) -> Dict[str, Any]:
+        return {
+            "response": "I'd like to connect you with one of our support specialists who can better assist you with this request. Please hold while I transfer you.",
+            "escalate": True,
+            "confidence": "low",
+            "sources": []
+        }
+    
+    def _query_result(self, result: Dict[str, Any], retrieved_results: List[Dict[str, Any]]) -> Dict[str, Any]:
         return {
             "response": result["response"],
             "escalate": False,
@@ -0,0 +1,29 @@
+"""
+Reciprocal Rank Fusion
+Merges several ranked lists (e.g. vector and BM25 hits) using only ranks, so
+scores on different scales never have to be calibrated against each other.
+
+    score(d) = sum_r  weight_r / (k + rank_r(d))      (rank starts at 1)
+"""
+
+from typing import List, Optional, Tuple
+
+
+def reciprocal_rank_fusion(
+    rankings: List[List[str]],
+    weights: Optional[List[float]] = None,
+    k: int = 60
+) -> List[Tuple[str, float]]:
+    """(id, fused score) pairs, best first; ties keep first-seen order"""
+    weights = weights or [1.0] * len(rankings)
+    if len(weights) != len(rankings):
+        raise ValueError("weights must have one entry per ranking")
+
+    scores = {}
+    first_seen = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, item_id in enumerate(ranking, 1):
+            scores[item_id] = scores.get(item_id, 0.0) + weight / (k + rank)
+            first_seen.setdefault(item_id, len(first_seen))
+
+    return sorted(scores.items(), key=lambda item: (-item[1], first_seen[item[0]]))
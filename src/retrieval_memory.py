@@ -0,0 +1,132 @@
+"""
+Session Retrieval Memory
+Keeps the chunk ids and scores retrieved for each session's current topic so
+follow-up turns ("Done", "Selected", "yes", "still not working") reuse that
+context instead of paying for a new embedding + vector search.
+
+A message is a follow-up when it is short and brings nothing new: no error
+code, product or support category that the topic question did not already
+mention. Anything else starts a new topic and retrieves fresh.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports (Render compatibility)
+current_dir = Path(__file__).parent
+parent_dir = current_dir.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+# Import with fallback
+try:
+    from config import settings
+except ImportError:
+    from src.config import settings
+
+try:
+    from query_router import query_router
+except ImportError:
+    from src.query_router import query_router
+
+try:
+    from identifier_index import extract_codes, extract_products
+except ImportError:
+    from src.identifier_index import extract_codes, extract_products
+
+try:
+    from bm25_index import tokenize
+except ImportError:
+    from src.bm25_index import tokenize
+
+
+def query_entities(query: str) -> set:
+    """Error codes, product names and support categories a message mentions"""
+    entities = {f"code:{code}" for code in extract_codes(query)}
+    entities.update(f"product:{product}" for product in extract_products(query))
+    entities.update(f"category:{category}" for category in query_router.route(query).labels("category"))
+    return entities
+
+
+def is_follow_up(query: str, topic_query: str, max_words: int = 6) -> bool:
+    """Short message that adds no entity beyond those of the topic question"""
+    if len(query.split()) > max_words or len(tokenize(query)) > max_words:
+        return False
+    return query_entities(query) <= query_entities(topic_query)
+
+
+class RetrievalMemory:
+    """session id -> topic query, category and retrieved (chunk id, score) pairs; LRU + TTL"""
+
+    def __init__(self, max_sessions: int = 1000, ttl_seconds: float = 1800, max_words: int = 6):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_words = max_words
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.reused = 0
+        self.fresh = 0
+
+    def follow_up(self, session_id: str, query: str) -> Optional[Dict[str, Any]]:
+        """The session's topic if query continues it, else None"""
+        with self._lock:
+            topic = self._sessions.get(session_id)
+            if topic and time.monotonic() - topic["stored_at"] > self.ttl_seconds:
+                del self._sessions[session_id]
+                topic = None
+        if topic and topic["results"] and is_follow_up(query, topic["query"], self.max_words):
+            with self._lock:
+                self.reused += 1
+            return topic
+        with self._lock:
+            self.fresh += 1
+        return None
+
+    def remember(self, session_id: str, query: str, category: str, results: List[Dict[str, Any]]):
+        """Start a new topic for the session"""
+        if self.max_sessions <= 0:
+            return
+        with self._lock:
+            self._sessions[session_id] = {
+                "query": query,
+                "category": category,
+                "results": [(r["id"], r.get("combined_score", 0)) for r in results],
+                "stored_at": time.monotonic()
+            }
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def touch(self, session_id: str):
+        """Keep a topic alive while follow-ups continue it"""
+        with self._lock:
+            if session_id in self._sessions:
+                self._sessions[session_id]["stored_at"] = time.monotonic()
+                self._sessions.move_to_end(session_id)
+
+    def forget(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.reused + self.fresh
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "reused": self.reused,
+                "fresh": self.fresh,
+                "reuse_rate": round(self.reused / total, 3) if total else 0.0
+            }
+
+
+# Shared by every ExpertRAGEngine in the process
+retrieval_memory = RetrievalMemory(
+    max_sessions=settings.retrieval_memory_sessions,
+    ttl_seconds=settings.retrieval_memory_ttl_seconds,
+    max_words=settings.follow_up_max_words
+)
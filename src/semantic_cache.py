@@ -0,0 +1,169 @@
+"""
+Semantic Response Cache
+Query embedding -> final answer, for first-turn questions. A new question
+reuses a cached answer when its nearest cached question (same category,
+same answer variant, same KB version) is within a cosine distance threshold.
+
+Entries live in one preallocated matrix of unit vectors, so a lookup is a
+single matrix-vector product. The cache is size-bounded (LRU), entries expire
+after a TTL, and everything is dropped when the KB version changes.
+"""
+
+import time
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports (Render compatibility)
+current_dir = Path(__file__).parent
+parent_dir = current_dir.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+# Import with fallback
+try:
+    from config import settings
+except ImportError:
+    from src.config import settings
+
+
+class SemanticResponseCache:
+    """Nearest-neighbour answer cache with LRU eviction and KB-version invalidation"""
+
+    def __init__(self, max_size: int = 500, max_distance: float = 0.08, ttl_seconds: float = 86400):
+        self.max_size = max_size
+        self.max_distance = max_distance
+        self.ttl_seconds = ttl_seconds
+        self.kb_version: Optional[str] = None
+        self._matrix: Optional[np.ndarray] = None
+        # slot -> entry, least recently used first
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._free: List[int] = []
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self._hit_distance_total = 0.0
+
+    @staticmethod
+    def _unit(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _check_version(self, kb_version: str):
+        """Drop every entry if the KB was rebuilt since they were stored (caller holds the lock)"""
+        if kb_version != self.kb_version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._free = list(range(self.max_size - 1, -1, -1)) if self._matrix is not None else []
+            self.kb_version = kb_version
+
+    def lookup(
+        self,
+        embedding: List[float],
+        scope: Tuple,
+        kb_version: str
+    ) -> Optional[Tuple[Dict[str, Any], float, str]]:
+        """(cached response, cosine distance, cached query) of the nearest entry within the threshold"""
+        vector = self._unit(embedding)
+        with self._lock:
+            self._check_version(kb_version)
+
+            now = time.monotonic()
+            for slot in [s for s, e in self._entries.items() if now - e["stored_at"] > self.ttl_seconds]:
+                del self._entries[slot]
+                self._free.append(slot)
+                self.expirations += 1
+
+            slots = [slot for slot, entry in self._entries.items() if entry["scope"] == scope]
+            if not slots or self._matrix.shape[1] != len(vector):
+                self.misses += 1
+                return None
+
+            similarities = self._matrix[slots] @ vector
+            best = int(np.argmax(similarities))
+            distance = float(1.0 - similarities[best])
+            if distance > self.max_distance:
+                self.misses += 1
+                return None
+
+            slot = slots[best]
+            self._entries.move_to_end(slot)
+            self.hits += 1
+            self._hit_distance_total += distance
+            entry = self._entries[slot]
+            return entry["response"], distance, entry["query"]
+
+    def store(
+        self,
+        embedding: List[float],
+        scope: Tuple,
+        kb_version: str,
+        query: str,
+        response: Dict[str, Any]
+    ):
+        if self.max_size <= 0:
+            return
+        vector = self._unit(embedding)
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != len(vector):
+                # First entry (or the embedding model changed): size the matrix to it
+                self._matrix = np.zeros((self.max_size, len(vector)), dtype=np.float32)
+                self._entries.clear()
+                self._free = list(range(self.max_size - 1, -1, -1))
+            self._check_version(kb_version)
+
+            if not self._free:
+                slot, _ = self._entries.popitem(last=False)
+                self._free.append(slot)
+                self.evictions += 1
+
+            slot = self._free.pop()
+            self._matrix[slot] = vector
+            self._entries[slot] = {
+                "scope": scope,
+                "query": query,
+                "response": response,
+                "stored_at": time.monotonic()
+            }
+            self.stores += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._free = list(range(self.max_size - 1, -1, -1)) if self._matrix is not None else []
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "max_distance": self.max_distance,
+                "ttl_seconds": self.ttl_seconds,
+                "kb_version": self.kb_version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "avg_hit_distance": round(self._hit_distance_total / self.hits, 4) if self.hits else None,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations
+            }
+
+
+# Shared by every ExpertRAGEngine in the process
+semantic_response_cache = SemanticResponseCache(
+    max_size=settings.semantic_cache_size,
+    max_distance=settings.semantic_cache_max_distance,
+    ttl_seconds=settings.semantic_cache_ttl_seconds
+)
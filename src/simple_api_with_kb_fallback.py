@@ -8,7 +8,7 @@ from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
-from openai import OpenAI
+from openai import AsyncOpenAI
 import uvicorn
 
 app = FastAPI(
@@ -27,7 +27,7 @@ app.add_middleware(
 )
 
 # Initialize OpenAI
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 # Session storage
 sessions: Dict[str, list] = {}
@@ -53,6 +53,8 @@ except Exception as e:
     print("✅ Falling back to simple prompt")
     USE_RAG = False
 
+from src.history_manager import history_manager
+
 class ChatRequest(BaseModel):
     message: str
     conversation_id: str = "default"
@@ -97,7 +99,7 @@ CRITICAL KNOWLEDGE BASE:
 **DISK STORAGE:**
 - Check space: Right-click C: drive → Properties
 - Quick cleanup: Delete temp files (%temp%), run Disk Cleanup utility
-- Upgrade tiers: 40GB ($10/mo), 80GB ($20/mo), 120GB ($30/mo), 200GB ($50/mo)
+- Upgrade tiers: 40GB ($28/mo), 60GB ($40/mo), 80GB ($50/mo), 100GB ($60/mo), 200GB ($120/mo)
 - Contact: support@acecloudhosting.com or call 1-888-415-5240
 - Ticket ETA: 2-4 hours for upgrade
 
@@ -198,14 +200,15 @@ async def chat(request: ChatRequest):
         if request.conversation_id not in sessions:
             sessions[request.conversation_id] = []
         
-        conversation_history = sessions[request.conversation_id][-10:]
+        conversation_history = history_manager.compact(request.conversation_id, sessions[request.conversation_id])
         
         # Try RAG first, fallback to simple
         if USE_RAG and rag_engine:
             try:
-                result = rag_engine.process_query_expert(
+                result = await rag_engine.process_query_expert_async(
                     request.message,
-                    conversation_history=conversation_history
+                    conversation_history=conversation_history,
+                    session_id=request.conversation_id
                 )
                 ai_response = result["response"]
             except Exception as e:
@@ -215,7 +218,7 @@ async def chat(request: ChatRequest):
                 messages.extend(conversation_history)
                 messages.append({"role": "user", "content": request.message})
                 
-                response = client.chat.completions.create(
+                response = await client.chat.completions.create(
                     model="gpt-4o-mini",
                     messages=messages,
                     temperature=0.3,
@@ -228,7 +231,7 @@ async def chat(request: ChatRequest):
             messages.extend(conversation_history)
             messages.append({"role": "user", "content": request.message})
             
-            response = client.chat.completions.create(
+            response = await client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=messages,
                 temperature=0.3,
@@ -281,14 +284,15 @@ async def salesiq_webhook(request: Request):
         if session_key not in sessions:
             sessions[session_key] = []
         
-        conversation_history = sessions[session_key][-10:]
+        conversation_history = history_manager.compact(session_key, sessions[session_key])
         
         # Try RAG first, fallback to simple
         if USE_RAG and rag_engine:
             try:
-                result = rag_engine.process_query_expert(
+                result = await rag_engine.process_query_expert_async(
                     message,
-                    conversation_history=conversation_history
+                    conversation_history=conversation_history,
+                    session_id=session_key
                 )
                 ai_response = result["response"]
                 print(f"[SalesIQ] Using RAG engine")
@@ -299,7 +303,7 @@ async def salesiq_webhook(request: Request):
                 messages.extend(conversation_history)
                 messages.append({"role": "user", "content": message})
                 
-                response = client.chat.completions.create(
+                response = await client.chat.completions.create(
                     model="gpt-4o-mini",
                     messages=messages,
                     temperature=0.3,
@@ -314,7 +318,7 @@ async def salesiq_webhook(request: Request):
             
             print(f"[SalesIQ] Using simple prompt")
             
-            response = client.chat.completions.create(
+            response = await client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=messages,
                 temperature=0.3,
@@ -348,10 +352,19 @@ async def salesiq_webhook(request: Request):
 @app.get("/stats")
 async def get_stats():
     """Get stats"""
+    from src.query_cache import query_embedding_cache
+    from src.semantic_cache import semantic_response_cache
+    from src.retrieval_memory import retrieval_memory
+    from src.single_flight import single_flight
     return {
         "active_sessions": len(sessions),
         "total_messages": sum(len(msgs) for msgs in sessions.values()),
         "using_rag": USE_RAG,
+        "query_embedding_cache": query_embedding_cache.get_stats(),
+        "semantic_response_cache": semantic_response_cache.get_stats(),
+        "retrieval_memory": retrieval_memory.get_stats(),
+        "single_flight": single_flight.get_stats(),
+        "history": history_manager.get_stats(),
         "timestamp": datetime.now().isoformat()
     }
 
@@ -8,10 +8,21 @@ from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
-from openai import OpenAI
+from openai import AsyncOpenAI
 import uvicorn
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
 
+# Add parent directory to path
+current_dir = Path(__file__).parent
+parent_dir = current_dir.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from src.faq_tier import faq_tier
+from src.history_manager import history_manager
+
 # Load environment variables
 load_dotenv()
 
@@ -31,7 +42,7 @@ app.add_middleware(
 )
 
 # Initialize OpenAI
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 # Session storage
 sessions: Dict[str, list] = {}
@@ -611,7 +622,7 @@ Call support immediately: 1-888-415-5240
 They'll unlock within 5-10 minutes
 
 **DISK UPGRADE:**
-Tiers: 40GB ($10/mo), 80GB ($20/mo), 120GB ($30/mo), 200GB ($50/mo)
+Tiers: 40GB ($28/mo), 60GB ($40/mo), 80GB ($50/mo), 100GB ($60/mo), 200GB ($120/mo)
 Call 1-888-415-5240 to upgrade (takes 2-4 hours)
 
 **SUPPORT CONTACTS:**
@@ -697,7 +708,7 @@ async def chat(request: ChatRequest):
         if request.conversation_id not in sessions:
             sessions[request.conversation_id] = []
         
-        conversation_history = sessions[request.conversation_id][-10:]
+        conversation_history = history_manager.compact(request.conversation_id, sessions[request.conversation_id])
         
         # Build messages
         messages = [{"role": "system", "content": EXPERT_PROMPT}]
@@ -705,7 +716,7 @@ async def chat(request: ChatRequest):
         messages.append({"role": "user", "content": request.message})
         
         # Get response (VERY short - one step only)
-        response = client.chat.completions.create(
+        response = await client.chat.completions.create(
             model="gpt-4o-mini",
             messages=messages,
             temperature=0.3,
@@ -772,7 +783,20 @@ async def salesiq_webhook(request: Request):
         if session_key not in sessions:
             sessions[session_key] = []
         
-        conversation_history = sessions[session_key][-10:]
+        conversation_history = history_manager.compact(session_key, sessions[session_key])
+        
+        # Common opening questions have precomputed answers - no LLM call.
+        # Later turns depend on the conversation, so they always go to the model.
+        faq = faq_tier.match(message) if faq_tier and not sessions[session_key] else None
+        if faq:
+            sessions[session_key].append({"role": "user", "content": message})
+            sessions[session_key].append({"role": "assistant", "content": faq["answer"]})
+            print(f"[SalesIQ] FAQ answer: {faq['intent']} ({faq['confidence']})")
+            return {
+                "action": "reply",
+                "replies": [faq["answer"]],
+                "session_id": session_id
+            }
         
         # Build messages
         messages = [{"role": "system", "content": EXPERT_PROMPT}]
@@ -782,7 +806,7 @@ async def salesiq_webhook(request: Request):
         print(f"[SalesIQ] Calling OpenAI...")
         
         # Get response (VERY short - one step only for SalesIQ)
-        response = client.chat.completions.create(
+        response = await client.chat.completions.create(
             model="gpt-4o-mini",
             messages=messages,
             temperature=0.3,
@@ -820,6 +844,7 @@ async def get_stats():
     return {
         "active_sessions": len(sessions),
         "total_messages": sum(len(msgs) for msgs in sessions.values()),
+        "faq_tier": faq_tier.get_stats() if faq_tier else None,
         "timestamp": datetime.now().isoformat()
     }
 
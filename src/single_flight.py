@@ -0,0 +1,115 @@
+"""
+Single-Flight Request Coalescing
+During incidents (RDP outage, QuickBooks update) many visitors send the
+same first message within seconds. Identical requests that arrive while one
+is already being answered wait for that computation and share its result,
+so a spike of N identical questions costs one embedding, one search and one
+completion.
+
+Keys are built from the normalized query plus everything the answer depends
+on (engine, category, answer variant, KB version); callers only coalesce
+first turns with no conversation history. Nothing is kept once a request
+finishes - repeated questions after that are the semantic cache's job.
+"""
+
+import re
+import asyncio
+import threading
+from typing import Dict, Any, Callable, Awaitable, Hashable, Optional
+
+
+def normalize_query(query: str) -> str:
+    """Case, punctuation and spacing do not change the question"""
+    return " ".join(re.findall(r"\w+", query.lower()))
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """At most one in-flight computation per key; concurrent callers share its result
+
+    run() is for threads (sync handlers), run_async() for coroutines on the
+    event loop. Followers get a shallow copy of the leader's result dict.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._async_calls: Dict[Hashable, asyncio.Future] = {}
+        self.leaders = 0
+        self.shared = 0
+
+    def run(self, key: Hashable, fn: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return dict(call.result)
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def run_async(self, key: Hashable, fn: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        # Only touched from the event loop thread - no lock needed
+        future = self._async_calls.get(key)
+        if future is not None:
+            self.shared += 1
+            try:
+                return dict(await asyncio.shield(future))
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise  # this caller was cancelled
+                # The leader's client went away - answer this one ourselves
+                return await fn()
+
+        future = self._async_calls[key] = asyncio.get_running_loop().create_future()
+        self.leaders += 1
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved - there may be no followers
+            raise
+        finally:
+            del self._async_calls[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.leaders + self.shared
+            return {
+                "in_flight": len(self._calls) + len(self._async_calls),
+                "computed": self.leaders,
+                "shared": self.shared,
+                "shared_rate": round(self.shared / total, 3) if total else 0.0
+            }
+
+
+# Shared by every engine in the process
+single_flight = SingleFlight()
@@ -0,0 +1,159 @@
+"""
+Server-Sent Events Chat Streaming
+Helpers for the streaming /chat endpoints:
+
+- stream_chat_completion() forwards the text deltas of an OpenAI
+  stream=True completion as they arrive.
+- sse_chat_stream() turns ("token", text) / ("done", metadata) events into
+  SSE frames: one "token" event per delta, then a closing "done" event
+  with sources, confidence and category (or an "error" event).
+- Time to first token, measured from when the request reaches the stream,
+  is recorded in time_to_first_token and reported by /stats.
+- bounded_chat_completion() stops a streamed completion once it passes a
+  character budget and ends the answer at the last sentence boundary
+  inside it (SalesIQ replies are capped at 1800 characters).
+"""
+
+import re
+import json
+import time
+import threading
+from collections import deque
+from contextlib import aclosing
+from typing import Dict, Any, List, AsyncIterator, Callable, Tuple
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports (Render compatibility)
+current_dir = Path(__file__).parent
+parent_dir = current_dir.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+try:
+    from token_counter import count_tokens
+except ImportError:
+    from src.token_counter import count_tokens
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no"  # keep proxies (nginx, Render) from buffering the stream
+}
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """One SSE frame with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+# End of a sentence: terminal punctuation (optionally closing a quote/bracket) before
+# whitespace, or a line break; "1." list markers do not end a sentence
+SENTENCE_END = re.compile(r"(?<!\b\d)[.!?][\"')\]]*(?=\s)|\n")
+
+
+async def stream_chat_completion(client, **request) -> AsyncIterator[str]:
+    """Text deltas of a streamed chat completion (client is an AsyncOpenAI)"""
+    stream = await client.chat.completions.create(stream=True, **request)
+    try:
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    finally:
+        # Consumers that stop early close the HTTP response - OpenAI stops generating
+        response = getattr(stream, "response", None)
+        if response is not None:
+            await response.aclose()
+
+
+def trim_to_sentence(text: str, max_chars: int) -> str:
+    """text if it fits, else its longest prefix within max_chars that ends a sentence (or a word)"""
+    if len(text) <= max_chars:
+        return text
+    # One extra char so a sentence ending exactly at the budget is still seen
+    head = text[:max_chars + 1]
+    ends = [match.end() for match in SENTENCE_END.finditer(head) if match.end() <= max_chars]
+    if ends:
+        return head[:ends[-1]].rstrip()
+    return head[:max_chars].rsplit(None, 1)[0].rstrip()
+
+
+async def bounded_chat_completion(client, max_chars: int, **request) -> Dict[str, Any]:
+    """Streamed completion cut at a character budget: {"text", "truncated"}
+
+    Generation stops as soon as the text passes max_chars, so an overlong
+    answer costs no more than the budget and never needs a second call.
+    """
+    parts, length = [], 0
+    # aclosing: breaking out must close the stream now, not whenever the generator is collected
+    async with aclosing(stream_chat_completion(client, **request)) as deltas:
+        async for text in deltas:
+            parts.append(text)
+            length += len(text)
+            if length > max_chars:
+                break
+    text = "".join(parts).strip()
+    truncated = len(text) > max_chars
+    return {"text": trim_to_sentence(text, max_chars), "truncated": truncated}
+
+
+def streamed_tokens(messages: List[Dict[str, str]], response_text: str, model: str) -> int:
+    """Total tokens of a streamed completion - streams carry no usage block (openai 1.10), so count locally"""
+    return sum(count_tokens(m["content"], model) for m in messages) + count_tokens(response_text, model)
+
+
+class LatencyRecorder:
+    """Rolling window of latencies with mean / p50 / p95"""
+
+    def __init__(self, window: int = 1000):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return {"count": self.count, "mean_ms": None, "p50_ms": None, "p95_ms": None}
+        return {
+            "count": self.count,
+            "mean_ms": round(1000 * sum(samples) / len(samples), 1),
+            "p50_ms": round(1000 * samples[len(samples) // 2], 1),
+            "p95_ms": round(1000 * samples[min(len(samples) - 1, int(len(samples) * 0.95))], 1)
+        }
+
+
+# Shared by the streaming endpoints of every app in the process
+time_to_first_token = LatencyRecorder()
+
+
+async def sse_chat_stream(
+    events: AsyncIterator[Tuple[str, Any]],
+    on_done: Callable[[Dict[str, Any]], Dict[str, Any]]
+) -> AsyncIterator[str]:
+    """SSE frames for a chat answer
+
+    on_done(result) receives the final result (it can update the session
+    history) and returns the metadata sent in the closing "done" event.
+    """
+    start = time.perf_counter()
+    first_token_seconds = None
+    try:
+        async for kind, payload in events:
+            if kind == "token":
+                if first_token_seconds is None:
+                    first_token_seconds = time.perf_counter() - start
+                    time_to_first_token.record(first_token_seconds)
+                yield sse_event("token", {"text": payload})
+            elif kind == "done":
+                metadata = on_done(payload)
+                if first_token_seconds is not None:
+                    metadata["time_to_first_token_ms"] = round(1000 * first_token_seconds, 1)
+                yield sse_event("done", metadata)
+    except Exception as e:
+        print(f"[Stream Error] {str(e)}")
+        yield sse_event("error", {"detail": str(e)})
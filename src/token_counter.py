@@ -0,0 +1,92 @@
+"""
+Token Counting
+Counts and splits text in model tokens. Uses tiktoken when it is installed
+(exact for the OpenAI models we use); otherwise falls back to a conservative
+character-based estimate so callers never under-count.
+
+tiktoken downloads its encoding files on first use. They are kept in
+data/tiktoken_cache (or TIKTOKEN_CACHE_DIR); the build step fills it with
+`python src/token_counter.py` so servers never need network access for it.
+Falling back to the estimate is logged loudly.
+
+Usage:
+    python src/token_counter.py   # download the encodings into the cache
+"""
+
+import os
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import List
+
+# Must be set before tiktoken loads an encoding
+os.environ.setdefault("TIKTOKEN_CACHE_DIR", str(Path(__file__).parent.parent / "data" / "tiktoken_cache"))
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Fallback ratio - deliberately low so estimates err on the high side
+CHARS_PER_TOKEN = 3
+
+# Encodings of the chat (gpt-4o*) and embedding (text-embedding-3-*) models
+ENCODINGS = ["o200k_base", "cl100k_base"]
+
+
+@lru_cache(maxsize=8)
+def _get_encoding(model: str):
+    if tiktoken is None:
+        print(f"⚠️ tiktoken is not installed - token counts for {model} are estimates "
+              f"({CHARS_PER_TOKEN} chars/token). Install requirements.txt.")
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            # Model tiktoken does not know - fall back to the encoding of the current OpenAI models
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # Encoding files could not be loaded (e.g. offline) - use the estimate
+        print(f"⚠️ tiktoken encoding for {model} unavailable ({type(e).__name__}) - token counts are estimates "
+              f"({CHARS_PER_TOKEN} chars/token). Run `python src/token_counter.py` at build time "
+              f"to cache it in {os.environ['TIKTOKEN_CACHE_DIR']}.")
+        return None
+
+
+def count_tokens(text: str, model: str = "text-embedding-3-small") -> int:
+    """Number of tokens in text for the given model"""
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def split_by_tokens(text: str, max_tokens: int, model: str = "text-embedding-3-small") -> List[str]:
+    """Split text into consecutive pieces of at most max_tokens tokens
+
+    Deterministic: the same text always yields the same pieces, so their
+    embeddings are reproducible and cacheable.
+    """
+    encoding = _get_encoding(model)
+    if encoding is None:
+        size = max_tokens * CHARS_PER_TOKEN
+        return [text[i:i + size] for i in range(0, len(text), size)] or [text]
+
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return [text]
+    return [encoding.decode(tokens[i:i + max_tokens]) for i in range(0, len(tokens), max_tokens)]
+
+
+if __name__ == "__main__":
+    if tiktoken is None:
+        print("❌ tiktoken is not installed")
+        sys.exit(1)
+    for name in ENCODINGS:
+        try:
+            tiktoken.get_encoding(name)
+            print(f"✅ {name} cached in {os.environ['TIKTOKEN_CACHE_DIR']}")
+        except Exception as e:
+            print(f"❌ Could not load {name}: {e}")
+            sys.exit(1)
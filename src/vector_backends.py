@@ -0,0 +1,421 @@
+"""
+Vector Store Backends
+- ChromaBackend: persistent ChromaDB (SQLite + HNSW)
+- NumpyBackend: in-process exact search over a float32 matrix
+- BundleBackend: read-only NumpyBackend over a memory-mapped index bundle
+
+Each backend hands VectorStore a collection object exposing the same subset of the
+ChromaDB collection API (add, upsert, delete, get, query, count), so the
+rest of the code does not care which one is active.
+"""
+
+import json
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+try:
+    from index_bundle import IndexBundle
+except ImportError:
+    from src.index_bundle import IndexBundle
+
+try:
+    from quantization import QuantizedMatrix, QUANTIZATION_MODES
+except ImportError:
+    from src.quantization import QuantizedMatrix, QUANTIZATION_MODES
+
+
+def matches_where(metadata: Dict[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate a ChromaDB-style `where` filter against one metadata dict"""
+    if not where:
+        return True
+
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_where(metadata, sub) for sub in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for op, operand in condition.items():
+                if op == "$eq" and value != operand:
+                    return False
+                if op == "$ne" and value == operand:
+                    return False
+                if op == "$in" and value not in operand:
+                    return False
+                if op == "$nin" and value in operand:
+                    return False
+                if op in ("$gt", "$gte", "$lt", "$lte"):
+                    if value is None:
+                        return False
+                    if op == "$gt" and not value > operand:
+                        return False
+                    if op == "$gte" and not value >= operand:
+                        return False
+                    if op == "$lt" and not value < operand:
+                        return False
+                    if op == "$lte" and not value <= operand:
+                        return False
+        elif metadata.get(key) != condition:
+            return False
+
+    return True
+
+
+class NumpyCollection:
+    """Exact cosine search with one matmul and argpartition top-k
+
+    With quantization="float16" or "int8" only a compact copy of the matrix is
+    held in memory; it produces a first-pass top-(k * rerank_factor) which is
+    then re-scored exactly against the full-precision matrix, memory-mapped
+    from disk.
+
+    Writes (add, upsert, delete) stay in memory until flush() saves the
+    collection; VectorStore flushes once per add_documents call.
+    """
+
+    def __init__(self, name: str, persist_directory: Path, metadata: Optional[Dict[str, Any]] = None,
+                 quantization: str = "none", rerank_factor: int = 4):
+        if quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization mode: {quantization} (expected one of {QUANTIZATION_MODES})")
+        self.name = name
+        self.metadata = metadata or {}
+        self.directory = Path(persist_directory) / name
+        self.ids: List[str] = []
+        self.documents: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self.embeddings = np.zeros((0, 0), dtype=np.float32)
+        self._index: Dict[str, int] = {}
+        self.read_only = False
+        self.quantization = quantization
+        self.rerank_factor = max(1, rerank_factor)
+        self._quantized: Optional[QuantizedMatrix] = None
+        self._dirty = False
+        self._load()
+
+    @classmethod
+    def from_bundle(cls, bundle: IndexBundle, quantization: str = "none",
+                    rerank_factor: int = 4) -> "NumpyCollection":
+        """Read-only collection whose matrix and texts stay memory-mapped on disk"""
+        collection = cls.__new__(cls)
+        collection.name = bundle.manifest.get("collection_name", "acebuddy_kb")
+        collection.metadata = {
+            "hnsw:space": "cosine",
+            "kb_version": bundle.kb_version,
+            "embedding_model": bundle.manifest.get("embedding_model"),
+            "embedding_dimensions": bundle.manifest.get("embedding_dimensions", 0)
+        }
+        collection.directory = bundle.directory
+        collection.ids = bundle.ids
+        collection.documents = bundle.documents
+        collection.metadatas = bundle.metadatas
+        collection.embeddings = bundle.embeddings
+        collection._index = {chunk_id: i for i, chunk_id in enumerate(bundle.ids)}
+        collection.read_only = True
+        collection.quantization = quantization
+        collection.rerank_factor = max(1, rerank_factor)
+        collection._quantized = None
+        collection._dirty = False
+        return collection
+
+    # ---------- persistence ----------
+
+    def _load(self):
+        records_file = self.directory / "records.json"
+        if not records_file.exists():
+            return
+
+        with open(records_file, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+
+        self.metadata = records.get("collection_metadata", self.metadata)
+        self.ids = records["ids"]
+        self.documents = records["documents"]
+        self.metadatas = records["metadatas"]
+        # Quantized mode keeps full precision on disk and reads it on re-rank only
+        mmap_mode = 'r' if self.quantization != "none" else None
+        self.embeddings = np.load(self.directory / "embeddings.npy", mmap_mode=mmap_mode)
+        self._index = {chunk_id: i for i, chunk_id in enumerate(self.ids)}
+
+    def flush(self):
+        """Save pending writes to disk (no-op when nothing changed)"""
+        if self._dirty:
+            self._persist()
+            self._dirty = False
+
+    def _persist(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        np.save(self.directory / "embeddings.npy", self.embeddings)
+        with open(self.directory / "records.json", 'w', encoding='utf-8') as f:
+            json.dump({
+                "collection_metadata": self.metadata,
+                "ids": self.ids,
+                "documents": self.documents,
+                "metadatas": self.metadatas
+            }, f, ensure_ascii=False)
+
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    # ---------- writes ----------
+
+    def add(self, ids, embeddings, documents, metadatas):
+        self._check_writable()
+        duplicates = [chunk_id for chunk_id in ids if chunk_id in self._index]
+        if duplicates:
+            raise ValueError(f"IDs already exist in collection {self.name}: {duplicates[:5]}")
+        self.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+    def _check_writable(self):
+        if self.read_only:
+            raise RuntimeError(f"Collection {self.name} is a read-only index bundle; rebuild the bundle instead")
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self._check_writable()
+        vectors = self._normalize(embeddings)
+        if self.embeddings.size == 0:
+            self.embeddings = np.zeros((0, vectors.shape[1]), dtype=np.float32)
+        elif not self.embeddings.flags.writeable:
+            self.embeddings = np.array(self.embeddings, dtype=np.float32)
+        self._quantized = None
+
+        new_rows = []
+        for chunk_id, vector, document, meta in zip(ids, vectors, documents, metadatas):
+            row = self._index.get(chunk_id)
+            if row is None:
+                self._index[chunk_id] = len(self.ids)
+                self.ids.append(chunk_id)
+                self.documents.append(document)
+                self.metadatas.append(meta or {})
+                new_rows.append(vector)
+            else:
+                self.embeddings[row] = vector
+                self.documents[row] = document
+                self.metadatas[row] = meta or {}
+
+        if new_rows:
+            self.embeddings = np.vstack([self.embeddings, np.stack(new_rows)])
+        self._dirty = True
+
+    def delete(self, ids: List[str]):
+        self._check_writable()
+        remove = {self._index[chunk_id] for chunk_id in ids if chunk_id in self._index}
+        if not remove:
+            return
+
+        keep = [i for i in range(len(self.ids)) if i not in remove]
+        self._quantized = None
+        self.ids = [self.ids[i] for i in keep]
+        self.documents = [self.documents[i] for i in keep]
+        self.metadatas = [self.metadatas[i] for i in keep]
+        self.embeddings = self.embeddings[keep]
+        self._index = {chunk_id: i for i, chunk_id in enumerate(self.ids)}
+        self._dirty = True
+
+    # ---------- reads ----------
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None,
+            include: Optional[List[str]] = None) -> Dict[str, Any]:
+        if ids is None:
+            rows = range(len(self.ids))
+        else:
+            rows = [self._index[chunk_id] for chunk_id in ids if chunk_id in self._index]
+        rows = [i for i in rows if matches_where(self.metadatas[i], where)]
+        include = include or ["documents", "metadatas"]
+
+        return {
+            "ids": [self.ids[i] for i in rows],
+            "documents": [self.documents[i] for i in rows] if "documents" in include else None,
+            "metadatas": [self.metadatas[i] for i in rows] if "metadatas" in include else None,
+            "embeddings": [self.embeddings[i].tolist() for i in rows] if "embeddings" in include else None
+        }
+
+    def _candidate_rows(self, where: Optional[Dict]) -> Optional[np.ndarray]:
+        """Row indices passing the filter (None means every row)"""
+        if not where:
+            return None
+        return np.array(
+            [i for i, meta in enumerate(self.metadatas) if matches_where(meta, where)],
+            dtype=np.int64
+        )
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Bytes of vector data resident in memory vs. left on disk"""
+        on_disk = isinstance(self.embeddings, np.memmap)
+        quantized = self._quantized.nbytes if self._quantized is not None else 0
+        return {
+            "full_precision_bytes": int(self.embeddings.nbytes),
+            "full_precision_resident": not on_disk,
+            "quantized_bytes": int(quantized),
+            "resident_bytes": int(quantized + (0 if on_disk else self.embeddings.nbytes))
+        }
+
+    def _top_k(self, scores: np.ndarray, k: int) -> np.ndarray:
+        """Positions of the k highest scores, best first"""
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top], kind="stable")]
+
+    def _search_exact(self, queries: np.ndarray, rows: Optional[np.ndarray], k: int):
+        matrix = self.embeddings if rows is None else self.embeddings[rows]
+        similarities = queries @ np.asarray(matrix, dtype=np.float32).T
+        hits = []
+        for scores in similarities:
+            top = self._top_k(scores, k)
+            hits.append((top if rows is None else rows[top], scores[top]))
+        return hits
+
+    def _search_quantized(self, queries: np.ndarray, rows: Optional[np.ndarray], k: int):
+        if self._quantized is None:
+            self._quantized = QuantizedMatrix(self.embeddings, self.quantization)
+
+        approx = self._quantized.scores(queries, rows)
+        n_candidates = min(k * self.rerank_factor, approx.shape[1])
+        hits = []
+        for query, scores in zip(queries, approx):
+            candidates = self._top_k(scores, n_candidates)
+            candidate_rows = np.sort(candidates if rows is None else rows[candidates])
+            # Exact re-rank: sorted rows keep the mmap reads sequential
+            exact = np.asarray(self.embeddings[candidate_rows], dtype=np.float32) @ query
+            top = self._top_k(exact, k)
+            hits.append((candidate_rows[top], exact[top]))
+        return hits
+
+    def query(self, query_embeddings, n_results: int = 10, where: Optional[Dict] = None,
+              include: Optional[List[str]] = None) -> Dict[str, List[List[Any]]]:
+        queries = self._normalize(query_embeddings)
+        rows = self._candidate_rows(where)
+
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        if len(self.ids) == 0 or (rows is not None and len(rows) == 0):
+            for key in result:
+                result[key] = [[] for _ in range(len(queries))]
+            return result
+
+        k = min(n_results, len(self.ids) if rows is None else len(rows))
+        if self.quantization == "none":
+            hits = self._search_exact(queries, rows, k)
+        else:
+            hits = self._search_quantized(queries, rows, k)
+
+        for hit_rows, scores in hits:
+            result["ids"].append([self.ids[i] for i in hit_rows])
+            result["documents"].append([self.documents[i] for i in hit_rows])
+            result["metadatas"].append([self.metadatas[i] for i in hit_rows])
+            result["distances"].append([float(1.0 - s) for s in scores])
+
+        return result
+
+
+class ChromaBackend:
+    """Persistent ChromaDB backend (default)"""
+
+    def __init__(self, persist_directory: str):
+        import chromadb
+        from chromadb.config import Settings
+
+        self.client = chromadb.PersistentClient(
+            path=persist_directory,
+            settings=Settings(anonymized_telemetry=False)
+        )
+
+    def get_or_create_collection(self, name: str, metadata: Optional[Dict[str, Any]] = None):
+        try:
+            collection = self.client.get_collection(name=name)
+            print(f"[OK] Loaded existing collection: {name}")
+        except:
+            try:
+                collection = self.client.create_collection(
+                    name=name,
+                    metadata={"hnsw:space": "cosine", **(metadata or {})}
+                )
+                print(f"[OK] Created new collection: {name}")
+            except Exception as e:
+                # If collection exists, just get it
+                if "already exists" in str(e).lower():
+                    collection = self.client.get_collection(name=name)
+                    print(f"[OK] Loaded existing collection: {name}")
+                else:
+                    raise
+        return collection
+
+    def delete_collection(self, name: str):
+        self.client.delete_collection(name=name)
+
+
+class NumpyBackend:
+    """In-process exact-search backend persisted as .npy + JSON"""
+
+    def __init__(self, persist_directory: str, quantization: str = "none", rerank_factor: int = 4):
+        self.quantization = quantization
+        self.rerank_factor = rerank_factor
+        self.persist_directory = Path(persist_directory)
+        self.persist_directory.mkdir(parents=True, exist_ok=True)
+        self._collections: Dict[str, NumpyCollection] = {}
+
+    def get_or_create_collection(self, name: str, metadata: Optional[Dict[str, Any]] = None) -> NumpyCollection:
+        if name not in self._collections:
+            existed = (self.persist_directory / name / "records.json").exists()
+            self._collections[name] = NumpyCollection(
+                name, self.persist_directory, metadata={"hnsw:space": "cosine", **(metadata or {})},
+                quantization=self.quantization, rerank_factor=self.rerank_factor
+            )
+            print(f"[OK] {'Loaded existing' if existed else 'Created new'} collection: {name} (numpy)")
+        return self._collections[name]
+
+    def delete_collection(self, name: str):
+        self._collections.pop(name, None)
+        collection_dir = self.persist_directory / name
+        for file in ("embeddings.npy", "records.json"):
+            if (collection_dir / file).exists():
+                (collection_dir / file).unlink()
+
+
+class BundleBackend:
+    """Serves the latest prebuilt index bundle - no rebuild, no embedding calls at boot"""
+
+    def __init__(self, bundle_root: str, quantization: str = "none", rerank_factor: int = 4):
+        self.bundle_root = bundle_root
+        self.quantization = quantization
+        self.rerank_factor = rerank_factor
+        self._collection: Optional[NumpyCollection] = None
+
+    def get_or_create_collection(self, name: str, metadata: Optional[Dict[str, Any]] = None) -> NumpyCollection:
+        if self._collection is None:
+            bundle = IndexBundle.load_latest(self.bundle_root)
+            self._collection = NumpyCollection.from_bundle(
+                bundle, quantization=self.quantization, rerank_factor=self.rerank_factor
+            )
+            print(f"[OK] Loaded index bundle {bundle.directory.name} "
+                  f"({len(bundle.ids)} chunks, memory-mapped)")
+        if name != self._collection.name:
+            print(f"  Note: bundle holds collection {self._collection.name}, requested {name}")
+        return self._collection
+
+    def delete_collection(self, name: str):
+        raise RuntimeError("Index bundles are read-only; write a new bundle instead")
+
+
+def create_backend(backend_name: str, persist_directory: str,
+                   quantization: str = "none", rerank_factor: int = 4):
+    """Instantiate the vector backend selected in settings"""
+    name = (backend_name or "chroma").lower()
+    if name == "chroma":
+        return ChromaBackend(persist_directory)
+    if name == "numpy":
+        return NumpyBackend(persist_directory, quantization, rerank_factor)
+    if name == "bundle":
+        return BundleBackend(persist_directory, quantization, rerank_factor)
+    raise ValueError(f"Unknown vector backend: {backend_name} (expected 'chroma', 'numpy' or 'bundle')")
@@ -1,9 +1,9 @@
 import json
+import hashlib
 from pathlib import Path
 from typing import List, Dict, Any, Optional
-import chromadb
-from chromadb.config import Settings
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
+import numpy as np
 import sys
 
 # Add parent directory to path for imports (Render compatibility)
@@ -18,130 +18,581 @@ try:
 except ImportError:
     from src.config import settings
 
+try:
+    from embedding_cache import EmbeddingCache
+except ImportError:
+    from src.embedding_cache import EmbeddingCache
+
+try:
+    from query_cache import query_embedding_cache
+except ImportError:
+    from src.query_cache import query_embedding_cache
+
+try:
+    from embedding_pipeline import EmbeddingPipeline
+except ImportError:
+    from src.embedding_pipeline import EmbeddingPipeline
+
+try:
+    from vector_backends import create_backend
+except ImportError:
+    from src.vector_backends import create_backend
+
+try:
+    from index_bundle import write_bundle, compute_kb_version
+except ImportError:
+    from src.index_bundle import write_bundle, compute_kb_version
+
+try:
+    from bm25_index import BM25Index
+except ImportError:
+    from src.bm25_index import BM25Index
+
+try:
+    from identifier_index import IdentifierIndex
+except ImportError:
+    from src.identifier_index import IdentifierIndex
+
 class VectorStore:
-    """Manages vector database operations with ChromaDB"""
+    """Manages vector database operations (ChromaDB, in-process NumPy or a prebuilt bundle)"""
     
-    def __init__(self):
-        self.client = chromadb.PersistentClient(
-            path=settings.chroma_persist_directory,
-            settings=Settings(anonymized_telemetry=False)
+    def __init__(self, backend: str = None):
+        self.backend_name = backend or settings.vector_backend
+        self.backend = create_backend(
+            self.backend_name,
+            self.index_directory(self.backend_name),
+            quantization=settings.vector_quantization,
+            rerank_factor=settings.quantization_rerank_factor
         )
         self.openai_client = OpenAI(api_key=settings.openai_api_key)
+        # Query embeddings on the request path are awaited (see embed_queries_async)
+        self.async_openai_client = AsyncOpenAI(api_key=settings.openai_api_key)
         self.collection = None
+        self._kb_version = None
+        self.embedding_cache = (
+            EmbeddingCache(settings.embedding_cache_path)
+            if settings.embedding_cache_enabled else None
+        )
+    
+    @staticmethod
+    def index_directory(backend: str = None) -> str:
+        """Directory holding the index for the given (or configured) backend"""
+        backend = backend or settings.vector_backend
+        if backend == "numpy":
+            return settings.numpy_index_directory
+        if backend == "bundle":
+            return settings.index_bundle_directory
+        return settings.chroma_persist_directory
     
     def create_collection(self, collection_name: str = None):
         """Create or get collection"""
         name = collection_name or settings.collection_name
+        self.collection = self.backend.get_or_create_collection(
+            name,
+            metadata={
+                "embedding_model": settings.openai_embedding_model,
+                "embedding_dimensions": settings.embedding_dimensions or 0
+            }
+        )
+        self._embedding_compat_checked = False
+        self._kb_version = None
+    
+    def check_embedding_compatibility(self):
+        """Refuse to use an index built with a different embedding model or dimension"""
+        if getattr(self, "_embedding_compat_checked", False):
+            return
         
-        try:
-            self.collection = self.client.get_collection(name=name)
-            print(f"[OK] Loaded existing collection: {name}")
-        except:
-            try:
-                self.collection = self.client.create_collection(
-                    name=name,
-                    metadata={"hnsw:space": "cosine"}
-                )
-                print(f"[OK] Created new collection: {name}")
-            except Exception as e:
-                # If collection exists, just get it
-                if "already exists" in str(e).lower():
-                    self.collection = self.client.get_collection(name=name)
-                    print(f"[OK] Loaded existing collection: {name}")
-                else:
-                    raise
-    
-    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings using OpenAI"""
-        embeddings = []
-        batch_size = 100
+        meta = self.collection.metadata or {}
+        built_model = meta.get("embedding_model")
+        # Collections created before dimensions were tracked use the model default (0)
+        built_dims = int(meta.get("embedding_dimensions") or 0)
+        wanted_dims = settings.embedding_dimensions or 0
+        
+        if (built_model and built_model != settings.openai_embedding_model) or built_dims != wanted_dims:
+            raise ValueError(
+                f"Index '{self.collection.name}' was built with {built_model or 'unknown model'} "
+                f"at {built_dims or 'default'} dimensions, but settings request "
+                f"{settings.openai_embedding_model} at {wanted_dims or 'default'} dimensions. "
+                f"Rebuild the index or change OPENAI_EMBEDDING_MODEL / EMBEDDING_DIMENSIONS."
+            )
+        self._embedding_compat_checked = True
+    
+    def get_embeddings(self, texts: List[str], dimensions: Optional[int] = None) -> List[List[float]]:
+        """Generate embeddings using OpenAI, reusing cached vectors for unchanged text
         
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-            response = self.openai_client.embeddings.create(
-                model=settings.openai_embedding_model,
-                input=batch
+        dimensions overrides settings.embedding_dimensions (text-embedding-3-* only).
+        """
+        embeddings, n_embedded = self._get_embeddings_cached(texts, dimensions)
+        
+        if self.embedding_cache and len(texts) > 1:
+            print(f"  Embedding cache: {len(texts) - n_embedded} reused, {n_embedded} embedded")
+        
+        return embeddings
+    
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed search queries - repeats come from the shared LRU, the rest in one provider call"""
+        dims = settings.embedding_dimensions
+        model = settings.openai_embedding_model + (f"@{dims}" if dims else "")
+        
+        embeddings: List[Optional[List[float]]] = [
+            query_embedding_cache.get(model, query) for query in queries
+        ]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        
+        if missing:
+            new_embeddings, _ = self._get_embeddings_cached([queries[i] for i in missing])
+            for i, embedding in zip(missing, new_embeddings):
+                embeddings[i] = embedding
+                query_embedding_cache.put(model, queries[i], embedding)
+        
+        return embeddings
+    
+    async def embed_queries_async(self, queries: List[str]) -> List[List[float]]:
+        """embed_queries without blocking the event loop: cache lookups are local, the provider call is awaited"""
+        dims = settings.embedding_dimensions
+        model = settings.openai_embedding_model + (f"@{dims}" if dims else "")
+        
+        embeddings: List[Optional[List[float]]] = [
+            query_embedding_cache.get(model, query) for query in queries
+        ]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if not missing:
+            return embeddings
+        
+        texts = [queries[i] for i in missing]
+        cached = self.embedding_cache.get_many(model, texts) if self.embedding_cache else {}
+        # A handful of queries at most - one request, no batching pipeline
+        to_embed = list(dict.fromkeys(text for text in texts if EmbeddingCache.text_hash(text) not in cached))
+        if to_embed:
+            extra = {"dimensions": dims} if dims else {}
+            response = await self.async_openai_client.embeddings.create(
+                model=settings.openai_embedding_model, input=to_embed, **extra
             )
-            embeddings.extend([item.embedding for item in response.data])
+            new_embeddings = [item.embedding for item in response.data]
+            if self.embedding_cache:
+                self.embedding_cache.put_many(model, to_embed, new_embeddings)
+            for text, embedding in zip(to_embed, new_embeddings):
+                cached[EmbeddingCache.text_hash(text)] = embedding
         
+        for i, text in zip(missing, texts):
+            embeddings[i] = cached[EmbeddingCache.text_hash(text)]
+            query_embedding_cache.put(model, text, embeddings[i])
         return embeddings
     
-    def add_documents(self, chunks: List[Dict[str, Any]]):
-        """Add document chunks to vector store"""
+    def _get_embeddings_cached(self, texts: List[str], dimensions: Optional[int] = None):
+        """Return (embeddings, number of texts sent to the provider)"""
+        dims = dimensions or settings.embedding_dimensions
+        # Vectors at different dimensions are different cache entries
+        model = settings.openai_embedding_model + (f"@{dims}" if dims else "")
+        
+        cached = self.embedding_cache.get_many(model, texts) if self.embedding_cache else {}
+        
+        # Only send each distinct cache miss to the provider once
+        missing = []
+        seen = set()
+        for text in texts:
+            text_hash = EmbeddingCache.text_hash(text)
+            if text_hash not in cached and text_hash not in seen:
+                seen.add(text_hash)
+                missing.append(text)
+        
+        if missing:
+            def store_batch(batch_texts, batch_embeddings):
+                # Cache each batch as it lands so an interrupted build can resume
+                if self.embedding_cache:
+                    self.embedding_cache.put_many(model, batch_texts, batch_embeddings)
+            
+            new_embeddings = self._embed_with_provider(missing, dims, on_batch=store_batch)
+            for text, embedding in zip(missing, new_embeddings):
+                cached[EmbeddingCache.text_hash(text)] = embedding
+        
+        return [cached[EmbeddingCache.text_hash(text)] for text in texts], len(missing)
+    
+    def _embed_with_provider(
+        self,
+        texts: List[str],
+        dimensions: Optional[int] = None,
+        on_batch=None
+    ) -> List[List[float]]:
+        """Call the OpenAI embeddings API in token-packed, concurrent, rate-limited batches"""
+        pipeline = EmbeddingPipeline(
+            self.openai_client,
+            model=settings.openai_embedding_model,
+            dimensions=dimensions,
+            max_batch_inputs=settings.embedding_max_batch_inputs,
+            max_batch_tokens=settings.embedding_max_batch_tokens,
+            max_input_tokens=settings.embedding_max_input_tokens,
+            max_workers=settings.embedding_concurrency,
+            requests_per_minute=settings.embedding_requests_per_minute,
+            tokens_per_minute=settings.embedding_tokens_per_minute,
+            max_retries=settings.embedding_max_retries
+        )
+        return pipeline.embed(texts, on_batch=on_batch, show_progress=True)
+    
+    @staticmethod
+    def clean_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Clean metadata - ChromaDB only accepts str, int, float, bool, or None"""
+        clean_meta = {}
+        for key, value in metadata.items():
+            if isinstance(value, (str, int, float, bool)) or value is None:
+                clean_meta[key] = value
+            elif isinstance(value, list):
+                # Convert lists to comma-separated strings
+                clean_meta[key] = ", ".join(str(v) for v in value)
+            elif isinstance(value, dict):
+                # Convert dicts to JSON strings
+                clean_meta[key] = str(value)
+            else:
+                # Convert other types to strings
+                clean_meta[key] = str(value)
+        return clean_meta
+    
+    @staticmethod
+    def content_hash(content: str, metadata: Dict[str, Any]) -> str:
+        """Fingerprint of a chunk's text and metadata, stored alongside it for sync"""
+        payload = json.dumps(
+            {"content": content, "metadata": metadata},
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def add_documents(self, chunks: List[Dict[str, Any]], sync: bool = False) -> Dict[str, int]:
+        """Add document chunks to vector store
+        
+        With sync=True the collection is diffed against the incoming chunks:
+        only new or changed chunks are embedded and upserted, and ids that no
+        longer exist in the chunk set are deleted.
+        """
         if not self.collection:
             self.create_collection()
-        
-        print(f"Adding {len(chunks)} chunks to vector store...")
+        self.check_embedding_compatibility()
         
         # Prepare data
         ids = [chunk["id"] for chunk in chunks]
         documents = [chunk["content"] for chunk in chunks]
-        
-        # Clean metadatas - ChromaDB only accepts str, int, float, bool, or None
         metadatas = []
-        for chunk in chunks:
-            clean_meta = {}
-            for key, value in chunk["metadata"].items():
-                if isinstance(value, (str, int, float, bool)) or value is None:
-                    clean_meta[key] = value
-                elif isinstance(value, list):
-                    # Convert lists to comma-separated strings
-                    clean_meta[key] = ", ".join(str(v) for v in value)
-                elif isinstance(value, dict):
-                    # Convert dicts to JSON strings
-                    clean_meta[key] = str(value)
-                else:
-                    # Convert other types to strings
-                    clean_meta[key] = str(value)
+        for chunk, document in zip(chunks, documents):
+            clean_meta = self.clean_metadata(chunk.get("metadata", {}))
+            clean_meta["content_hash"] = self.content_hash(document, clean_meta)
             metadatas.append(clean_meta)
         
+        self._kb_version = None
+        if sync:
+            return self._sync_documents(ids, documents, metadatas)
+        
+        print(f"Adding {len(chunks)} chunks to vector store...")
+        
         # Generate embeddings
         print("Generating embeddings...")
         embeddings = self.get_embeddings(documents)
         
         # Add to collection in batches
         batch_size = 100
-        for i in range(0, len(chunks), batch_size):
-            end_idx = min(i + batch_size, len(chunks))
-            
-            self.collection.add(
-                ids=ids[i:end_idx],
-                embeddings=embeddings[i:end_idx],
-                documents=documents[i:end_idx],
-                metadatas=metadatas[i:end_idx]
-            )
-            print(f"  Added batch {i//batch_size + 1}/{(len(chunks)-1)//batch_size + 1}")
+        try:
+            for i in range(0, len(chunks), batch_size):
+                end_idx = min(i + batch_size, len(chunks))
+                
+                self.collection.add(
+                    ids=ids[i:end_idx],
+                    embeddings=embeddings[i:end_idx],
+                    documents=documents[i:end_idx],
+                    metadatas=metadatas[i:end_idx]
+                )
+                print(f"  Added batch {i//batch_size + 1}/{(len(chunks)-1)//batch_size + 1}")
+        finally:
+            self._flush()
         
         print(f"[OK] Successfully added {len(chunks)} chunks to vector store")
+        return {"added": len(chunks), "updated": 0, "deleted": 0, "unchanged": 0}
+    
+    def _sync_documents(
+        self,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]]
+    ) -> Dict[str, int]:
+        """Upsert new/changed chunks and delete removed ones based on content hashes"""
+        existing = self.collection.get(include=["metadatas"])
+        existing_hashes = {
+            chunk_id: (meta or {}).get("content_hash")
+            for chunk_id, meta in zip(existing["ids"], existing["metadatas"])
+        }
+        
+        incoming_ids = set(ids)
+        stale_ids = [chunk_id for chunk_id in existing_hashes if chunk_id not in incoming_ids]
+        changed = [
+            i for i, chunk_id in enumerate(ids)
+            if existing_hashes.get(chunk_id) != metadatas[i]["content_hash"]
+        ]
+        added = sum(1 for i in changed if ids[i] not in existing_hashes)
+        stats = {
+            "added": added,
+            "updated": len(changed) - added,
+            "deleted": len(stale_ids),
+            "unchanged": len(ids) - len(changed)
+        }
+        
+        print(f"Syncing vector store: {stats['added']} new, {stats['updated']} changed, "
+              f"{stats['deleted']} removed, {stats['unchanged']} unchanged")
+        
+        batch_size = 100
+        try:
+            if changed:
+                embeddings = self.get_embeddings([documents[i] for i in changed])
+                
+                for start in range(0, len(changed), batch_size):
+                    batch = changed[start:start + batch_size]
+                    self.collection.upsert(
+                        ids=[ids[i] for i in batch],
+                        embeddings=embeddings[start:start + batch_size],
+                        documents=[documents[i] for i in batch],
+                        metadatas=[metadatas[i] for i in batch]
+                    )
+            
+            for start in range(0, len(stale_ids), batch_size):
+                self.collection.delete(ids=stale_ids[start:start + batch_size])
+        finally:
+            self._flush()
+        
+        print(f"[OK] Vector store in sync ({len(ids)} chunks)")
+        return stats
+    
+    def _flush(self):
+        """Write buffered changes once per call (ChromaDB persists on its own)"""
+        flush = getattr(self.collection, "flush", None)
+        if flush:
+            flush()
     
     def search(self, query: str, top_k: int = None, filter_dict: Optional[Dict] = None) -> List[Dict[str, Any]]:
         """Search for relevant documents"""
+        query_embedding = self.embed_queries([query])[0]
+        return self.search_by_embedding(query_embedding, top_k=top_k, filter_dict=filter_dict)
+    
+    def search_by_embedding(
+        self,
+        query_embedding: List[float],
+        top_k: int = None,
+        filter_dict: Optional[Dict] = None
+    ) -> List[Dict[str, Any]]:
+        """Search with a precomputed query embedding (no embedding call)"""
+        return self._query_embeddings([query_embedding], top_k, filter_dict)[0]
+    
+    def search_many(
+        self,
+        queries: List[str],
+        top_k: int = None,
+        filters: Optional[List[Optional[Dict]]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Run several searches with one embedding call
+        
+        filters[i] applies to queries[i] (None = unfiltered). Queries sharing a
+        filter are answered together in a single vectorized lookup.
+        """
+        if not queries:
+            return []
+        filters = filters or [None] * len(queries)
+        if len(filters) != len(queries):
+            raise ValueError("filters must have one entry per query")
+        
+        embeddings = self.embed_queries(queries)
+        
+        # Group lookups by filter so each group is one collection.query call
+        groups: Dict[str, List[int]] = {}
+        for i, filter_dict in enumerate(filters):
+            groups.setdefault(json.dumps(filter_dict, sort_keys=True), []).append(i)
+        
+        results: List[List[Dict[str, Any]]] = [[] for _ in queries]
+        for positions in groups.values():
+            group_results = self._query_embeddings(
+                [embeddings[i] for i in positions], top_k, filters[positions[0]]
+            )
+            for i, formatted in zip(positions, group_results):
+                results[i] = formatted
+        
+        return results
+    
+    def _query_embeddings(
+        self,
+        query_embeddings: List[List[float]],
+        top_k: int = None,
+        filter_dict: Optional[Dict] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Query the collection with one or more embeddings and format the hits"""
         if not self.collection:
             self.create_collection()
+        self.check_embedding_compatibility()
         
         k = top_k or settings.top_k_results
         
-        # Generate query embedding
-        query_embedding = self.get_embeddings([query])[0]
-        
         # Search
         results = self.collection.query(
-            query_embeddings=[query_embedding],
+            query_embeddings=query_embeddings,
             n_results=k,
             where=filter_dict
         )
         
         # Format results
-        formatted_results = []
-        for i in range(len(results['ids'][0])):
-            formatted_results.append({
-                "id": results['ids'][0][i],
-                "content": results['documents'][0][i],
-                "metadata": results['metadatas'][0][i],
-                "distance": results['distances'][0][i] if 'distances' in results else None
-            })
-        
-        return formatted_results
+        all_formatted = []
+        for q in range(len(query_embeddings)):
+            formatted_results = []
+            for i in range(len(results['ids'][q])):
+                formatted_results.append({
+                    "id": results['ids'][q][i],
+                    "content": results['documents'][q][i],
+                    "metadata": results['metadatas'][q][i],
+                    "distance": results['distances'][q][i] if 'distances' in results else None
+                })
+            all_formatted.append(formatted_results)
+        
+        return all_formatted
+    
+    def fetch_by_ids(
+        self,
+        ids: List[str],
+        query_embedding: Optional[List[float]] = None
+    ) -> List[Dict[str, Any]]:
+        """Chunks by id, in the given order; with a query embedding the cosine distance is filled in"""
+        if not self.collection:
+            self.create_collection()
+        if not ids:
+            return []
+        
+        include = ["documents", "metadatas"] + (["embeddings"] if query_embedding is not None else [])
+        data = self.collection.get(ids=ids, include=include)
+        
+        query = None
+        if query_embedding is not None:
+            query = np.asarray(query_embedding, dtype=np.float32)
+            query = query / (np.linalg.norm(query) or 1.0)
+        
+        by_id = {}
+        for i, chunk_id in enumerate(data["ids"]):
+            distance = None
+            if query is not None:
+                embedding = np.asarray(data["embeddings"][i], dtype=np.float32)
+                distance = float(1.0 - query @ embedding / (np.linalg.norm(embedding) or 1.0))
+            by_id[chunk_id] = {
+                "id": chunk_id,
+                "content": data["documents"][i],
+                "metadata": data["metadatas"][i],
+                "distance": distance
+            }
+        return [by_id[chunk_id] for chunk_id in ids if chunk_id in by_id]
+    
+    def _get_all_documents(self) -> Dict[str, Any]:
+        if not self.collection:
+            self.create_collection()
+        return self.collection.get(include=["documents", "metadatas"])
+    
+    def get_kb_version(self, data: Optional[Dict[str, Any]] = None) -> str:
+        """Fingerprint of the indexed chunks - changes whenever the KB content changes"""
+        if not self.collection:
+            self.create_collection()
+        # Bundle collections carry the version computed at export time
+        bundle_version = (self.collection.metadata or {}).get("kb_version")
+        if bundle_version:
+            return bundle_version
+        if self._kb_version is None:
+            data = data or self._get_all_documents()
+            self._kb_version = compute_kb_version(data["ids"], data["documents"], data["metadatas"])
+        return self._kb_version
+    
+    def bm25_directory(self, backend: str = None) -> Path:
+        """BM25 index location - next to the vector index of the backend"""
+        if not self.collection:
+            self.create_collection()
+        return Path(self.index_directory(backend or self.backend_name)) / "bm25" / self.collection.name
+    
+    def identifier_index_path(self, backend: str = None) -> Path:
+        """Identifier index location - next to the vector index of the backend"""
+        if not self.collection:
+            self.create_collection()
+        return Path(self.index_directory(backend or self.backend_name)) / "identifiers" / f"{self.collection.name}.json"
+    
+    def _load_or_build(self, name: str, location: Path, load, build):
+        """Load a persisted auxiliary index, rebuilding it if the KB changed since it was saved"""
+        if not self.collection:
+            self.create_collection()
+        # Fetch the chunks once - they give both the KB version and the index input
+        data = None if (self.collection.metadata or {}).get("kb_version") else self._get_all_documents()
+        kb_version = self.get_kb_version(data)
+        
+        index = load(location, kb_version)
+        if index is not None:
+            return index
+        
+        data = data or self._get_all_documents()
+        index = build(data, kb_version)
+        try:
+            index.save(location)
+            print(f"[OK] Built {name} ({len(data['ids'])} chunks) at {location}")
+        except OSError as e:
+            print(f"⚠️ Could not persist {name}: {e}")
+        return index
+    
+    def load_bm25_index(self) -> BM25Index:
+        """Load the persisted BM25 index, rebuilding it if the KB changed since it was saved"""
+        return self._load_or_build(
+            "BM25 index",
+            self.bm25_directory(),
+            lambda location, kb_version: BM25Index.load(location, kb_version=kb_version),
+            lambda data, kb_version: BM25Index.build(
+                data["ids"], data["documents"], data["metadatas"],
+                kb_version=kb_version, k1=settings.bm25_k1, b=settings.bm25_b
+            )
+        )
+    
+    def load_identifier_index(self) -> IdentifierIndex:
+        """Load the persisted error-code/product index, rebuilding it if the KB changed"""
+        return self._load_or_build(
+            "identifier index",
+            self.identifier_index_path(),
+            lambda location, kb_version: IdentifierIndex.load(
+                location, kb_version=kb_version, max_documents=settings.identifier_max_documents
+            ),
+            lambda data, kb_version: IdentifierIndex.build(
+                data["ids"], data["documents"], data["metadatas"],
+                kb_version=kb_version, max_documents=settings.identifier_max_documents
+            )
+        )
+    
+    def build_search_indexes(self):
+        """Build (or refresh) the lexical indexes that sit next to the vector index"""
+        self.load_bm25_index()
+        self.load_identifier_index()
+    
+    def export_bundle(self, bundle_root: str = None) -> Path:
+        """Snapshot the current collection into a memory-mappable index bundle"""
+        if not self.collection:
+            self.create_collection()
+        
+        data = self.collection.get(include=["embeddings", "documents", "metadatas"])
+        bundle_dir = write_bundle(
+            bundle_root or settings.index_bundle_directory,
+            ids=data["ids"],
+            embeddings=data["embeddings"],
+            documents=data["documents"],
+            metadatas=data["metadatas"],
+            embedding_model=settings.openai_embedding_model,
+            embedding_dimensions=settings.embedding_dimensions or 0,
+            collection_name=self.collection.name
+        )
+        
+        # Ship the lexical indexes with the bundle so cold starts don't rebuild them
+        root = Path(bundle_root or settings.index_bundle_directory)
+        kb_version = compute_kb_version(data["ids"], data["documents"], data["metadatas"])
+        BM25Index.build(
+            data["ids"], data["documents"], data["metadatas"],
+            kb_version=kb_version, k1=settings.bm25_k1, b=settings.bm25_b
+        ).save(root / "bm25" / self.collection.name)
+        IdentifierIndex.build(
+            data["ids"], data["documents"], data["metadatas"],
+            kb_version=kb_version, max_documents=settings.identifier_max_documents
+        ).save(root / "identifiers" / f"{self.collection.name}.json")
+        print(f"[OK] Wrote index bundle with {len(data['ids'])} chunks to {bundle_dir}")
+        return bundle_dir
     
     def get_collection_stats(self) -> Dict[str, Any]:
         """Get statistics about the collection"""
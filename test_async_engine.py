@@ -0,0 +1,212 @@
+"""Test the async and streaming ExpertRAGEngine paths against fake OpenAI clients"""
+
+import os
+import time
+import shutil
+import asyncio
+import hashlib
+import tempfile
+from types import SimpleNamespace
+import numpy as np
+
+INDEX_DIR = tempfile.mkdtemp()
+os.environ.setdefault("OPENAI_API_KEY", "sk-test-00000000000000000000")
+os.environ.update(VECTOR_BACKEND="numpy", NUMPY_INDEX_DIRECTORY=INDEX_DIR, EMBEDDING_CACHE_ENABLED="false")
+
+from src.vector_store import VectorStore
+from src.expert_rag_engine import ExpertRAGEngine
+
+ANSWER = "Open Services and start QuickBooksDBXX. Then open the company file again. It should open now."
+
+DOCS = {
+    "fix_quickbooks_error_-6177": "Issue: QuickBooks error -6177 when opening the company file. "
+                                  "Resolution: start the QuickBooks Database Server Manager and update the file path.",
+    "printer_redirection": "Printer not showing in the remote desktop session: enable printer redirection "
+                           "in the RDP client, then log off and log back in.",
+    "password_reset": "Reset your password on the SelfCare portal: click Forgot Password and follow the email link.",
+}
+
+
+def embed(text: str, dim: int = 64):
+    """Bag of hashed words - texts sharing words get similar vectors"""
+    vector = np.zeros(dim)
+    for word in text.lower().split():
+        seed = int(hashlib.md5(word.strip(".,:?").encode()).hexdigest()[:8], 16)
+        vector += np.random.default_rng(seed).standard_normal(dim)
+    return (vector / (np.linalg.norm(vector) or 1.0)).tolist()
+
+
+class FakeEmbeddings:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def _response(self, input):
+        self.calls += 1
+        return SimpleNamespace(data=[SimpleNamespace(embedding=embed(text)) for text in input])
+
+    def create(self, model, input, **kwargs):
+        return self._response(input)
+
+
+class AsyncFakeEmbeddings(FakeEmbeddings):
+    async def create(self, model, input, **kwargs):
+        await asyncio.sleep(self.latency)
+        return self._response(input)
+
+
+class FakeStream:
+    def __init__(self, deltas):
+        self.deltas = deltas
+        self.read = 0
+        self.response = SimpleNamespace(closed=False, aclose=self._close)
+
+    async def _close(self):
+        self.response.closed = True
+
+    def __aiter__(self):
+        return self._chunks()
+
+    async def _chunks(self):
+        for delta in self.deltas:
+            self.read += 1
+            await asyncio.sleep(0)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))])
+
+
+class AsyncFakeCompletions:
+    """Completions answering ANSWER after latency; stream=True yields it word by word"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self.streams = []
+
+    async def create(self, stream=False, **request):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if stream:
+            self.streams.append(FakeStream([word + " " for word in ANSWER.split()]))
+            return self.streams[-1]
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=ANSWER), finish_reason="stop")],
+            usage=SimpleNamespace(total_tokens=120)
+        )
+
+
+class AsyncFakeClient:
+    def __init__(self, latency: float = 0.0):
+        self.embeddings = AsyncFakeEmbeddings(latency)
+        self.chat = SimpleNamespace(completions=AsyncFakeCompletions(latency))
+
+
+def make_engine(latency: float = 0.0):
+    store = VectorStore()
+    store.openai_client = SimpleNamespace(embeddings=FakeEmbeddings())
+    store.create_collection()
+    if store.collection.count() == 0:
+        store.add_documents([
+            {"id": f"{doc_id}_chunk_0", "content": content,
+             "metadata": {"doc_id": doc_id, "filename": f"{doc_id}.pdf", "category": "General"}}
+            for doc_id, content in DOCS.items()
+        ])
+    engine = ExpertRAGEngine(vector_store=store)
+    engine.openai_client = None  # the async paths must not fall back to blocking calls
+    engine.async_openai_client = AsyncFakeClient(latency)
+    store.async_openai_client = engine.async_openai_client
+    return engine
+
+
+def test_async_answer():
+    print("\n1. Async answers await the embedding and the completion")
+    engine = make_engine()
+    client = engine.async_openai_client
+    sync_embeddings = engine.vector_store.openai_client.embeddings.calls
+
+    response = asyncio.run(engine.process_query_expert_async(
+        "printer not showing in my remote desktop session", session_id="async-1"
+    ))
+    assert response["response"] == ANSWER, response
+    assert client.embeddings.calls == 1 and client.chat.completions.calls == 1
+    assert engine.vector_store.openai_client.embeddings.calls == sync_embeddings
+    assert response["sources"][0]["id"].startswith("printer_redirection")
+    print(f"   ✅ {client.embeddings.calls} awaited embedding, {client.chat.completions.calls} awaited completion")
+
+
+def test_identifier_before_embedding():
+    print("\n2. Error codes are answered from the identifier index without an embedding")
+    engine = make_engine()
+    client = engine.async_openai_client
+
+    response = asyncio.run(engine.process_query_expert_async("QuickBooks error -6177 again", session_id="async-2"))
+    results = asyncio.run(engine.retrieve_context_advanced_async("how do I fix -6177"))
+    assert client.embeddings.calls == 0, client.embeddings.calls
+    assert response["sources"][0]["id"].startswith("fix_quickbooks_error_-6177")
+    assert results and results[0]["id"].startswith("fix_quickbooks_error_-6177")
+    print("   ✅ 0 embedding calls for queries with a known code")
+
+
+def test_bounded_answer():
+    print("\n3. max_chars stops the completion at a sentence inside the budget")
+    engine = make_engine()
+    response = asyncio.run(engine.process_query_expert_async(
+        "printer redirection in the RDP client does not work", session_id="async-3", max_chars=60
+    ))
+    stream = engine.async_openai_client.chat.completions.streams[0]
+    assert response["response"] == "Open Services and start QuickBooksDBXX.", response["response"]
+    assert response.get("truncated") and stream.response.closed
+    assert stream.read < len(stream.deltas)
+    print(f"   ✅ read {stream.read} of {len(stream.deltas)} deltas")
+
+
+def test_stream_events():
+    print("\n4. stream_query_expert yields tokens, then the full response")
+
+    async def collect():
+        return [event async for event in engine.stream_query_expert(
+            "how do I reset my password on the selfcare portal", session_id="async-4"
+        )]
+
+    engine = make_engine()
+    events = asyncio.run(collect())
+    kinds = [kind for kind, _ in events]
+    assert kinds[-1] == "done" and set(kinds[:-1]) == {"token"} and len(kinds) > 2, kinds
+    done = events[-1][1]
+    assert "".join(text for _, text in events[:-1]) == done["response"]
+    assert done["response"].strip() == ANSWER and done.get("tokens_used", 0) > 0
+    print(f"   ✅ {len(kinds) - 1} token events, then done")
+
+
+def test_event_loop_not_blocked():
+    print("\n5. Concurrent requests overlap their OpenAI waits")
+    engine = make_engine(latency=0.2)
+    queries = [f"printer redirection question number {i}" for i in range(5)]
+
+    async def run():
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            engine.process_query_expert_async(query, session_id=f"async-5-{i}") for i, query in enumerate(queries)
+        ))
+        return time.perf_counter() - start
+
+    elapsed = asyncio.run(run())
+    # Each request waits 0.2s on the embedding and 0.2s on the completion
+    assert elapsed < 0.4 * len(queries) / 2, elapsed
+    print(f"   ✅ {len(queries)} requests in {elapsed:.2f}s (sequential: {0.4 * len(queries):.1f}s)")
+
+
+if __name__ == "__main__":
+    print("="*70)
+    print("TESTING ASYNC ENGINE PATHS")
+    print("="*70)
+
+    test_async_answer()
+    test_identifier_before_embedding()
+    test_bounded_answer()
+    test_stream_events()
+    test_event_loop_not_blocked()
+
+    shutil.rmtree(INDEX_DIR, ignore_errors=True)
+    print("\n" + "="*70)
+    print("DONE")
+    print("="*70)
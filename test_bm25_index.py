@@ -0,0 +1,90 @@
+"""Test the BM25 index: exact-token retrieval, persistence and lookup latency"""
+
+import json
+import time
+import tempfile
+from pathlib import Path
+from src.bm25_index import BM25Index, tokenize
+
+# (query, substring that must appear in the top hit)
+EXACT_QUERIES = [
+    ("QuickBooks error -6177", "6177"),
+    ("RDP error 0x204", "0x204"),
+    ("UniPrint check alignment", "uniprint"),
+    ("QuickBooks error -6189, -816", "6189"),
+]
+
+
+def load_chunks():
+    chunks_file = Path("data/processed/final_chunks.json")
+    with open(chunks_file, 'r', encoding='utf-8') as f:
+        chunks = json.load(f)
+    if isinstance(chunks, dict):
+        chunks = chunks.get('chunks', [])
+    return chunks
+
+
+def test_tokenize():
+    print("\n1. Tokenizer keeps codes intact")
+    tokens = tokenize("QuickBooks error -6177, 0 / RDP 0x204 on UniPrint")
+    print(f"   {tokens}")
+    assert tokens == ["quickbooks", "error", "6177", "0", "rdp", "0x204", "uniprint"]
+    print("   ✅ Passed")
+
+
+def test_exact_tokens(index, chunks):
+    print("\n2. Exact identifiers are found at rank 1")
+    contents = {chunk["id"]: chunk["content"].lower() for chunk in chunks}
+    for query, expected in EXACT_QUERIES:
+        hits = index.search(query, top_k=5)
+        top_id = hits[0][0] if hits else None
+        found = top_id is not None and expected in contents[top_id]
+        print(f"   {'✅' if found else '❌'} {query!r} -> {top_id}")
+
+
+def test_persistence(index):
+    print("\n3. Save / load round trip")
+    with tempfile.TemporaryDirectory() as tmp:
+        index.save(tmp)
+        loaded = BM25Index.load(tmp, kb_version=index.kb_version)
+        assert loaded is not None
+        for query, _ in EXACT_QUERIES:
+            assert loaded.search(query, top_k=10) == index.search(query, top_k=10)
+        assert BM25Index.load(tmp, kb_version="other-version") is None
+    print("   ✅ Identical results after reload, stale KB version rejected")
+
+
+def test_latency(index):
+    print("\n4. Lookup latency")
+    queries = [query for query, _ in EXACT_QUERIES] * 250
+    start = time.perf_counter()
+    for query in queries:
+        index.search(query, top_k=10)
+    elapsed_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    print(f"   {'✅' if elapsed_ms < 1 else '⚠️'} {elapsed_ms:.3f} ms/query over {len(index)} chunks")
+
+
+if __name__ == "__main__":
+    print("="*70)
+    print("TESTING BM25 INDEX")
+    print("="*70)
+
+    chunks = load_chunks()
+    start = time.perf_counter()
+    index = BM25Index.build(
+        [c["id"] for c in chunks],
+        [c["content"] for c in chunks],
+        [c.get("metadata", {}) for c in chunks],
+        kb_version="test"
+    )
+    print(f"Built index over {len(index)} chunks in {(time.perf_counter() - start) * 1000:.0f} ms "
+          f"({len(index.vocabulary)} terms)")
+
+    test_tokenize()
+    test_exact_tokens(index, chunks)
+    test_persistence(index)
+    test_latency(index)
+
+    print("\n" + "="*70)
+    print("DONE")
+    print("="*70)
@@ -42,7 +42,7 @@ CRITICAL KNOWLEDGE BASE:
 **DISK STORAGE:**
 - Check space: Right-click C: drive → Properties
 - Quick cleanup: Delete temp files (%temp%), run Disk Cleanup utility
-- Upgrade tiers: 40GB ($10/mo), 80GB ($20/mo), 120GB ($30/mo), 200GB ($50/mo)
+- Upgrade tiers: 40GB ($28/mo), 60GB ($40/mo), 80GB ($50/mo), 100GB ($60/mo), 200GB ($120/mo)
 - Ticket ETA: 2-4 hours for upgrade
 - Contact: support@acecloudhosting.com
 
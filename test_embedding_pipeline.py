@@ -0,0 +1,123 @@
+"""Test the concurrent embedding pipeline: retries, no silent drops, throughput"""
+
+import time
+import random
+import threading
+import httpx
+from openai import RateLimitError, APIStatusError
+from src.embedding_pipeline import EmbeddingPipeline, EmbeddingPipelineError
+from src.token_counter import count_tokens
+
+REQUEST = httpx.Request("POST", "https://api.openai.com/v1/embeddings")
+
+
+class _Item:
+    def __init__(self, embedding):
+        self.embedding = embedding
+
+
+class _Response:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeEmbeddings:
+    """Stand-in for client.embeddings with latency and injectable failures"""
+
+    def __init__(self, latency: float = 0.05, fail_every: int = 0, poison: str = None):
+        self.latency = latency
+        self.fail_every = fail_every
+        self.poison = poison
+        self.calls = 0
+        self.batch_tokens = []
+        self._lock = threading.Lock()
+
+    def create(self, model, input, **kwargs):
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+            self.batch_tokens.append([count_tokens(text) for text in input])
+        time.sleep(self.latency)
+        if self.fail_every and call % self.fail_every == 0:
+            raise RateLimitError("Rate limit reached", response=httpx.Response(429, request=REQUEST), body=None)
+        if self.poison and self.poison in input:
+            raise APIStatusError("Invalid input", response=httpx.Response(400, request=REQUEST), body=None)
+        return _Response([_Item([float(len(text)), 1.0]) for text in input])
+
+
+class FakeClient:
+    def __init__(self, **kwargs):
+        self.embeddings = FakeEmbeddings(**kwargs)
+
+
+def make_pipeline(client, workers):
+    return EmbeddingPipeline(client, model="text-embedding-3-small", max_batch_inputs=10,
+                             max_workers=workers, backoff_base=0.01)
+
+
+def test_order_and_retries():
+    print("\n1. Order preserved, 429s retried")
+    texts = [f"chunk {i}" * (i % 5 + 1) for i in range(200)]
+    pipeline = make_pipeline(FakeClient(latency=0.01, fail_every=4), workers=4)
+    embeddings = pipeline.embed(texts)
+    assert [e[0] for e in embeddings] == [float(len(t)) for t in texts]
+    stats = pipeline.get_stats()
+    print(f"   ✅ {len(embeddings)} embeddings in order, {stats['retries']} retries")
+
+
+def test_failed_batch_not_dropped():
+    print("\n2. A batch that keeps failing raises, the rest are delivered")
+    texts = [f"chunk {i}" for i in range(100)]
+    delivered = []
+    pipeline = make_pipeline(FakeClient(latency=0.01, poison="chunk 55"), workers=4)
+    try:
+        pipeline.embed(texts, on_batch=lambda batch, _: delivered.extend(batch))
+        print("   ❌ Expected EmbeddingPipelineError")
+        return
+    except EmbeddingPipelineError as e:
+        print(f"   ✅ Raised: {e}")
+    assert len(delivered) == 90 and "chunk 55" not in delivered
+    print(f"   ✅ {len(delivered)} texts from good batches handed over for caching")
+
+
+def test_token_packing():
+    print("\n3. Requests packed by tokens, over-long inputs split (not truncated)")
+    texts = [f"short chunk {i}" for i in range(300)] + ["QuickBooks error -6177 " * 3000]
+    client = FakeClient(latency=0)
+    pipeline = EmbeddingPipeline(client, model="text-embedding-3-small", max_batch_tokens=4000,
+                                 max_input_tokens=1000, max_workers=4)
+    embeddings = pipeline.embed(texts)
+    assert len(embeddings) == len(texts)
+    for batch in client.embeddings.batch_tokens:
+        assert sum(batch) <= 4000 and max(batch) <= 1000
+    print(f"   ✅ {len(texts)} texts in {client.embeddings.calls} requests, "
+          f"all within the token caps")
+    print(f"   ✅ {pipeline.get_stats()['split_inputs']} input split into "
+          f"{-(-count_tokens(texts[-1]) // 1000)} pieces and averaged")
+
+
+def test_throughput():
+    print("\n4. Concurrency hides per-batch latency")
+    texts = [f"chunk {i}" for i in range(400)]
+    timings = {}
+    for workers in (1, 8):
+        pipeline = make_pipeline(FakeClient(latency=0.05), workers=workers)
+        start = time.perf_counter()
+        pipeline.embed(texts)
+        timings[workers] = time.perf_counter() - start
+        print(f"   workers={workers}: {timings[workers]:.2f}s")
+    print(f"   ✅ Speedup: {timings[1] / timings[8]:.1f}x")
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    print("="*70)
+    print("TESTING EMBEDDING PIPELINE")
+    print("="*70)
+    test_order_and_retries()
+    test_failed_batch_not_dropped()
+    test_token_packing()
+    test_throughput()
+    print("\n" + "="*70)
+    print("DONE")
+    print("="*70)
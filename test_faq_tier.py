@@ -0,0 +1,62 @@
+"""Test the FAQ answer tier: common intents answered, long-tail questions passed to the LLM"""
+
+import time
+from src.faq_tier import FAQTier
+from config import settings
+
+# (message, expected intent or None for the LLM)
+CASES = [
+    ("How do I reset my password?", "password_reset"),
+    ("I forgot my password, please help", "password_reset"),
+    ("my account is locked", "account_locked"),
+    ("How much does 200GB storage cost?", "storage_upgrade_pricing"),
+    ("What is your phone number?", "support_contact"),
+    ("QuickBooks says update required", "application_update"),
+    ("reset password but selfcare shows error 403 after enrollment", None),
+    ("QuickBooks error 15212 during update", None),
+    ("I want to speak to a human about my password", None),
+    ("password not working in outlook", None),
+    ("disk full", None),
+    ("hi", None),
+]
+
+
+def test_routing(tier):
+    print("\n1. Intent routing")
+    failures = 0
+    for message, expected in CASES:
+        match = tier.match(message)
+        intent = match["intent"] if match else None
+        ok = intent == expected
+        failures += not ok
+        detail = f"{intent} ({match['confidence']})" if match else "LLM"
+        print(f"   {'✅' if ok else '❌'} {message!r} -> {detail}")
+    assert failures == 0
+
+
+def test_latency(tier):
+    print("\n2. Match latency")
+    messages = [message for message, _ in CASES] * 100
+    start = time.perf_counter()
+    for message in messages:
+        tier.match(message)
+    elapsed_ms = (time.perf_counter() - start) * 1000 / len(messages)
+    print(f"   {'✅' if elapsed_ms < 1 else '⚠️'} {elapsed_ms:.3f} ms/message")
+
+
+if __name__ == "__main__":
+    print("="*70)
+    print("TESTING FAQ ANSWER TIER")
+    print("="*70)
+
+    tier = FAQTier.load(settings.faq_answers_path, min_confidence=settings.faq_min_confidence)
+    assert tier is not None, "Run build_faq_answers.py first"
+    print(f"Loaded {len(tier.intents)} intents from {settings.faq_answers_path}")
+
+    test_routing(tier)
+    test_latency(tier)
+    print(f"\n{tier.get_stats()}")
+
+    print("\n" + "="*70)
+    print("DONE")
+    print("="*70)
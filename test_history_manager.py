@@ -0,0 +1,155 @@
+"""Test conversation history compaction with rolling summaries"""
+
+import time
+from src.history_manager import HistoryManager, SessionHistories, recent_history, is_summary, SUMMARY_PREFIX
+
+
+def turns(n):
+    messages = []
+    for i in range(n):
+        messages.append({"role": "user", "content": f"question {i}"})
+        messages.append({"role": "assistant", "content": f"answer {i}"})
+    return messages
+
+
+def listing(previous, messages):
+    """Stand-in summarizer: previous summary + the folded message contents"""
+    return " ".join(filter(None, [previous] + [m["content"] for m in messages]))
+
+
+def test_short_history_untouched():
+    print("\n1. Short conversations are sent as they are")
+    manager = HistoryManager(keep_messages=4, summarize=listing)
+    assert manager.compact("s", turns(2)) == turns(2)
+    # Older messages cheaper than a summary stay verbatim
+    assert manager.compact("s", turns(6)) == turns(6)[-10:]
+    manager.flush()
+    assert manager.get_stats()["summaries"] == 0
+    print("   ✅ the raw window is kept while it is cheaper than a summary")
+
+
+def test_rolling_summary():
+    print("\n2. Older turns fold into the summary")
+    manager = HistoryManager(keep_messages=4, summary_max_tokens=0, summarize=listing)
+    messages = turns(3)
+    first = manager.compact("s", messages)
+    # Summary not ready yet - older messages go verbatim instead of being dropped
+    assert first == messages
+    manager.flush()
+
+    history = manager.compact("s", messages)
+    assert is_summary(history[0]) and history[0]["content"] == SUMMARY_PREFIX + "question 0 answer 0"
+    assert history[1:] == messages[-4:]
+
+    messages = turns(10)
+    manager.compact("s", messages)
+    manager.flush()
+    history = manager.compact("s", messages)
+    assert len(history) == 5 and history[0]["content"].endswith("question 7 answer 7")
+    print(f"   ✅ {len(messages)} messages -> summary + {len(history) - 1} verbatim")
+
+
+def test_off_request_path():
+    print("\n3. A slow summary never delays the request")
+    def slow(previous, messages):
+        time.sleep(0.5)
+        return "customer cannot open QuickBooks, error 6177"
+
+    manager = HistoryManager(keep_messages=4, summary_max_tokens=0, summarize=slow)
+    messages = turns(20)
+    start = time.perf_counter()
+    history = manager.compact("s", messages)
+    elapsed = time.perf_counter() - start
+    assert elapsed < 0.1, elapsed
+    # Bounded while the summary is pending: keep_messages older + keep_messages recent
+    assert len(history) == 8
+    manager.flush()
+    assert is_summary(manager.compact("s", messages)[0])
+    print(f"   ✅ compact() took {elapsed * 1000:.1f} ms with a 500 ms summarizer")
+
+
+def test_failures_and_resets():
+    print("\n4. Failed summaries and reset sessions")
+    def failing(previous, messages):
+        raise RuntimeError("OpenAI down")
+
+    manager = HistoryManager(keep_messages=4, summary_max_tokens=0, summarize=failing)
+    messages = turns(5)
+    manager.compact("s", messages)
+    manager.flush()
+    assert manager.get_stats()["summary_failures"] == 1
+    assert manager.compact("s", messages) == messages[-8:]
+
+    manager = HistoryManager(keep_messages=4, summary_max_tokens=0, summarize=listing)
+    manager.compact("s", turns(6))
+    manager.flush()
+    # Same session id, fresh history: the old summary must not leak in
+    assert manager.compact("s", turns(3)) == turns(3)
+    print(f"   ✅ {manager.get_stats()}")
+
+
+def test_recent_history():
+    print("\n5. Engines keep the summary when they re-slice")
+    summary = {"role": "system", "content": SUMMARY_PREFIX + "RDP error 0x204"}
+    history = [summary] + turns(4)
+    assert recent_history(history, 5) == [summary] + turns(4)[-4:]
+    assert recent_history(turns(4), 5) == turns(4)[-5:]
+    print("   ✅ summary + last 4")
+
+
+def test_stored_history_bounded():
+    print("\n6. Stored history drops what the summary covers")
+    manager = HistoryManager(keep_messages=4, summary_max_tokens=0, max_stored_messages=20, summarize=listing)
+    stored = []
+    for i in range(30):
+        manager.compact("s", stored)
+        manager.flush()
+        stored = manager.trim("s", stored + turns(i + 1)[-2:])
+        assert len(stored) <= 20
+    # Nothing was lost: summary + verbatim messages are the whole conversation, in order
+    history = manager.compact("s", stored)
+    sent = [history[0]["content"][len(SUMMARY_PREFIX):]] + [m["content"] for m in history[1:]]
+    assert " ".join(sent) == " ".join(m["content"] for m in turns(30)), sent
+    print(f"   ✅ 60 messages stored as {len(stored)}, summary + {len(history) - 1} sent")
+
+    # Failing summaries: the hard cap still applies
+    manager = HistoryManager(keep_messages=4, summary_max_tokens=0, max_stored_messages=20,
+                             summarize=lambda previous, messages: 1 / 0)
+    stored = []
+    for i in range(30):
+        manager.compact("s", stored)
+        manager.flush()
+        stored = manager.trim("s", stored + turns(i + 1)[-2:])
+    assert len(stored) == 20
+    print(f"   ✅ without summaries the session is capped at {len(stored)} messages")
+
+
+def test_idle_sessions_evicted():
+    print("\n7. Idle sessions are evicted")
+    manager = HistoryManager(keep_messages=4, summarize=listing)
+    sessions = SessionHistories(manager, max_sessions=2, ttl_seconds=0.2)
+    for session_id in ("a", "b", "c"):
+        sessions[session_id] = turns(1)
+    assert "a" not in sessions and len(sessions) == 2
+    assert sessions.get("missing", []) == []
+    time.sleep(0.3)
+    assert len(sessions) == 0 and sessions.evicted == 3
+    print("   ✅ LRU beyond max_sessions, TTL for idle sessions")
+
+
+if __name__ == "__main__":
+    print("="*70)
+    print("TESTING HISTORY COMPACTION")
+    print("="*70)
+
+    test_short_history_untouched()
+    test_rolling_summary()
+    test_off_request_path()
+    test_failures_and_resets()
+    test_recent_history()
+    test_stored_history_bounded()
+    test_idle_sessions_evicted()
+
+    print("\n" + "="*70)
+    print("DONE")
+    print("="*70)
@@ -0,0 +1,94 @@
+"""Test the exact error-code / product identifier index"""
+
+import json
+import time
+from pathlib import Path
+from src.identifier_index import IdentifierIndex, extract_codes
+
+EXTRACTION_CASES = [
+    ("QuickBooks error -6177", ["6177"]),
+    ("Error -6189, -816 when opening file", ["6189", "816"]),
+    ("multi-user access error (-6098,5)", ["6098"]),
+    ("RDP error 0x204", ["0x204"]),
+    ("Payroll error PS077", ["ps077"]),
+    ("QuickBooks 2024 update", []),
+    ("Call 1-888-415-5240", []),
+    ("200GB costs $50/month", []),
+    ("Office 365 keeps asking for password", []),
+]
+
+# (query, expected document, should be confident)
+LOOKUP_CASES = [
+    ("QuickBooks error -6177", "fix_quickbooks_error_codes_(-6177,_0)", True),
+    ("getting -6189 and -816", "how_to_fix_quickbooks_error_codes_(-6189,_-816)", True),
+    ("error 15212 during update", "how_to_fix_quickbooks_error_15212_or_12159", True),
+    ("Remote desktop 0x204 from my Mac", "how_to_resolve_remote_desktop_error_code_0x204_while_connecting_from_mac_to_windows", True),
+    ("QBWC1039 in web connector", "how_to_solve_qbwebconnector_error_qbwc1039_there_was_a_problem_adding_the_application_check_qwclog_txt_for_details", True),
+    ("How do I reset my password?", None, False),
+]
+
+
+def test_extraction():
+    print("\n1. Code extraction")
+    for text, expected in EXTRACTION_CASES:
+        codes = extract_codes(text)
+        print(f"   {'✅' if codes == expected else '❌'} {text!r} -> {codes}")
+
+
+def test_lookup(index):
+    print("\n2. Lookup")
+    for query, expected_doc, expected_confident in LOOKUP_CASES:
+        match = index.lookup(query)
+        confident = bool(match and match["confident"])
+        ok = confident == expected_confident and (expected_doc is None or expected_doc in match["documents"])
+        print(f"   {'✅' if ok else '❌'} {query!r} -> "
+              f"{match['documents'] if match else None} (confident: {confident})")
+
+
+def test_content_only_chunks():
+    print("\n3. Codes only seen in chunk text select just those chunks")
+    index = IdentifierIndex.build(
+        ["guide_chunk_0", "guide_chunk_1", "guide_chunk_2", "fix_error_-6177_chunk_0", "fix_error_-6177_chunk_1"],
+        ["Server maintenance notes.", "Backups and disk cleanup.", "Error 0x999 after maintenance: restart RDS.",
+         "Run File Doctor.", "Restart the Database Server Manager."],
+        [{"doc_id": "guide", "chunk_number": i} for i in range(3)] +
+        [{"doc_id": "fix_error_-6177", "chunk_number": i} for i in range(2)]
+    )
+    match = index.lookup("error 0x999 after maintenance")
+    assert match["documents"] == ["guide"] and match["chunk_ids"] == ["guide_chunk_2"], match
+    # A title match still takes the whole document
+    assert index.lookup("error -6177")["chunk_ids"] == ["fix_error_-6177_chunk_0", "fix_error_-6177_chunk_1"]
+    print(f"   ✅ {match['chunk_ids']}")
+
+
+def test_latency(index):
+    print("\n4. Lookup latency")
+    queries = [query for query, _, _ in LOOKUP_CASES] * 1000
+    start = time.perf_counter()
+    for query in queries:
+        index.lookup(query)
+    elapsed_us = (time.perf_counter() - start) * 1e6 / len(queries)
+    print(f"   ✅ {elapsed_us:.1f} µs/query")
+
+
+if __name__ == "__main__":
+    print("="*70)
+    print("TESTING IDENTIFIER INDEX")
+    print("="*70)
+
+    with open(Path("data/processed/final_chunks.json"), 'r', encoding='utf-8') as f:
+        chunks = json.load(f)
+    index = IdentifierIndex.build(
+        [c["id"] for c in chunks], [c["content"] for c in chunks], [c.get("metadata", {}) for c in chunks]
+    )
+    print(f"Indexed {len(index.documents)} documents, "
+          f"{len(set(index.title_codes) | set(index.content_codes))} codes, {len(index.products)} products")
+
+    test_extraction()
+    test_lookup(index)
+    test_content_only_chunks()
+    test_latency(index)
+
+    print("\n" + "="*70)
+    print("DONE")
+    print("="*70)
@@ -0,0 +1,101 @@
+"""Test MinHash + LSH near-duplicate clustering on the processed chunks"""
+
+import json
+import time
+from pathlib import Path
+from src.minhash_lsh import MinHashLSH, lsh_parameters
+from src.context_packer import shingles, jaccard
+
+CHUNKS_FILE = Path("data/processed/final_chunks.json")
+
+RESOLUTION = (
+    "Open QuickBooks, go to File > Utilities > Repair File and Network Problems, wait for the "
+    "tool to finish scanning the company file, then restart QuickBooks and open the file again. "
+    "If the error persists, rename the .ND and .TLG files in the company folder and retry."
+)
+
+
+def test_paraphrase_and_shared_header():
+    print("\n1. Paraphrases merge, shared headers do not")
+    texts = [
+        "Issue: QuickBooks error -6177 when opening company file\n\nResolution: " + RESOLUTION,
+        "Q: How do I fix QuickBooks error -6177?\n\nA: " + RESOLUTION,
+        "Issue: QuickBooks error -6177 when opening company file\n\nResolution: The customer's folder "
+        "permissions were wrong. Support gave the user full control of the company folder on the "
+        "server and the file opened normally afterwards.",
+    ]
+    clusters = MinHashLSH(threshold=0.6).clusters(texts)
+    assert [c["members"] for c in clusters] == [[0, 1]], clusters
+    print(f"   ✅ clusters {clusters}")
+
+
+def test_lsh_parameters():
+    print("\n2. Band layout follows the threshold")
+    for threshold in (0.5, 0.8, 0.9):
+        bands, rows = lsh_parameters(128, threshold)
+        assert bands * rows == 128
+        print(f"   ✅ threshold {threshold}: {bands} bands x {rows} rows")
+
+
+def test_corpus():
+    print("\n3. Whole corpus")
+    if not CHUNKS_FILE.exists():
+        print(f"   ⚠️ {CHUNKS_FILE} not found, skipped")
+        return
+    with open(CHUNKS_FILE, 'r', encoding='utf-8') as f:
+        chunks = json.load(f)
+    if isinstance(chunks, dict):
+        chunks = chunks.get('chunks', [])
+    texts = [c['content'] for c in chunks if c.get('content', '').strip()]
+
+    lsh = MinHashLSH(threshold=0.8)
+    start = time.perf_counter()
+    clusters = lsh.clusters(texts)
+    elapsed = time.perf_counter() - start
+
+    removed = sum(len(c["members"]) - 1 for c in clusters)
+    all_pairs = len(texts) * (len(texts) - 1) // 2
+    # Every reported member really is a near-duplicate of another member
+    shingle_sets = {i: shingles(texts[i]) for c in clusters for i in c["members"]}
+    for cluster in clusters:
+        for i in cluster["members"]:
+            assert any(jaccard(shingle_sets[i], shingle_sets[j]) >= lsh.threshold
+                       for j in cluster["members"] if j != i)
+    print(f"   {len(texts)} chunks, {lsh.last_stats['candidate_pairs']} candidate pairs "
+          f"(of {all_pairs} possible), {len(clusters)} clusters, {removed} removable")
+    print(f"   ✅ {elapsed:.2f}s")
+
+
+def test_duplicates_checked_against_kept():
+    print("\n4. Only near-duplicates of the kept copy are dropped")
+    words = [f"w{i}" for i in range(40)]
+    # a ~ b and b ~ c, but a and c are not near-duplicates
+    texts = [" ".join(words[:30]), " ".join(words[5:35]), " ".join(words[10:40])]
+    lsh = MinHashLSH(threshold=0.6)
+    assert jaccard(shingles(texts[0]), shingles(texts[2])) < lsh.threshold
+    assert [c["members"] for c in lsh.clusters(texts)] == [[0, 1, 2]]
+
+    # Keeping the middle copy drops both ends
+    groups = lsh.duplicates(texts, preference=lambda i: i == 1)
+    assert [g["kept"] for g in groups] == [1] and sorted(groups[0]["removed"]) == [0, 2]
+
+    # Keeping one end drops the middle only - the far end is not its duplicate
+    groups = lsh.duplicates(texts, preference=lambda i: -i)
+    assert groups == [{"kept": 0, "removed": {1: groups[0]["removed"][1]}}], groups
+    assert all(sim >= lsh.threshold for g in groups for sim in g["removed"].values())
+    print(f"   ✅ chain 0~1~2 keeping 0: {groups}")
+
+
+if __name__ == "__main__":
+    print("="*70)
+    print("TESTING MINHASH LSH DEDUPLICATION")
+    print("="*70)
+
+    test_paraphrase_and_shared_header()
+    test_lsh_parameters()
+    test_corpus()
+    test_duplicates_checked_against_kept()
+
+    print("\n" + "="*70)
+    print("DONE")
+    print("="*70)
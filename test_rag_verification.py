@@ -29,8 +29,8 @@ def test_rag_response():
     print(f"\nResponse:\n{answer}\n")
     
     # Check if response contains specific KB info
-    has_pricing = any(price in answer for price in ["$10", "$20", "$30", "$50"])
-    has_tiers = any(tier in answer for tier in ["40GB", "80GB", "120GB", "200GB"])
+    has_pricing = any(price in answer for price in ["$28", "$40", "$50", "$60", "$120"])
+    has_tiers = any(tier in answer for tier in ["40GB", "60GB", "80GB", "100GB", "200GB"])
     
     print("✅ RAG VERIFICATION:")
     print(f"  - Contains pricing info: {'YES ✅' if has_pricing else 'NO ❌'}")
@@ -0,0 +1,61 @@
+"""Test the follow-up detector and session retrieval memory"""
+
+import time
+from src.retrieval_memory import RetrievalMemory, is_follow_up
+
+TOPIC = "My printer is not showing up in the remote desktop session"
+
+# (message, expected follow-up?)
+CASES = [
+    ("Done", True),
+    ("Selected", True),
+    ("yes", True),
+    ("still not working", True),
+    ("ok what next?", True),
+    ("the printer still doesn't show", True),
+    ("QuickBooks error -6177 now", False),
+    ("how do I reset my password", False),
+    ("Lacerte is frozen", False),
+    ("Now the remote desktop printer is showing but it prints blank pages every time", False),
+]
+
+
+def test_detector():
+    print("\n1. Follow-up detection")
+    failures = 0
+    for message, expected in CASES:
+        result = is_follow_up(message, TOPIC)
+        failures += result != expected
+        print(f"   {'✅' if result == expected else '❌'} {message!r} -> {'reuse' if result else 'fresh'}")
+    assert failures == 0
+
+
+def test_memory():
+    print("\n2. Memory per session, bounded and expiring")
+    memory = RetrievalMemory(max_sessions=2, ttl_seconds=0.2)
+    results = [{"id": "kb_printer_chunk_0", "combined_score": 0.8}]
+    memory.remember("a", TOPIC, "printer", results)
+    topic = memory.follow_up("a", "Done")
+    assert topic and topic["category"] == "printer" and topic["results"] == [("kb_printer_chunk_0", 0.8)]
+    assert memory.follow_up("b", "Done") is None
+
+    memory.remember("b", TOPIC, "printer", results)
+    memory.remember("c", TOPIC, "printer", results)
+    assert memory.follow_up("a", "Done") is None
+
+    time.sleep(0.25)
+    assert memory.follow_up("c", "Done") is None
+    print(f"   ✅ {memory.get_stats()}")
+
+
+if __name__ == "__main__":
+    print("="*70)
+    print("TESTING RETRIEVAL MEMORY")
+    print("="*70)
+
+    test_detector()
+    test_memory()
+
+    print("\n" + "="*70)
+    print("DONE")
+    print("="*70)
@@ -0,0 +1,109 @@
+"""Test the semantic response cache: near-duplicate hits, scoping, eviction and KB invalidation"""
+
+import time
+import numpy as np
+from src.semantic_cache import SemanticResponseCache
+
+DIM = 256
+rng = np.random.default_rng(7)
+
+
+def random_unit():
+    vector = rng.normal(size=DIM)
+    return vector / np.linalg.norm(vector)
+
+
+def nearby(vector, distance):
+    """A unit vector at roughly the given cosine distance from vector"""
+    noise = rng.normal(size=DIM)
+    noise -= noise.dot(vector) * vector
+    noise /= np.linalg.norm(noise)
+    similarity = 1.0 - distance
+    return similarity * vector + np.sqrt(1 - similarity ** 2) * noise
+
+
+def answer(text):
+    return {"response": text, "escalate": False}
+
+
+def test_near_duplicates():
+    print("\n1. Paraphrases hit, unrelated questions miss")
+    cache = SemanticResponseCache(max_size=10, max_distance=0.08)
+    question = random_unit()
+    cache.store(question.tolist(), ("gpt-4o-mini", "password_reset", True), "v1", "reset my password", answer("A"))
+
+    hit = cache.lookup(nearby(question, 0.05).tolist(), ("gpt-4o-mini", "password_reset", True), "v1")
+    assert hit is not None and hit[0]["response"] == "A" and hit[2] == "reset my password"
+    assert cache.lookup(nearby(question, 0.15).tolist(), ("gpt-4o-mini", "password_reset", True), "v1") is None
+    assert cache.lookup(random_unit().tolist(), ("gpt-4o-mini", "password_reset", True), "v1") is None
+    print(f"   ✅ Hit at distance {hit[1]:.3f}, misses beyond 0.08")
+
+
+def test_scope():
+    print("\n2. Category and answer variant are part of the key")
+    cache = SemanticResponseCache(max_size=10)
+    question = random_unit()
+    cache.store(question.tolist(), ("gpt-4o-mini", "email", True), "v1", "q", answer("concise"))
+    assert cache.lookup(question.tolist(), ("gpt-4o-mini", "email", False), "v1") is None
+    assert cache.lookup(question.tolist(), ("gpt-4o-mini", "printer", True), "v1") is None
+    assert cache.lookup(question.tolist(), ("gpt-4o-mini", "email", True), "v1")[0]["response"] == "concise"
+    print("   ✅ Only the same category and variant are served")
+
+
+def test_kb_version():
+    print("\n3. A new KB version invalidates every entry")
+    cache = SemanticResponseCache(max_size=10)
+    question = random_unit()
+    cache.store(question.tolist(), ("m", "general", False), "v1", "q", answer("old"))
+    assert cache.lookup(question.tolist(), ("m", "general", False), "v2") is None
+    assert cache.get_stats()["size"] == 0 and cache.get_stats()["invalidations"] == 1
+    assert cache.lookup(question.tolist(), ("m", "general", False), "v1") is None
+    print("   ✅ Stale answers dropped")
+
+
+def test_eviction_and_ttl():
+    print("\n4. Size bound (LRU) and TTL")
+    cache = SemanticResponseCache(max_size=3, ttl_seconds=0.2)
+    questions = [random_unit() for _ in range(4)]
+    for i, question in enumerate(questions[:3]):
+        cache.store(question.tolist(), ("m", "general", False), "v1", f"q{i}", answer(str(i)))
+    # Touch q0 so q1 becomes least recently used
+    assert cache.lookup(questions[0].tolist(), ("m", "general", False), "v1")
+    cache.store(questions[3].tolist(), ("m", "general", False), "v1", "q3", answer("3"))
+    assert cache.lookup(questions[1].tolist(), ("m", "general", False), "v1") is None
+    assert cache.lookup(questions[0].tolist(), ("m", "general", False), "v1")
+    assert cache.get_stats()["evictions"] == 1
+
+    time.sleep(0.25)
+    assert cache.lookup(questions[3].tolist(), ("m", "general", False), "v1") is None
+    assert cache.get_stats()["size"] == 0
+    print(f"   ✅ {cache.get_stats()}")
+
+
+def test_lookup_latency():
+    print("\n5. Lookup latency with a full cache")
+    cache = SemanticResponseCache(max_size=500)
+    for i in range(500):
+        cache.store(random_unit().tolist(), ("m", "general", False), "v1", f"q{i}", answer(str(i)))
+    probes = [random_unit().tolist() for _ in range(200)]
+    start = time.perf_counter()
+    for probe in probes:
+        cache.lookup(probe, ("m", "general", False), "v1")
+    elapsed_ms = (time.perf_counter() - start) * 1000 / len(probes)
+    print(f"   {'✅' if elapsed_ms < 5 else '⚠️'} {elapsed_ms:.3f} ms/lookup over 500 entries")
+
+
+if __name__ == "__main__":
+    print("="*70)
+    print("TESTING SEMANTIC RESPONSE CACHE")
+    print("="*70)
+
+    test_near_duplicates()
+    test_scope()
+    test_kb_version()
+    test_eviction_and_ttl()
+    test_lookup_latency()
+
+    print("\n" + "="*70)
+    print("DONE")
+    print("="*70)
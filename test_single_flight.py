@@ -0,0 +1,86 @@
+"""Test single-flight coalescing of identical in-flight requests"""
+
+import time
+import asyncio
+import threading
+from src.single_flight import SingleFlight, normalize_query
+
+
+def test_normalize():
+    print("\n1. Normalized keys")
+    assert normalize_query("RDP not working!!") == normalize_query("  rdp   NOT working ") == "rdp not working"
+    assert normalize_query("RDP not working") != normalize_query("RDP working")
+    print("   ✅ case, punctuation and spacing ignored")
+
+
+def test_threads():
+    print("\n2. Threads: 20 identical requests, one computation")
+    flight = SingleFlight()
+    calls = []
+
+    def answer():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"response": "Restart the RDP session"}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.run("rdp", answer))) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1 and len(results) == 20
+    assert all(r == {"response": "Restart the RDP session"} for r in results)
+    # Followers get their own copy
+    assert len({id(r) for r in results}) == 20
+    # Nothing is kept after the flight lands
+    flight.run("rdp", answer)
+    assert len(calls) == 2
+    print(f"   ✅ {flight.get_stats()}")
+
+
+def test_async():
+    print("\n3. Event loop: errors and cancellation")
+    flight = SingleFlight()
+    calls = []
+
+    async def answer():
+        calls.append(1)
+        await asyncio.sleep(0.2)
+        return {"response": "QuickBooks update is rolling out"}
+
+    async def failing():
+        await asyncio.sleep(0.05)
+        raise RuntimeError("OpenAI down")
+
+    async def main():
+        results = await asyncio.gather(*(flight.run_async("qb", answer) for _ in range(20)))
+        assert len(calls) == 1 and len(results) == 20
+
+        errors = await asyncio.gather(*(flight.run_async("err", failing) for _ in range(5)), return_exceptions=True)
+        assert all(isinstance(e, RuntimeError) for e in errors)
+
+        # A cancelled leader does not take its followers down with it
+        leader = asyncio.ensure_future(flight.run_async("cancel", answer))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.run_async("cancel", answer))
+        await asyncio.sleep(0.05)
+        leader.cancel()
+        assert (await follower)["response"]
+
+    asyncio.run(main())
+    print(f"   ✅ {flight.get_stats()}")
+
+
+if __name__ == "__main__":
+    print("="*70)
+    print("TESTING SINGLE-FLIGHT COALESCING")
+    print("="*70)
+
+    test_normalize()
+    test_threads()
+    test_async()
+
+    print("\n" + "="*70)
+    print("DONE")
+    print("="*70)
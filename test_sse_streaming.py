@@ -0,0 +1,140 @@
+"""Test SSE streaming helpers: sentence trimming, bounded completions, SSE frames"""
+
+import json
+import asyncio
+from types import SimpleNamespace
+from src.sse_streaming import trim_to_sentence, bounded_chat_completion, sse_chat_stream, time_to_first_token
+
+
+class FakeResponse:
+    def __init__(self):
+        self.closed = False
+
+    async def aclose(self):
+        self.closed = True
+
+
+class FakeStream:
+    """Stand-in for an openai AsyncStream: yields one chunk per delta, counts what was read"""
+
+    def __init__(self, deltas):
+        self.deltas = deltas
+        self.read = 0
+        self.response = FakeResponse()
+
+    def __aiter__(self):
+        return self._chunks()
+
+    async def _chunks(self):
+        for delta in self.deltas:
+            self.read += 1
+            await asyncio.sleep(0)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))])
+
+
+class FakeCompletions:
+    def __init__(self, deltas):
+        self.deltas = deltas
+        self.streams = []
+
+    async def create(self, stream=False, **request):
+        assert stream, "bounded completions must stream"
+        self.streams.append(FakeStream(self.deltas))
+        return self.streams[-1]
+
+
+class FakeAsyncClient:
+    def __init__(self, deltas):
+        self.chat = SimpleNamespace(completions=FakeCompletions(deltas))
+
+
+def test_trim_to_sentence():
+    print("\n1. Answers end at a sentence inside the budget")
+    assert trim_to_sentence("Short answer.", 50) == "Short answer."
+
+    text = "Restart QuickBooks. Then open the file again. It should work now."
+    assert trim_to_sentence(text, 50) == "Restart QuickBooks. Then open the file again."
+
+    # A sentence ending exactly at the budget is kept
+    budget = len("Restart QuickBooks. Then open the file again.")
+    assert trim_to_sentence(text, budget) == "Restart QuickBooks. Then open the file again."
+
+    # "1." list markers are not sentence ends; line breaks are
+    steps = "Steps:\n1. Open Services 2. Find QuickBooksDBXX and restart it"
+    assert trim_to_sentence(steps, 40) == "Steps:"
+    # ... so a numbered list with no real sentence end falls back to a word cut
+    assert trim_to_sentence("Do this 1. then 2. then finish up", 20) == "Do this 1. then 2."
+
+    # No sentence end inside the budget: cut at a word
+    assert trim_to_sentence("Open Services and find QuickBooksDBXX then restart", 30) == "Open Services and find"
+    print("   ✅ sentence ends, list markers, exact budget, word fallback")
+
+
+def test_bounded_completion_stops_early():
+    print("\n2. Generation stops once the budget is passed")
+    deltas = ["Open Services. ", "Find QuickBooksDBXX. ", "Right-click it. ", "Choose Start. "] * 20
+    client = FakeAsyncClient(deltas)
+
+    async def run():
+        result = await bounded_chat_completion(client, 40, model="gpt-4o-mini", messages=[])
+        # Closed by the time the call returns, not later when the event loop shuts down
+        return result, client.chat.completions.streams[0].response.closed
+
+    result, closed = asyncio.run(run())
+    stream = client.chat.completions.streams[0]
+
+    assert result == {"text": "Open Services. Find QuickBooksDBXX.", "truncated": True}, result
+    assert stream.read == 3, stream.read  # 15 + 21 + 16 chars: the third delta passes 40
+    assert closed, "the HTTP response must be closed so OpenAI stops generating"
+    print(f"   ✅ read {stream.read} of {len(deltas)} deltas, response closed")
+
+
+def test_bounded_completion_within_budget():
+    print("\n3. Answers within the budget are complete")
+    client = FakeAsyncClient(["Reset it ", "on SelfCare.", None, ""])
+    result = asyncio.run(bounded_chat_completion(client, 1800, model="gpt-4o-mini", messages=[]))
+    assert result == {"text": "Reset it on SelfCare.", "truncated": False}, result
+    assert client.chat.completions.streams[0].response.closed
+    print(f"   ✅ {result}")
+
+
+def test_sse_frames():
+    print("\n4. SSE frames: tokens, then done (or error)")
+
+    async def events():
+        yield "token", "Hello"
+        yield "token", " there"
+        yield "done", {"response": "Hello there"}
+
+    async def failing():
+        yield "token", "Hel"
+        raise RuntimeError("OpenAI down")
+
+    async def collect(stream):
+        return [frame async for frame in stream]
+
+    before = time_to_first_token.count
+    frames = asyncio.run(collect(sse_chat_stream(events(), lambda result: {"answer": result["response"]})))
+    assert [f.split("\n")[0] for f in frames] == ["event: token", "event: token", "event: done"]
+    done = json.loads(frames[-1].split("data: ", 1)[1])
+    assert done["answer"] == "Hello there" and "time_to_first_token_ms" in done
+    assert time_to_first_token.count == before + 1
+
+    frames = asyncio.run(collect(sse_chat_stream(failing(), lambda result: {})))
+    assert frames[-1].startswith("event: error") and "OpenAI down" in frames[-1]
+    print(f"   ✅ {len(frames)} frames on failure, time to first token recorded")
+
+
+if __name__ == "__main__":
+    print("="*70)
+    print("TESTING SSE STREAMING")
+    print("="*70)
+
+    test_trim_to_sentence()
+    test_bounded_completion_stops_early()
+    test_bounded_completion_within_budget()
+    test_sse_frames()
+
+    print("\n" + "="*70)
+    print("DONE")
+    print("="*70)
@@ -0,0 +1,93 @@
+"""Parity test: ChromaDB and NumPy backends must return identical results"""
+
+import tempfile
+from pathlib import Path
+import numpy as np
+from src.vector_backends import ChromaBackend, NumpyBackend
+
+CATEGORIES = ["QuickBooks", "Password Reset", "Printer", "Email", "RDP Connection"]
+
+
+def build_fixture(n_chunks: int = 300, dim: int = 64, seed: int = 7):
+    """Synthetic chunks with random embeddings (no OpenAI calls needed)"""
+    rng = np.random.default_rng(seed)
+    ids = [f"chunk_{i}" for i in range(n_chunks)]
+    documents = [f"Document text {i}" for i in range(n_chunks)]
+    metadatas = [{"category": CATEGORIES[i % len(CATEGORIES)], "priority": "high" if i % 3 else "medium"}
+                 for i in range(n_chunks)]
+    embeddings = rng.standard_normal((n_chunks, dim)).astype(np.float32).tolist()
+    queries = rng.standard_normal((20, dim)).astype(np.float32).tolist()
+    return ids, documents, metadatas, embeddings, queries
+
+
+def test_backend_parity():
+    print("="*70)
+    print("TESTING VECTOR BACKEND PARITY (chroma vs numpy)")
+    print("="*70)
+
+    ids, documents, metadatas, embeddings, queries = build_fixture()
+
+    with tempfile.TemporaryDirectory() as chroma_dir, tempfile.TemporaryDirectory() as numpy_dir:
+        collections = {}
+        for name, backend in (("chroma", ChromaBackend(chroma_dir)), ("numpy", NumpyBackend(numpy_dir))):
+            collection = backend.get_or_create_collection("parity_test")
+            collection.add(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+            collections[name] = collection
+
+        filters = [
+            None,
+            {"category": "QuickBooks"},
+            {"category": {"$in": ["Printer", "Email"]}},
+            {"$and": [{"category": "Password Reset"}, {"priority": "high"}]},
+        ]
+
+        for where in filters:
+            for query in queries:
+                results = {
+                    name: collection.query(query_embeddings=[query], n_results=10, where=where)
+                    for name, collection in collections.items()
+                }
+                chroma, numpy_result = results["chroma"], results["numpy"]
+
+                assert chroma["ids"][0] == numpy_result["ids"][0], \
+                    f"ID mismatch for filter {where}: {chroma['ids'][0]} vs {numpy_result['ids'][0]}"
+                assert np.allclose(chroma["distances"][0], numpy_result["distances"][0], atol=1e-4), \
+                    f"Distance mismatch for filter {where}"
+                assert chroma["metadatas"][0] == numpy_result["metadatas"][0]
+
+            print(f"✅ Filter {where}: {len(queries)} queries identical")
+
+        assert collections["chroma"].count() == collections["numpy"].count() == len(ids)
+
+    print("\n✅ Both backends return identical results")
+
+
+def test_numpy_writes_buffered():
+    print("\nNumpy writes are saved once per flush()")
+    ids, documents, metadatas, embeddings, _ = build_fixture()
+
+    with tempfile.TemporaryDirectory() as numpy_dir:
+        collection = NumpyBackend(numpy_dir).get_or_create_collection("flush_test")
+        for start in range(0, len(ids), 10):
+            end = start + 10
+            collection.upsert(ids=ids[start:end], embeddings=embeddings[start:end],
+                              documents=documents[start:end], metadatas=metadatas[start:end])
+        collection.delete(ids=ids[:5])
+        records = Path(numpy_dir) / "flush_test" / "records.json"
+        assert not records.exists(), "batches must not be written one by one"
+
+        collection.flush()
+        reloaded = NumpyBackend(numpy_dir).get_or_create_collection("flush_test")
+        assert reloaded.ids == ids[5:]
+        assert np.allclose(reloaded.embeddings, collection.embeddings)
+
+        mtime = records.stat().st_mtime_ns
+        collection.flush()
+        assert records.stat().st_mtime_ns == mtime, "nothing changed - nothing to write"
+
+    print(f"✅ {len(ids) // 10} upserts + 1 delete -> one write")
+
+
+if __name__ == "__main__":
+    test_backend_parity()
+    test_numpy_writes_buffered()
@@ -0,0 +1,147 @@
+"""Test VectorStore on the NumPy backend with a fake embeddings client (no OpenAI calls)"""
+
+import os
+import hashlib
+import tempfile
+import numpy as np
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test-00000000000000000000")
+os.environ.setdefault("EMBEDDING_CACHE_ENABLED", "false")
+
+from src.vector_store import VectorStore
+from src.vector_backends import NumpyBackend
+
+CATEGORIES = ["QuickBooks", "Printer", "Password Reset"]
+
+
+class _Item:
+    def __init__(self, embedding):
+        self.embedding = embedding
+
+
+class _Response:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeEmbeddings:
+    """Deterministic unit vectors per text; records every input sent"""
+
+    def __init__(self, dim: int = 32):
+        self.dim = dim
+        self.calls = 0
+        self.inputs = []
+
+    def create(self, model, input, **kwargs):
+        self.calls += 1
+        self.inputs.extend(input)
+        vectors = []
+        for text in input:
+            seed = int(hashlib.md5(text.encode()).hexdigest()[:8], 16)
+            vector = np.random.default_rng(seed).standard_normal(self.dim)
+            vectors.append(_Item((vector / np.linalg.norm(vector)).tolist()))
+        return _Response(vectors)
+
+
+class FakeClient:
+    def __init__(self):
+        self.embeddings = FakeEmbeddings()
+
+
+def make_store(directory: str) -> VectorStore:
+    store = VectorStore(backend="numpy")
+    store.backend = NumpyBackend(directory)
+    store.openai_client = FakeClient()
+    store.create_collection("vector_store_test")
+    return store
+
+
+def make_chunks(n: int = 12):
+    return [
+        {
+            "id": f"chunk_{i}",
+            "content": f"Article {i} about {CATEGORIES[i % len(CATEGORIES)]}",
+            "metadata": {"category": CATEGORIES[i % len(CATEGORIES)], "chunk_number": i}
+        }
+        for i in range(n)
+    ]
+
+
+def test_sync_diff():
+    print("\n1. Sync embeds only new/changed chunks and deletes removed ones")
+    with tempfile.TemporaryDirectory() as directory:
+        store = make_store(directory)
+        chunks = make_chunks()
+        stats = store.add_documents(chunks, sync=True)
+        assert stats == {"added": 12, "updated": 0, "deleted": 0, "unchanged": 0}, stats
+
+        embeddings = store.openai_client.embeddings
+        sent = len(embeddings.inputs)
+        assert store.add_documents(chunks, sync=True) == {"added": 0, "updated": 0, "deleted": 0, "unchanged": 12}
+        assert len(embeddings.inputs) == sent, "unchanged chunks must not be re-embedded"
+
+        chunks[0]["content"] += " (updated)"
+        chunks[1]["metadata"]["category"] = "Email"  # metadata is part of the content hash
+        removed = chunks.pop(2)
+        chunks.append({"id": "chunk_new", "content": "A new article", "metadata": {"category": "Email"}})
+        stats = store.add_documents(chunks, sync=True)
+        assert stats == {"added": 1, "updated": 2, "deleted": 1, "unchanged": 9}, stats
+        assert sorted(embeddings.inputs[sent:]) == sorted([chunks[0]["content"], chunks[1]["content"], "A new article"])
+
+        # The result is on disk, not just in memory
+        reloaded = make_store(directory)
+        data = reloaded.collection.get(ids=["chunk_0", "chunk_1", removed["id"]])
+        assert data["ids"] == ["chunk_0", "chunk_1"]
+        assert data["documents"][0].endswith("(updated)") and data["metadatas"][1]["category"] == "Email"
+        assert reloaded.collection.count() == len(chunks)
+    print(f"   ✅ {stats}")
+
+
+def test_search_many_groups_filters():
+    print("\n2. search_many: one embedding call, one lookup per distinct filter")
+    with tempfile.TemporaryDirectory() as directory:
+        store = make_store(directory)
+        store.add_documents(make_chunks(30))
+
+        queries = [f"search_many query {i}" for i in range(6)]
+        filters = [None, {"category": "Printer"}, None, {"category": "Printer"},
+                   {"category": {"$in": ["QuickBooks", "Printer"]}}, {"category": "Printer"}]
+
+        lookups = []
+        query = store.collection.query
+        store.collection.query = lambda **kwargs: lookups.append(kwargs["where"]) or query(**kwargs)
+        embeddings = store.openai_client.embeddings
+        calls = embeddings.calls
+        results = store.search_many(queries, top_k=5, filters=filters)
+
+        assert embeddings.calls == calls + 1
+        grouped = len(lookups)
+        assert grouped == 3, lookups
+        for query_text, filter_dict, hits in zip(queries, filters, results):
+            # Same hits as searching one query at a time, and the filter applies
+            single = store.search(query_text, top_k=5, filter_dict=filter_dict)
+            assert [h["id"] for h in hits] == [h["id"] for h in single]
+            assert np.allclose([h["distance"] for h in hits], [h["distance"] for h in single], atol=1e-6)
+            if filter_dict == {"category": "Printer"}:
+                assert hits and all(h["metadata"]["category"] == "Printer" for h in hits)
+
+        assert store.search_many([]) == []
+        try:
+            store.search_many(queries, filters=filters[:2])
+            assert False, "mismatched filters must be rejected"
+        except ValueError:
+            pass
+    print(f"   ✅ {len(queries)} queries, {grouped} lookups")
+
+
+if __name__ == "__main__":
+    print("="*70)
+    print("TESTING VECTOR STORE")
+    print("="*70)
+
+    test_sync_diff()
+    test_search_many_groups_filters()
+
+    print("\n" + "="*70)
+    print("DONE")
+    print("="*70)